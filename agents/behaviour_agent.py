@@ -98,6 +98,9 @@ class BehaviorMonitorAgent:
         check_emotional_patterns (bool): Enable emotional pattern detection
     """
     
+    reads = ("user_trades",)
+    writes = ("behavior_label", "behavior_reason")
+
     def __init__(self, 
                 check_revenge_trading: bool = True, 
                 check_overtrading: bool = True,
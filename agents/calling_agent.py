@@ -35,6 +35,21 @@ class CallingAgent:
     _schedules: Dict[str, CallSchedule] = {}
     _call_logs: List[Dict[str, Any]] = []
 
+    reads = (
+        "asset",
+        "consensus_stance",
+        "current_price",
+        "market_sentiment",
+        "move_direction",
+        "phone_number",
+        "price_change_pct",
+        "risk",
+        "risk_level",
+        "shariah_compliance",
+        "user_id",
+    )
+    writes = ("market_call", "calling_result")
+
     def run(self, context: Dict[str, Any]) -> Dict[str, Any]:
         return self.run_async(context)
 
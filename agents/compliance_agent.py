@@ -2,7 +2,10 @@ import logging
 import json
 import os
 from typing import Dict, List, Optional
+from llm_council.models.schemas import ComplianceReview
 from llm_council.services.llm_client import LLMClient
+from llm_council.services.structured_output import complete_structured
+from services.executors import POOL_LLM, run_in_pool
 
 logger = logging.getLogger(__name__)
 
@@ -13,12 +16,16 @@ class ComplianceAgent:
     Flags risky language (promises of returns, pump-and-dump rhetoric).
     """
 
+    reads = ("narrative", "persona_post")
+    writes = ("compliance_analysis",)
+    executor = POOL_LLM
+
     def __init__(self):
         self.api_key = os.getenv("OPENROUTER_API_KEY")
         self.llm_client = None
         if self.api_key:
             try:
-                self.llm_client = LLMClient(provider_type="openrouter", api_key=self.api_key, model="mistralai/mistral-7b-instruct")
+                self.llm_client = LLMClient(provider_type="openrouter", api_key=self.api_key, model="mistralai/mistral-7b-instruct", json_mode=True)
             except Exception as e:
                 logger.warning(f"ComplianceAgent: LLM Client init failed: {e}")
 
@@ -53,16 +60,10 @@ class ComplianceAgent:
         """
 
         try:
-            response = self.llm_client.complete(prompt, system="You are a Compliance Officer.")
-
-            # Simple JSON extraction
-            text = response.strip()
-            if "```json" in text:
-                text = text.split("```json")[1].split("```")[0].strip()
-            elif "```" in text:
-                text = text.split("```")[1].split("```")[0].strip()
-
-            return json.loads(text)
+            reply = complete_structured(
+                self.llm_client, prompt, ComplianceReview, agent="Compliance", system="You are a Compliance Officer."
+            )
+            return reply.model_dump()
 
         except Exception as e:
             logger.error(f"Compliance check failed: {e}")
@@ -87,6 +88,4 @@ class ComplianceAgent:
         return context
 
     async def run_async(self, context: Dict) -> Dict:
-        import asyncio
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self.run, context)
+        return await run_in_pool(self.executor, self.run, context)
@@ -0,0 +1,269 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from pydantic import ValidationError
+
+from agents.compliance_agent import ComplianceAgent
+from agents.moderator import ModeratorAgent, summarize_moderation
+from agents.persona import PersonaAgent
+from agents.risk_manager import RiskManagerAgent
+from agents.sentiment_agent import SentimentAnalysisAgent
+from agents.shariah_compliance_agent import ShariahComplianceAgent
+from llm_council.models.schemas import (
+    ComplianceReview,
+    PersonaPosts,
+    PostModeration,
+    RiskAssessment,
+    SentimentScore,
+    ShariahVerdict,
+)
+from llm_council.services.llm_client import LLMClient
+from llm_council.services.llm_metrics import track_usage
+from llm_council.services.structured_output import get_structured_output_stats, parse_json
+from services.executors import POOL_LLM, POOL_MARKET_DATA, run_in_pool
+
+logger = logging.getLogger(__name__)
+
+# Sections of the fused reply and the schema each must satisfy
+FUSED_SECTIONS = {
+    "sentiment": SentimentScore,
+    "risk": RiskAssessment,
+    "shariah": ShariahVerdict,
+    "persona_post": PersonaPosts,
+    "moderation": PostModeration,
+    "compliance": ComplianceReview,
+}
+
+# Sections that review the persona posts, so must be redone if the posts are
+POST_REVIEW_SECTIONS = ("moderation", "compliance")
+
+
+class FusedAnalysisAgent:
+    """
+    Answers every post-debate LLM task (sentiment, qualitative risk, Shariah
+    screening, persona posts, moderation and compliance) with one multi-task
+    prompt per asset instead of up to seven sequential calls.
+    Sections that fail validation fall back to their own agent.
+    """
+
+    reads = (
+        "asset",
+        "behavior_label",
+        "council_debate",
+        "economic_calendar",
+        "market_opinions",
+        "move_direction",
+        "price_change_pct",
+        "sector",
+    )
+    writes = (
+        "sentiment_analysis",
+        "risk_analysis",
+        "shariah_compliance",
+        "persona_post",
+        "moderation",
+        "moderated_output",
+        "compliance_analysis",
+        "fused_analysis",
+    )
+
+    def __init__(self):
+        self.api_key = os.getenv("OPENROUTER_API_KEY")
+        self.llm_client = None
+        if self.api_key:
+            try:
+                self.llm_client = LLMClient(provider_type="openrouter", api_key=self.api_key, model="mistralai/mistral-7b-instruct", json_mode=True)
+            except Exception as e:
+                logger.warning(f"FusedAnalysisAgent: LLM Client init failed: {e}")
+        self.risk_manager = RiskManagerAgent()
+        self.sentiment_agent = SentimentAnalysisAgent()
+
+    def build_prompt(self, context: Dict, headlines: List[str], metrics: Dict) -> str:
+        """One prompt carrying the inputs and instructions of every post-debate agent."""
+        asset = context.get("asset", "")
+        price_change_pct = context.get("price_change_pct", "")
+        direction = context.get("move_direction", "")
+        council_debate = context.get("council_debate", {})
+        consensus_text = "\n".join([f"- {p.get('statement')}" for p in council_debate.get("consensus_points", [])])
+        disagreement_text = "\n".join([f"- {p.get('topic')}" for p in council_debate.get("disagreement_points", [])])
+        opinions = " ".join(context.get("market_opinions", []))[:1500]
+
+        return f"""
+        You are the post-debate analysis desk for {asset} ({direction} {price_change_pct}% today).
+        Complete ALL six tasks and answer with ONE JSON object.
+
+        Council Consensus:
+        {consensus_text or "- none"}
+
+        Council Disagreements:
+        {disagreement_text or "- none"}
+
+        Council Opinions: {opinions}
+
+        Headlines: {json.dumps(headlines)}
+
+        Quantitative Risk Metrics:
+        - VaR (95%): {metrics['var_95']}%
+        - Max Drawdown (1Y): {metrics['max_drawdown']}%
+        - Volatility (Ann.): {metrics['volatility']}%
+
+        Sector: {context.get("sector", "")}
+        Behavior label: {context.get("behavior_label", "")}
+
+        Tasks:
+        1. "sentiment": score from -1.0 (Very Bearish) to 1.0 (Very Bullish), label (BEARISH, NEUTRAL, BULLISH) and a short summary of the mood in the headlines.
+        2. "risk": risk_score (0-100, 100 is extreme risk), verdict (LOW, MODERATE, HIGH, EXTREME) and reasoning (max 2 sentences) from the metrics and the council.
+        3. "shariah": AAOIFI screening of {asset}: core business not Haram (alcohol, gambling, pork, interest-based finance, adult entertainment); debt, cash + interest bearing securities and receivables each below 33% of market cap (estimate from your knowledge). compliant (true/false), score (0-100, 100 is fully compliant), reason, issues.
+        4. "persona_post": "x" is a viral, emoji-heavy tweet and "linkedin" a professional LinkedIn post, both about {asset} moving {price_change_pct}% based on the council opinions.
+        5. "moderation": review each post from task 4 for exaggeration, hype, emotional triggers and harmful patterns: verdict (POST, WARN, BLOCK) and reason, for "x" and "linkedin".
+        6. "compliance": review the posts from task 4 for SEC/FINRA issues (guaranteed returns, pump-and-dump language, specific advice without disclaimer): status (PASS or FLAGGED), issues, notes.
+
+        Respond in JSON format:
+        {{
+            "sentiment": {{"score": 0.4, "label": "BULLISH", "summary": "..."}},
+            "risk": {{"risk_score": 60, "verdict": "MODERATE", "reasoning": "..."}},
+            "shariah": {{"compliant": true, "score": 80, "reason": "...", "issues": []}},
+            "persona_post": {{"x": "...", "linkedin": "..."}},
+            "moderation": {{"x": {{"verdict": "POST", "reason": "..."}}, "linkedin": {{"verdict": "POST", "reason": "..."}}}},
+            "compliance": {{"status": "PASS", "issues": [], "notes": "..."}}
+        }}
+        """
+
+    def parse_sections(self, response: str) -> Tuple[Dict[str, Dict], List[str]]:
+        """
+        Validate each section of a fused reply on its own.
+
+        Returns:
+            Tuple of (valid sections as dicts, names of sections that need a fallback)
+        """
+        stats = get_structured_output_stats()
+        try:
+            data, repaired = parse_json(response)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Fused reply is not JSON: {e}")
+            stats.record("Fused Analysis", "failed")
+            return {}, list(FUSED_SECTIONS)
+        stats.record("Fused Analysis", "repaired" if repaired else "clean")
+
+        sections, failed = {}, []
+        for name, schema in FUSED_SECTIONS.items():
+            try:
+                sections[name] = schema.model_validate(data.get(name)).model_dump()
+            except (ValidationError, AttributeError) as e:
+                logger.warning(f"Fused section '{name}' invalid, falling back: {e}")
+                failed.append(name)
+
+        # Reviews of posts that are about to be rewritten are worthless
+        if "persona_post" in failed:
+            for name in POST_REVIEW_SECTIONS:
+                sections.pop(name, None)
+                if name not in failed:
+                    failed.append(name)
+        return sections, failed
+
+    async def run_async(self, context: Dict) -> Dict:
+        symbol = context.get("asset", "SPY")
+        started = time.monotonic()
+
+        with track_usage() as usage:
+            metrics = await run_in_pool(POOL_MARKET_DATA, self.risk_manager.calculate_risk_metrics, symbol)
+            headlines = self.sentiment_agent.fetch_sentiment(symbol, context.get("economic_calendar", {}))
+
+            sections, failed = {}, list(FUSED_SECTIONS)
+            if self.llm_client:
+                try:
+                    response = await self.llm_client.complete_async(
+                        self.build_prompt(context, headlines, metrics),
+                        system="You are a multi-role trading analysis desk.",
+                        temperature=0.3
+                    )
+                    sections, failed = self.parse_sections(response)
+                except Exception as e:
+                    logger.error(f"Fused analysis call failed: {e}")
+
+            self._apply(context, sections, metrics)
+            if failed:
+                logger.info(f"Fused analysis falling back for: {', '.join(failed)}")
+                await self._run_fallbacks(context, failed, headlines, metrics)
+
+        context["fused_analysis"] = {
+            "fallback_sections": failed,
+            "llm_calls": usage["calls"],
+            "prompt_tokens": usage["prompt_tokens"],
+            "completion_tokens": usage["completion_tokens"],
+            "seconds": round(time.monotonic() - started, 2),
+        }
+        logger.info(f"Fused analysis for {symbol}: {usage['calls']} LLM call(s), fallbacks: {failed or 'none'}")
+        return context
+
+    def run(self, context: Dict) -> Dict:
+        """Sync wrapper for callers outside an event loop."""
+        return asyncio.run(self.run_async(context))
+
+    def _apply(self, context: Dict, sections: Dict[str, Dict], metrics: Dict):
+        """Write valid sections into the context under the keys each agent uses."""
+        if "sentiment" in sections:
+            context["sentiment_analysis"] = sections["sentiment"]
+        if "risk" in sections:
+            context["risk_analysis"] = {
+                "metrics": metrics,
+                "qualitative": sections["risk"],
+                "timestamp": datetime.utcnow().isoformat()
+            }
+        if "shariah" in sections:
+            context["shariah_compliance"] = sections["shariah"]
+        if "persona_post" in sections:
+            context["persona_post"] = sections["persona_post"]
+        if "moderation" in sections:
+            context["moderation"] = sections["moderation"]
+            context["moderated_output"] = summarize_moderation(sections["moderation"])[1]
+        if "compliance" in sections:
+            context["compliance_analysis"] = sections["compliance"]
+
+    async def _run_fallbacks(self, context: Dict, failed: List[str], headlines: List[str], metrics: Dict):
+        """Per-agent calls for failed sections; post reviews wait for the posts."""
+        symbol = context.get("asset", "SPY")
+        first = []
+        if "sentiment" in failed:
+            first.append(run_in_pool(POOL_LLM, self._fallback_sentiment, context, symbol, headlines))
+        if "risk" in failed:
+            first.append(run_in_pool(POOL_LLM, self._fallback_risk, context, symbol, metrics))
+        if "shariah" in failed:
+            first.append(run_in_pool(POOL_LLM, self._fallback_shariah, context))
+        if "persona_post" in failed:
+            first.append(run_in_pool(POOL_LLM, self._fallback_persona, context))
+        await asyncio.gather(*first)
+
+        reviews = []
+        if "moderation" in failed:
+            reviews.append(run_in_pool(POOL_LLM, self._fallback_moderation, context))
+        if "compliance" in failed:
+            reviews.append(run_in_pool(POOL_LLM, self._fallback_compliance, context))
+        await asyncio.gather(*reviews)
+
+    def _fallback_sentiment(self, context: Dict, symbol: str, headlines: List[str]):
+        context["sentiment_analysis"] = self.sentiment_agent.analyze_sentiment(symbol, headlines)
+
+    def _fallback_risk(self, context: Dict, symbol: str, metrics: Dict):
+        context["risk_analysis"] = {
+            "metrics": metrics,
+            "qualitative": self.risk_manager.analyze_qualitative_risk(symbol, context.get("council_debate", {}), metrics),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+    def _fallback_shariah(self, context: Dict):
+        ShariahComplianceAgent().run(context)
+
+    def _fallback_persona(self, context: Dict):
+        PersonaAgent().run(context)
+
+    def _fallback_moderation(self, context: Dict):
+        ModeratorAgent().run(context)
+
+    def _fallback_compliance(self, context: Dict):
+        ComplianceAgent().run(context)
@@ -10,6 +10,8 @@ from typing import List, Dict, Optional
 from datetime import datetime, timedelta
 import yfinance as yf
 
+from services.executors import POOL_MARKET_DATA, run_in_pool
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,6 +25,8 @@ class IPOScraperAgent:
     - Saudi Stock Exchange (Tadawul)
     """
 
+    executor = POOL_MARKET_DATA
+
     def __init__(self):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
@@ -244,9 +248,7 @@ class IPOScraperAgent:
 
     async def run_async(self, context: Dict) -> Dict:
         """Async version."""
-        import asyncio
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self.run, context)
+        return await run_in_pool(self.executor, self.run, context)
 
 
 # Cron job script
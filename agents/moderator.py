@@ -1,11 +1,18 @@
-import requests
-import json
 import os
 import logging
 
+from llm_council.models.schemas import ModerationVerdict
+from llm_council.services.llm_client import LLMClient
+from llm_council.services.structured_output import complete_structured
+from services.executors import POOL_LLM
+
 logger = logging.getLogger(__name__)
 
 class ModeratorAgent:
+    reads = ("asset", "behavior_label", "persona_post", "price_change_pct")
+    writes = ("moderation", "moderated_output")
+    executor = POOL_LLM
+
     def run(self, context: dict) -> dict:
         # Expects context with persona_post from PersonaAgent
         persona_post = context.get("persona_post", {})
@@ -23,49 +30,30 @@ class ModeratorAgent:
             context["moderated_output"] = "Moderation unavailable."
             return context
 
-        headers = {
-            "Authorization": "Bearer " + api_key,
-            "Content-Type": "application/json",
-            "HTTP-Referer": "https://tensortrade.ai",
-            "X-Title": "TensorTrade"
-        }
-        base_url = "https://openrouter.ai/api/v1/chat/completions"
-        model = "meta-llama/llama-3.3-70b-instruct:free"
+        llm_client = LLMClient(
+            provider_type="openrouter",
+            api_key=api_key,
+            model="meta-llama/llama-3.3-70b-instruct:free",
+            json_mode=True
+        )
 
         def moderation_prompt(platform, post):
             return (
                 f"Review this {platform} post about {asset} moving {price_change_pct}%: '{post}'. "
                 f"Behavior label: {behavior_label}. "
                 "Criteria: exaggeration, hype, emotional triggers, harmful patterns. "
-                "Respond with a JSON object: { 'verdict': 'POST|WARN|BLOCK', 'reason': '<explanation>' }"
+                'Respond with a JSON object: {"verdict": "POST|WARN|BLOCK", "reason": "<explanation>"}'
             )
 
         def query_openrouter(prompt):
-            payload = {
-                "model": model,
-                "messages": [{"role": "user", "content": prompt}],
-                "max_tokens": 200,
-                "temperature": 0.1
-            }
             try:
-                response = requests.post(base_url, headers=headers, data=json.dumps(payload), timeout=10)
-                response.raise_for_status()
-                result = response.json()
-                content = result["choices"][0]["message"]["content"].strip()
-
-                # Simple JSON extraction
-                if "```json" in content:
-                    content = content.split("```json")[1].split("```")[0].strip()
-                elif "```" in content:
-                    content = content.split("```")[1].split("```")[0].strip()
-
-                return json.loads(content)
+                reply = complete_structured(llm_client, prompt, ModerationVerdict, agent="Moderator", temperature=0.1)
+                return reply.model_dump()
             except Exception as e:
                 logger.error(f"Moderation API error: {e}")
                 return {"verdict": "WARN", "reason": f"API error: {str(e)}"}
 
         moderation = {}
-        overall_status = "SAFE"
 
         for platform in ["x", "linkedin"]:
             post = persona_post.get(platform, "")
@@ -74,16 +62,23 @@ class ModeratorAgent:
                 continue
 
             prompt = moderation_prompt(platform, post)
-            result = query_openrouter(prompt)
-            moderation[platform] = result
-
-            if result.get("verdict") == "BLOCK":
-                overall_status = "BLOCKED"
-            elif result.get("verdict") == "WARN" and overall_status != "BLOCKED":
-                overall_status = "WARNING"
+            moderation[platform] = query_openrouter(prompt)
 
+        overall_status, moderated_output = summarize_moderation(moderation)
         context["moderation"] = moderation
-        context["moderated_output"] = f"Content Status: {overall_status}. " + " | ".join([f"{k.upper()}: {v.get('verdict')}" for k,v in moderation.items()])
+        context["moderated_output"] = moderated_output
 
         logger.info(f"Moderation complete: {overall_status}")
         return context
+
+
+def summarize_moderation(moderation: dict) -> tuple:
+    """Overall status (SAFE / WARNING / BLOCKED) and the one-line summary for a set of verdicts."""
+    overall_status = "SAFE"
+    for result in moderation.values():
+        if result.get("verdict") == "BLOCK":
+            overall_status = "BLOCKED"
+        elif result.get("verdict") == "WARN" and overall_status != "BLOCKED":
+            overall_status = "WARNING"
+    moderated_output = f"Content Status: {overall_status}. " + " | ".join([f"{k.upper()}: {v.get('verdict')}" for k,v in moderation.items()])
+    return overall_status, moderated_output
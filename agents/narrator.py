@@ -101,6 +101,7 @@ See class documentation below for detailed method signatures.
 import os
 from typing import List, Dict, Tuple
 from dotenv import load_dotenv
+from services.executors import POOL_LLM
 
 # Make groq import optional
 try:
@@ -123,6 +124,10 @@ class NarratorAgent:
         client (Groq): Groq client instance
     """
     
+    reads = ("market_opinions",)
+    writes = ("session_summary",)
+    executor = POOL_LLM
+
     def __init__(self, persona_name: str = "The Trading Coach"):
         """
         Initialize the Narrator Agent.
@@ -10,6 +10,8 @@ from scipy.optimize import minimize
 import yfinance as yf
 from datetime import datetime, timedelta
 
+from services.executors import POOL_CPU, POOL_MARKET_DATA, get_executor, run_in_pool
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,6 +21,9 @@ class PortfolioOptimizerAgent:
     Supports Shariah-compliant optimization.
     """
 
+    # yfinance downloads; the SLSQP solve itself runs on the CPU process pool
+    executor = POOL_MARKET_DATA
+
     def __init__(self):
         self.risk_free_rate = 0.04  # 4% annual risk-free rate
 
@@ -74,8 +79,9 @@ class PortfolioOptimizerAgent:
             expected_returns = returns_data.mean() * 252  # Annualized
             cov_matrix = returns_data.cov() * 252  # Annualized
 
-            # Optimize
-            optimal_weights = self._optimize_weights(
+            # Optimize in a worker process so the solver does not hold the API's GIL
+            optimal_weights = get_executor(POOL_CPU).call(
+                self._optimize_weights,
                 expected_returns,
                 cov_matrix,
                 risk_tolerance,
@@ -279,9 +285,7 @@ class PortfolioOptimizerAgent:
 
     async def run_async(self, context: Dict) -> Dict:
         """Async version."""
-        import asyncio
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self.run, context)
+        return await run_in_pool(self.executor, self.run, context)
 
 
 # Example usage
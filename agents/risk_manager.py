@@ -4,7 +4,10 @@ import logging
 from typing import Dict, List, Optional
 from datetime import datetime
 import os
+from llm_council.models.schemas import RiskAssessment
 from llm_council.services.llm_client import LLMClient
+from llm_council.services.structured_output import complete_structured
+from services.executors import POOL_LLM, POOL_MARKET_DATA, run_in_pool
 
 logger = logging.getLogger(__name__)
 
@@ -14,12 +17,15 @@ class RiskManagerAgent:
     Calculates metrics like Value at Risk (VaR), Max Drawdown, and provides a qualitative risk verdict.
     """
 
+    reads = ("asset", "council_debate")
+    writes = ("risk_analysis",)
+
     def __init__(self):
         self.api_key = os.getenv("OPENROUTER_API_KEY")
         self.llm_client = None
         if self.api_key:
             try:
-                self.llm_client = LLMClient(provider_type="openrouter", api_key=self.api_key, model="mistralai/mistral-7b-instruct")
+                self.llm_client = LLMClient(provider_type="openrouter", api_key=self.api_key, model="mistralai/mistral-7b-instruct", json_mode=True)
             except Exception as e:
                 logger.warning(f"RiskManager: LLM Client init failed: {e}")
 
@@ -79,8 +85,8 @@ class RiskManagerAgent:
             consensus = council_debate.get("consensus_points", [])
             disagreements = council_debate.get("disagreement_points", [])
 
-            consensus_text = "\n".join([f"- {p.statement if hasattr(p, 'statement') else p.get('statement')}" for p in consensus])
-            disagreement_text = "\n".join([f"- {p.topic if hasattr(p, 'topic') else p.get('topic')}" for p in disagreements])
+            consensus_text = "\n".join([f"- {p.get('statement')}" for p in consensus])
+            disagreement_text = "\n".join([f"- {p.get('topic')}" for p in disagreements])
 
             prompt = f"""
             Analyze the risk profile for {symbol}.
@@ -108,19 +114,10 @@ class RiskManagerAgent:
             }}
             """
 
-            response = self.llm_client.complete(prompt, system="You are a professional Risk Manager.")
-
-            # Simple JSON extraction (reuse logic if possible, or simple strip)
-            import json
-            import re
-
-            text = response.strip()
-            if "```json" in text:
-                text = text.split("```json")[1].split("```")[0].strip()
-            elif "```" in text:
-                text = text.split("```")[1].split("```")[0].strip()
-
-            return json.loads(text)
+            reply = complete_structured(
+                self.llm_client, prompt, RiskAssessment, agent="Risk Manager", system="You are a professional Risk Manager."
+            )
+            return reply.model_dump()
 
         except Exception as e:
             logger.error(f"Qualitative risk analysis failed: {e}")
@@ -144,6 +141,9 @@ class RiskManagerAgent:
         qualitative = self.analyze_qualitative_risk(symbol, council_debate, metrics)
 
         # 3. Combine
+        return self._finish(context, symbol, metrics, qualitative)
+
+    def _finish(self, context: Dict, symbol: str, metrics: Dict, qualitative: Dict) -> Dict:
         risk_analysis = {
             "metrics": metrics,
             "qualitative": qualitative,
@@ -155,9 +155,10 @@ class RiskManagerAgent:
         return context
 
     async def run_async(self, context: Dict) -> Dict:
-        """Async wrapper."""
-        # For now, just run sync method as yfinance is sync
-        # In a real async app, we'd run yfinance in an executor
-        import asyncio
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self.run, context)
+        """Async version: yfinance on the market data pool, the LLM call on the LLM pool."""
+        symbol = context.get("asset", "SPY")
+        council_debate = context.get("council_debate", {})
+
+        metrics = await run_in_pool(POOL_MARKET_DATA, self.calculate_risk_metrics, symbol)
+        qualitative = await run_in_pool(POOL_LLM, self.analyze_qualitative_risk, symbol, council_debate, metrics)
+        return self._finish(context, symbol, metrics, qualitative)
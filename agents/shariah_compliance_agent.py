@@ -2,7 +2,10 @@ import logging
 import json
 import os
 from typing import Dict, List, Optional
+from llm_council.models.schemas import ShariahVerdict
 from llm_council.services.llm_client import LLMClient
+from llm_council.services.structured_output import complete_structured
+from services.executors import POOL_LLM, run_in_pool
 
 logger = logging.getLogger(__name__)
 
@@ -12,13 +15,17 @@ class ShariahComplianceAgent:
     Checks business activity (Haram industries) and financial ratios (Debt, Interest).
     """
 
+    reads = ("asset", "description", "sector")
+    writes = ("shariah_compliance",)
+    executor = POOL_LLM
+
     def __init__(self):
         self.api_key = os.getenv("OPENROUTER_API_KEY")
         self.llm_client = None
         if self.api_key:
             try:
                 # Using a model suitable for reasoning, like Mistral or Llama
-                self.llm_client = LLMClient(provider_type="openrouter", api_key=self.api_key, model="mistralai/mistral-7b-instruct")
+                self.llm_client = LLMClient(provider_type="openrouter", api_key=self.api_key, model="mistralai/mistral-7b-instruct", json_mode=True)
             except Exception as e:
                 logger.warning(f"ShariahComplianceAgent: LLM Client init failed: {e}")
 
@@ -61,16 +68,10 @@ class ShariahComplianceAgent:
         """
 
         try:
-            response = self.llm_client.complete(prompt, system="You are a Shariah Compliance Officer.")
-
-            # Simple JSON extraction
-            text = response.strip()
-            if "```json" in text:
-                text = text.split("```json")[1].split("```")[0].strip()
-            elif "```" in text:
-                text = text.split("```")[1].split("```")[0].strip()
-
-            return json.loads(text)
+            reply = complete_structured(
+                self.llm_client, prompt, ShariahVerdict, agent="Shariah Compliance", system="You are a Shariah Compliance Officer."
+            )
+            return reply.model_dump()
 
         except Exception as e:
             logger.error(f"Shariah compliance check failed: {e}")
@@ -99,6 +100,4 @@ class ShariahComplianceAgent:
         return context
 
     async def run_async(self, context: Dict) -> Dict:
-        import asyncio
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self.run, context)
+        return await run_in_pool(self.executor, self.run, context)
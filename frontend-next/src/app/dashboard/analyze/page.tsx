@@ -10,6 +10,7 @@ interface AgentOpinion {
   thesis: string;
   confidence: string;
   supportingPoints?: string[];
+  provisional?: boolean;
 }
 
 const DEMO_DATA = {
@@ -202,14 +203,51 @@ export default function AnalyzePage() {
   const handleStreamEvent = (event: any) => {
     if (event.type === 'status') {
       setStatusMessage(event.message);
-    } else if (event.type === 'agent_result') {
+    } else if (event.type === 'provisional') {
+      // Instant rule-based council, upgraded agent by agent as the LLMs answer
+      setAgentOpinions(
+        (event.data?.agent_arguments || []).map((arg: any) => ({
+          agentName: arg.agent_name,
+          thesis: arg.thesis,
+          confidence: arg.confidence,
+          supportingPoints: arg.supporting_points || [],
+          provisional: true,
+        }))
+      );
+    } else if (event.type === 'agent_partial') {
+      // Thesis streamed ahead of the full argument; replaced by agent_result
+      const agentName = event.agent || 'Agent';
+      setAgentOpinions(prev => {
+        const existing = prev.find(op => op.agentName === agentName);
+        const partial: AgentOpinion = {
+          agentName,
+          thesis: event.data?.thesis || existing?.thesis || '',
+          confidence: event.data?.confidence || existing?.confidence || 'MEDIUM',
+          supportingPoints: existing?.supportingPoints || [],
+        };
+        return existing
+          ? prev.map(op => (op.agentName === agentName ? partial : op))
+          : [...prev, partial];
+      });
+    } else if (event.type === 'agent_result' || event.type === 'agent_upgrade' || event.type === 'upgrade') {
+      // agent_upgrade: a straggler's real argument replacing its fallback;
+      // upgrade: a real argument replacing the provisional one
       const newOpinion: AgentOpinion = {
         agentName: event.agent || event.data?.agent_name || 'Agent',
         thesis: event.data?.thesis || '',
         confidence: event.data?.confidence || 'MEDIUM',
         supportingPoints: event.data?.supporting_points || [],
       };
-      setAgentOpinions(prev => [...prev, newOpinion]);
+      setAgentOpinions(prev =>
+        prev.some(op => op.agentName === newOpinion.agentName)
+          ? prev.map(op =>
+              // A canned fallback is no better than the provisional read
+              op.agentName === newOpinion.agentName && !(op.provisional && event.data?.is_fallback)
+                ? newOpinion
+                : op
+            )
+          : [...prev, newOpinion]
+      );
     } else if (event.type === 'complete' || event.type === 'debate_complete') {
       setAnalysisData(event.data);
       
@@ -433,6 +471,9 @@ export default function AnalyzePage() {
                     <div className="flex items-center justify-between mb-2">
                       <h3 className="font-bold text-gray-900 dark:text-white">
                         {opinion.agentName}
+                        {opinion.provisional && (
+                          <span className="ml-2 text-xs font-normal text-gray-500">provisional</span>
+                        )}
                       </h3>
                       <span className="px-2 py-1 bg-gray-200 dark:bg-gray-600 text-xs font-semibold rounded">
                         {opinion.confidence}
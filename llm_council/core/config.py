@@ -32,10 +32,119 @@ class Settings:
     MAX_TOKENS: int = int(os.getenv("MAX_TOKENS", "2048"))
     TEMPERATURE: float = float(os.getenv("TEMPERATURE", "0.7"))
 
+    # HTTP connection pooling (one long-lived session per provider)
+    LLM_POOL_SIZE_DEFAULT: int = int(os.getenv("LLM_POOL_SIZE_DEFAULT", "10"))
+    LLM_POOL_SIZE_OPENROUTER: int = int(os.getenv("LLM_POOL_SIZE_OPENROUTER", "20"))
+    LLM_POOL_SIZE_MISTRAL: int = int(os.getenv("LLM_POOL_SIZE_MISTRAL", "10"))
+    LLM_POOL_SIZE_GEMINI: int = int(os.getenv("LLM_POOL_SIZE_GEMINI", "10"))
+    LLM_KEEPALIVE_SECONDS: float = float(os.getenv("LLM_KEEPALIVE_SECONDS", "30"))
+
+    # LLM response cache (opt-in, persisted so restarts stay warm)
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true"
+    LLM_CACHE_TTL_SECONDS: float = float(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+    LLM_CACHE_MAX_BYTES: int = int(os.getenv("LLM_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    LLM_CACHE_PATH: str = os.getenv("LLM_CACHE_PATH", "data/llm_cache.json")
+
+    # Join identical in-flight requests instead of sending duplicates
+    LLM_SINGLE_FLIGHT_ENABLED: bool = os.getenv("LLM_SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+
+    # Ask providers for JSON output (response_format / responseMimeType) when an
+    # agent expects a JSON reply
+    LLM_JSON_MODE_ENABLED: bool = os.getenv("LLM_JSON_MODE_ENABLED", "true").lower() == "true"
+
+    # Per-provider request scheduling (0 = unlimited for RPM/TPM)
+    LLM_MAX_CONCURRENT_DEFAULT: int = int(os.getenv("LLM_MAX_CONCURRENT_DEFAULT", "4"))
+    LLM_MAX_CONCURRENT_OPENROUTER: int = int(os.getenv("LLM_MAX_CONCURRENT_OPENROUTER", "8"))
+    LLM_MAX_CONCURRENT_MISTRAL: int = int(os.getenv("LLM_MAX_CONCURRENT_MISTRAL", "4"))
+    LLM_MAX_CONCURRENT_GEMINI: int = int(os.getenv("LLM_MAX_CONCURRENT_GEMINI", "4"))
+    LLM_RPM_OPENROUTER: float = float(os.getenv("LLM_RPM_OPENROUTER", "20"))
+    LLM_RPM_MISTRAL: float = float(os.getenv("LLM_RPM_MISTRAL", "60"))
+    LLM_RPM_GEMINI: float = float(os.getenv("LLM_RPM_GEMINI", "15"))
+    LLM_TPM_OPENROUTER: float = float(os.getenv("LLM_TPM_OPENROUTER", "0"))
+    LLM_TPM_MISTRAL: float = float(os.getenv("LLM_TPM_MISTRAL", "500000"))
+    LLM_TPM_GEMINI: float = float(os.getenv("LLM_TPM_GEMINI", "1000000"))
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "3"))
+    LLM_REQUEST_DEADLINE_SECONDS: float = float(os.getenv("LLM_REQUEST_DEADLINE_SECONDS", "90"))
+    # Share of each provider's concurrency reserved per priority class:
+    # interactive slots are never used by background work (prefetch, batch
+    # debates); background slots only go to interactive work when no
+    # background request is queued
+    LLM_RESERVED_SHARE_INTERACTIVE: float = float(os.getenv("LLM_RESERVED_SHARE_INTERACTIVE", "0.25"))
+    LLM_RESERVED_SHARE_BACKGROUND: float = float(os.getenv("LLM_RESERVED_SHARE_BACKGROUND", "0"))
+
+    # Hedged requests: after the provider's observed p90 latency, race a backup
+    # request on an alternate model and keep whichever answers first
+    LLM_HEDGING_ENABLED: bool = os.getenv("LLM_HEDGING_ENABLED", "false").lower() == "true"
+    LLM_HEDGE_PERCENTILE: float = float(os.getenv("LLM_HEDGE_PERCENTILE", "90"))
+    LLM_HEDGE_MIN_SAMPLES: int = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "5"))
+    LLM_HEDGE_DEFAULT_DELAY_SECONDS: float = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY_SECONDS", "10"))
+    LLM_HEDGE_MAX_PER_MINUTE: int = int(os.getenv("LLM_HEDGE_MAX_PER_MINUTE", "10"))
+
+    # Circuit breaker per provider/model: open after N consecutive failures,
+    # probe again after the reset window
+    LLM_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "3"))
+    LLM_BREAKER_RESET_SECONDS: float = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+    # Cassette record/replay: "off", "record" (save real responses) or
+    # "replay" (serve saved responses, no network or API keys needed)
+    LLM_REPLAY_MODE: str = os.getenv("LLM_REPLAY_MODE", "off").lower()
+    LLM_CASSETTE_DIR: str = os.getenv("LLM_CASSETTE_DIR", "data/llm_cassettes")
+    LLM_REPLAY_SIMULATE_LATENCY: bool = os.getenv("LLM_REPLAY_SIMULATE_LATENCY", "false").lower() == "true"
+
     # Debate Arena Settings
     NUM_AGENTS: int = 5  # Macro Hawk, Forensic, Flow Detective, Tech Interpreter, Skeptic
-    DEBATE_MAX_ROUNDS: int = 3
-    DEBATE_CONSENSUS_THRESHOLD: float = 0.65
+    # Iterative mode: agents see a digest of the previous round and respond,
+    # until stance agreement reaches the threshold or the round limit
+    DEBATE_ITERATIVE: bool = os.getenv("DEBATE_ITERATIVE", "false").lower() == "true"
+    DEBATE_MAX_ROUNDS: int = int(os.getenv("DEBATE_MAX_ROUNDS", "3"))
+    DEBATE_CONSENSUS_THRESHOLD: float = float(os.getenv("DEBATE_CONSENSUS_THRESHOLD", "0.65"))
+
+    # Debate completion (opt-in): each agent may get a hard deadline, and the
+    # debate closes once DEBATE_QUORUM agents are in or DEBATE_QUORUM_DEADLINE_SECONDS
+    # pass. Stragglers get a fallback argument and may arrive later as upgrades.
+    # The defaults (0 = no deadline, quorum of all five) wait for every agent.
+    DEBATE_AGENT_DEADLINE_SECONDS: float = float(os.getenv("DEBATE_AGENT_DEADLINE_SECONDS", "0"))
+    DEBATE_QUORUM: int = int(os.getenv("DEBATE_QUORUM", "5"))
+    DEBATE_QUORUM_DEADLINE_SECONDS: float = float(os.getenv("DEBATE_QUORUM_DEADLINE_SECONDS", "0"))
+    DEBATE_LATE_UPGRADES: bool = os.getenv("DEBATE_LATE_UPGRADES", "true").lower() == "true"
+
+    # Batch debates (debate_many): symbols debated at once, across all batches
+    DEBATE_BATCH_CONCURRENCY: int = int(os.getenv("DEBATE_BATCH_CONCURRENCY", "4"))
+
+    # Post-debate agents (sentiment, risk, Shariah, persona posts, moderation,
+    # compliance) answered by one fused LLM call instead of one call each
+    ANALYSIS_FUSED_MODE: bool = os.getenv("ANALYSIS_FUSED_MODE", "false").lower() == "true"
+
+    # Background prefetch: re-analyze watchlist and scheduled-call symbols
+    # (most-demanded first) this long before their cached analysis expires.
+    # Opt-in: every prefetch spends LLM quota on an analysis nobody asked for yet
+    ANALYSIS_PREFETCH_ENABLED: bool = os.getenv("ANALYSIS_PREFETCH_ENABLED", "false").lower() == "true"
+    ANALYSIS_PREFETCH_MARGIN_SECONDS: float = float(os.getenv("ANALYSIS_PREFETCH_MARGIN_SECONDS", "120"))
+    ANALYSIS_PREFETCH_INTERVAL_SECONDS: float = float(os.getenv("ANALYSIS_PREFETCH_INTERVAL_SECONDS", "30"))
+    ANALYSIS_PREFETCH_MAX_SYMBOLS: int = int(os.getenv("ANALYSIS_PREFETCH_MAX_SYMBOLS", "20"))
+
+    # Analysis cache: the symbol tier (debate, metrics, calendar, sentiment,
+    # risk, Shariah) is shared by all users; the user tier (trades, behavior,
+    # persona, narrative) is rebuilt per user on top of it
+    ANALYSIS_CACHE_SYMBOL_TTL_SECONDS: float = float(os.getenv("ANALYSIS_CACHE_SYMBOL_TTL_SECONDS", "600"))
+    ANALYSIS_CACHE_USER_TTL_SECONDS: float = float(os.getenv("ANALYSIS_CACHE_USER_TTL_SECONDS", "120"))
+    # Each tier is bounded (LRU eviction); expired entries are still served,
+    # flagged stale, for this long while one background refresh runs
+    ANALYSIS_CACHE_MAX_ENTRIES: int = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "500"))
+    ANALYSIS_CACHE_MAX_BYTES: int = int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    ANALYSIS_CACHE_STALE_SECONDS: float = float(os.getenv("ANALYSIS_CACHE_STALE_SECONDS", "3600"))
+
+    # Bounded executor pools per workload class (see services/executors.py):
+    # market data I/O, blocking LLM calls, CPU-bound numeric work (processes)
+    # and any other sync agent or blocking call
+    EXECUTOR_MARKET_DATA_WORKERS: int = int(os.getenv("EXECUTOR_MARKET_DATA_WORKERS", "8"))
+    EXECUTOR_LLM_WORKERS: int = int(os.getenv("EXECUTOR_LLM_WORKERS", "16"))
+    EXECUTOR_CPU_WORKERS: int = int(os.getenv("EXECUTOR_CPU_WORKERS", "2"))
+    EXECUTOR_AGENT_WORKERS: int = int(os.getenv("EXECUTOR_AGENT_WORKERS", "8"))
+
+    # Event loop wake-ups later than the threshold count as stalls
+    LOOP_MONITOR_ENABLED: bool = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+    LOOP_LAG_THRESHOLD_MS: float = float(os.getenv("LOOP_LAG_THRESHOLD_MS", "100"))
     
     # Market Data Configuration (optional - uses yfinance by default)
     MARKET_DATA_PROVIDER: str = os.getenv("MARKET_DATA_PROVIDER", "yfinance")
@@ -44,6 +153,28 @@ class Settings:
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     LOG_FORMAT: str = os.getenv("LOG_FORMAT", "text")  # "json" or "text"
 
+    # Settings that decide the council's provider roster (re-read on hot reload)
+    PROVIDER_ENV_KEYS = (
+        "OPENROUTER_API_KEY",
+        "GEMINI_API_KEY",
+        "MISTRAL_API_KEY",
+        "GROQ_API_KEY",
+        "LLM_REPLAY_MODE",
+    )
+
+    def reload_provider_settings(self):
+        """Re-read provider keys from the environment (and .env) without a restart."""
+        load_dotenv(override=True)
+        for name in self.PROVIDER_ENV_KEYS:
+            value = os.getenv(name)
+            if name == "LLM_REPLAY_MODE":
+                value = (value or "off").lower()
+            setattr(self, name, value)
+
+    def provider_fingerprint(self) -> tuple:
+        """Snapshot of the provider settings; a change means the council must be rebuilt."""
+        return tuple(getattr(self, name) for name in self.PROVIDER_ENV_KEYS)
+
 
 @lru_cache()
 def get_settings() -> Settings:
@@ -7,7 +7,7 @@ from datetime import datetime
 from enum import Enum
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 
 # ============================================================================
@@ -52,6 +52,8 @@ class AgentArgument(BaseModel):
     supporting_points: list[str] = Field(..., description="Evidence points")
     confidence: ConfidenceLevel = Field(..., description="Confidence in argument")
     references: list[DocumentReference] = Field(default=[], description="Sources")
+    stance: Optional[str] = Field(default=None, description="bullish, bearish or neutral")
+    is_fallback: bool = Field(default=False, description="Canned argument used because the LLM failed or missed its deadline")
 
 
 class ConsensusPoint(BaseModel):
@@ -91,3 +93,105 @@ class DebateResponse(BaseModel):
     success: bool
     debate_result: Optional[DebateResult] = None
     error: Optional[str] = None
+
+
+# ============================================================================
+# Structured Agent Replies (validated by services/structured_output.py)
+# ============================================================================
+
+
+def _upper(value):
+    return value.strip().upper() if isinstance(value, str) else value
+
+
+def _round(value):
+    """Whole-number scores may come back as 62.5 or "62.5"; round instead of rejecting them."""
+    try:
+        return round(float(value)) if isinstance(value, (float, str)) else value
+    except ValueError:
+        return value
+
+
+def _string_list(value):
+    if value is None:
+        return []
+    if isinstance(value, (str, dict)):
+        value = [value]
+    return [
+        " - ".join(str(v) for v in item.values() if v) if isinstance(item, dict) else str(item)
+        for item in value
+    ]
+
+
+class AgentReply(BaseModel):
+    """JSON reply of a council agent, before it becomes an AgentArgument."""
+    thesis: str = Field(..., min_length=1)
+    supporting_points: list[str]
+    confidence: str = "moderate"
+    stance: Optional[str] = None
+
+    _points = field_validator("supporting_points", mode="before")(_string_list)
+
+    @field_validator("confidence", mode="before")
+    @classmethod
+    def _lower_confidence(cls, value):
+        return str(value or "moderate").strip().lower()
+
+
+class RiskAssessment(BaseModel):
+    """Risk Manager's qualitative verdict."""
+    risk_score: int = Field(..., ge=0, le=100)
+    verdict: str = Field(..., pattern="^(LOW|MODERATE|HIGH|EXTREME)$")
+    reasoning: str
+
+    _risk_score = field_validator("risk_score", mode="before")(_round)
+    _verdict = field_validator("verdict", mode="before")(_upper)
+
+
+class SentimentScore(BaseModel):
+    """Sentiment agent's score for a symbol's headlines."""
+    score: float = Field(..., ge=-1, le=1)
+    label: str = Field(..., pattern="^(BEARISH|NEUTRAL|BULLISH)$")
+    summary: str
+
+    _label = field_validator("label", mode="before")(_upper)
+
+
+class ComplianceReview(BaseModel):
+    """Regulatory (SEC/FINRA) review of generated content."""
+    status: str = Field(..., pattern="^(PASS|FLAGGED)$")
+    issues: list[str] = Field(default=[])
+    notes: str = ""
+
+    _status = field_validator("status", mode="before")(_upper)
+    _issues = field_validator("issues", mode="before")(_string_list)
+
+
+class ShariahVerdict(BaseModel):
+    """Shariah (AAOIFI) screening of an asset."""
+    compliant: bool
+    score: int = Field(..., ge=0, le=100)
+    reason: str
+    issues: list[str] = Field(default=[])
+
+    _issues = field_validator("issues", mode="before")(_string_list)
+
+
+class ModerationVerdict(BaseModel):
+    """Moderator's verdict on one social post."""
+    verdict: str = Field(..., pattern="^(POST|WARN|BLOCK)$")
+    reason: str
+
+    _verdict = field_validator("verdict", mode="before")(_upper)
+
+
+class PersonaPosts(BaseModel):
+    """Social posts written by the Persona agent."""
+    x: str = Field(..., min_length=1)
+    linkedin: str = Field(..., min_length=1)
+
+
+class PostModeration(BaseModel):
+    """Moderator verdicts for both social posts."""
+    x: ModerationVerdict
+    linkedin: ModerationVerdict
@@ -4,18 +4,28 @@ Each agent provides real-time analysis from different perspectives.
 """
 
 import logging
-from typing import List, Dict, Optional, AsyncGenerator
+from dataclasses import dataclass
+from typing import Any, List, Dict, Optional, AsyncGenerator, Callable, Union
 from datetime import datetime
 import asyncio
 import json
-import re
+import threading
+import time
 
-from .llm_client import LLMClient
+from .llm_client import (
+    PRIORITY_BACKGROUND, LLMClient, LLMProviderError, PriorityHandle, current_llm_priority, llm_priority
+)
+from .llm_metrics import track_usage
 from .agent_prompts import get_enhanced_system_prompt
+from .json_stream import StreamingJSONFieldParser
+from .structured_output import StructuredOutputError, get_structured_output_stats, parse_structured, retry_prompt
 from ..core.config import settings
-from services.self_improvement import SelfImprovementService
+from services.self_improvement import SelfImprovementService, get_self_improvement_service
+from services.executors import POOL_MARKET_DATA, run_in_pool
+from services.multi_agent_system import MultiAgentOrchestrator
 from ..models.schemas import (
     AgentArgument,
+    AgentReply,
     ConsensusPoint,
     DisagreementPoint,
     ConfidenceLevel,
@@ -24,13 +34,201 @@ from ..models.schemas import (
 
 logger = logging.getLogger(__name__)
 
+# Fields forwarded as agent_partial events as soon as they close in the stream
+PARTIAL_FIELDS = ("thesis", "confidence")
+
+# Free-form stance wording accepted from agents
+STANCE_KEYWORDS = {
+    "bullish": ("bull", "long", "buy", "positive", "up"),
+    "bearish": ("bear", "short", "sell", "negative", "down"),
+    "neutral": ("neutral", "hold", "mixed", "uncertain"),
+}
+
+# Agent whose symbol-independent macro view is shared across batch debates
+MACRO_AGENT = "🦅 Macro Hawk"
+
+# Council line-up: every debate runs these agents in parallel
+AGENT_ROSTER = [
+    {"name": "🦅 Macro Hawk", "role": "Macroeconomic analyst", "temperature": 0.6},
+    {"name": "🔬 Micro Forensic", "role": "Fundamental analyst", "temperature": 0.6},
+    {"name": "💧 Flow Detective", "role": "Market microstructure expert", "temperature": 0.7},
+    {"name": "📊 Tech Interpreter", "role": "Technical analyst", "temperature": 0.7},
+    {"name": "🤔 Skeptic", "role": "Critical risk analyst", "temperature": 0.8},
+]
+
+# Rule-based orchestrator agent standing in for each council agent until its LLM answer lands
+PROVISIONAL_AGENTS = {
+    "🦅 Macro Hawk": "macro",
+    "🔬 Micro Forensic": "fundamentals",
+    "💧 Flow Detective": "flow",
+    "📊 Tech Interpreter": "technical",
+    "🤔 Skeptic": "risk",
+}
+
+# Debate event types
+EVENT_STATUS = "status"
+EVENT_MARKET_DATA = "market_data"
+EVENT_AGENT_PARTIAL = "agent_partial"
+EVENT_AGENT_RESULT = "agent_result"
+EVENT_AGENT_UPGRADE = "agent_upgrade"
+EVENT_ROUND_COMPLETE = "round_complete"
+EVENT_ERROR = "error"
+EVENT_DEBATE_COMPLETE = "debate_complete"
+
+
+def to_json_dict(model) -> Dict:
+    """Pydantic model -> plain JSON-compatible dict (enums as values, datetimes as strings)."""
+    if hasattr(model, "model_dump"):
+        return model.model_dump(mode="json")
+    return json.loads(model.json())
+
+
+@dataclass
+class DebateEvent:
+    """One step of a debate run, serialised for consumers with to_dict()."""
+    type: str
+    data: Any = None
+    agent: Optional[str] = None
+    message: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        event = {"type": self.type}
+        if self.agent is not None:
+            event["agent"] = self.agent
+        if self.message is not None:
+            event["message"] = self.message
+        if self.data is not None:
+            event["data"] = self.data
+        return event
+
+
+class DebateRun:
+    """
+    A single debate execution whose events fan out to every consumer.
+
+    Consumers may attach at any time: they first receive the events emitted so
+    far, then live ones. The underlying task is cancelled only when the last
+    consumer goes away before it finishes. Its LLM requests are queued under
+    ``priority``, which is raised when an interactive caller joins.
+    """
+
+    def __init__(
+        self,
+        engine: "DebateEngine",
+        symbol: str,
+        economic_context: str = "",
+        stream_tokens: bool = True,
+        price_data: Optional[Dict] = None,
+        macro_backdrop: str = "",
+    ):
+        self.engine = engine
+        self.symbol = symbol
+        self.economic_context = economic_context
+        self.stream_tokens = stream_tokens
+        self.price_data = price_data
+        self.macro_backdrop = macro_backdrop
+        self.priority = PriorityHandle(current_llm_priority())
+        self.events: List[DebateEvent] = []
+        self.result: Optional[Dict] = None
+        self.error: Optional[BaseException] = None
+        self.finished = False
+        self.loop = None
+        self._task: Optional[asyncio.Task] = None
+        self._subscribers: List[asyncio.Queue] = []
+        self._consumers = 0
+        self._result_ready = asyncio.Event()
+
+    def start(self, on_finish: Optional[Callable[[], None]] = None) -> "DebateRun":
+        self.loop = asyncio.get_running_loop()
+        self._task = asyncio.create_task(self._run(on_finish))
+        return self
+
+    def _emit(self, event: DebateEvent):
+        self.events.append(event)
+        if event.type == EVENT_DEBATE_COMPLETE:
+            self.result = event.data
+            self._result_ready.set()
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+
+    async def _run(self, on_finish: Optional[Callable[[], None]]):
+        try:
+            # Agent tasks copy this context, so every request reads the shared handle
+            with llm_priority(self.priority):
+                await self.engine._produce_debate(
+                    self.symbol, self.economic_context, self._emit,
+                    stream_tokens=lambda: self.stream_tokens, price_data=self.price_data,
+                    macro_backdrop=self.macro_backdrop
+                )
+        except asyncio.CancelledError as e:
+            self.error = e
+            raise
+        except Exception as e:
+            logger.error(f"Debate for {self.symbol} failed: {e}")
+            self.error = e
+            self._emit(DebateEvent(EVENT_ERROR, message=f"Debate failed: {e}"))
+        finally:
+            self.finished = True
+            self._result_ready.set()
+            for queue in self._subscribers:
+                queue.put_nowait(None)
+            if on_finish:
+                on_finish()
+
+    def _release(self):
+        self._consumers -= 1
+        if self._consumers == 0 and self._task is not None and not self._task.done():
+            logger.info(f"All consumers left, cancelling debate for {self.symbol}")
+            self._task.cancel()
+
+    async def stream(self) -> AsyncGenerator[Dict, None]:
+        """Yield every event of the run as a dict, from the first one onwards."""
+        queue: asyncio.Queue = asyncio.Queue()
+        for event in self.events:
+            queue.put_nowait(event)
+        if self.finished:
+            queue.put_nowait(None)
+        else:
+            self._subscribers.append(queue)
+        self._consumers += 1
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    return
+                yield event.to_dict()
+        finally:
+            if queue in self._subscribers:
+                self._subscribers.remove(queue)
+            self._release()
+
+    async def wait(self) -> Dict:
+        """
+        Wait for the debate to complete and return the final result.
+        Late upgrades are not awaited; if nobody else is listening they are cancelled.
+        """
+        self._consumers += 1
+        try:
+            await self._result_ready.wait()
+        finally:
+            self._release()
+        if self.result is None:
+            raise self.error or RuntimeError(f"Debate for {self.symbol} produced no result")
+        return self.result
+
 
 class DebateEngine:
     """5-agent debate system for market analysis."""
     
-    def __init__(self):
+    def __init__(self, improvement_service: Optional[SelfImprovementService] = None):
+        # Replayed cassettes need no keys: act as if every provider is configured
+        replaying = settings.LLM_REPLAY_MODE == "replay"
+        openrouter_key = settings.OPENROUTER_API_KEY or ("replay" if replaying else None)
+        mistral_key = settings.MISTRAL_API_KEY or ("replay" if replaying and not settings.GEMINI_API_KEY else None)
+        gemini_key = settings.GEMINI_API_KEY
+
         # Validate API keys are available
-        if not settings.OPENROUTER_API_KEY and not settings.MISTRAL_API_KEY and not settings.GEMINI_API_KEY and not settings.GROQ_API_KEY:
+        if not replaying and not settings.OPENROUTER_API_KEY and not settings.MISTRAL_API_KEY and not settings.GEMINI_API_KEY and not settings.GROQ_API_KEY:
             logger.error("❌ NO LLM API KEYS CONFIGURED")
             logger.error("Please set at least one of: OPENROUTER_API_KEY, MISTRAL_API_KEY, GEMINI_API_KEY, GROQ_API_KEY")
             raise ValueError(
@@ -52,138 +250,327 @@ class DebateEngine:
         self.llm_providers = {
             "🦅 Macro Hawk": LLMClient(
                 provider_type="openrouter",
-                api_key=settings.OPENROUTER_API_KEY,
-                model="mistralai/mistral-7b-instruct"
-            ) if settings.OPENROUTER_API_KEY else None,
+                api_key=openrouter_key,
+                model="mistralai/mistral-7b-instruct",
+                json_mode=True
+            ) if openrouter_key else None,
             "🔬 Micro Forensic": LLMClient(
                 provider_type="openrouter",
-                api_key=settings.OPENROUTER_API_KEY,
-                model="gryphe/mythomax-l2-13b"
-            ) if settings.OPENROUTER_API_KEY else None,
+                api_key=openrouter_key,
+                model="gryphe/mythomax-l2-13b",
+                json_mode=True
+            ) if openrouter_key else None,
             "💧 Flow Detective": LLMClient(
                 provider_type="openrouter",
-                api_key=settings.OPENROUTER_API_KEY,
-                model="mistralai/mistral-7b-instruct"
-            ) if settings.OPENROUTER_API_KEY else None,
+                api_key=openrouter_key,
+                model="mistralai/mistral-7b-instruct",
+                json_mode=True
+            ) if openrouter_key else None,
             "📊 Tech Interpreter": LLMClient(
                 provider_type="openrouter",
-                api_key=settings.OPENROUTER_API_KEY,
-                model="gryphe/mythomax-l2-13b"
-            ) if settings.OPENROUTER_API_KEY else None,
+                api_key=openrouter_key,
+                model="gryphe/mythomax-l2-13b",
+                json_mode=True
+            ) if openrouter_key else None,
             "🤔 Skeptic": LLMClient(
                 provider_type="mistral",
-                api_key=settings.MISTRAL_API_KEY
-            ) if settings.MISTRAL_API_KEY else (
+                api_key=mistral_key,
+                json_mode=True
+            ) if mistral_key else (
                 LLMClient(
                     provider_type="gemini",
-                    api_key=settings.GEMINI_API_KEY
-                ) if settings.GEMINI_API_KEY else None
+                    api_key=gemini_key,
+                    json_mode=True
+                ) if gemini_key else None
             ),
         }
         
         # Remove None values (agents without API keys)
         self.llm_providers = {k: v for k, v in self.llm_providers.items() if v is not None}
+        self._assign_hedge_alternates()
+
+        # Debates in progress, keyed by (symbol, economic_context), so callers can share them
+        self._active_runs: Dict[tuple, DebateRun] = {}
+
+        # Global cap on symbols debated at once by debate_many (created per event loop)
+        self._batch_slots: Optional[asyncio.Semaphore] = None
+        self._batch_slots_loop = None
         
         if not self.llm_providers:
             raise ValueError("No valid LLM providers initialized. Check API keys.")
         
         logger.info(f"✓ Initialized {len(self.llm_providers)} agents")
 
-        # Initialize self-improvement service
+        # Share the process-wide learning history instead of re-reading it from disk
         try:
-            self.improvement_service = SelfImprovementService()
+            self.improvement_service = improvement_service or get_self_improvement_service()
         except Exception as e:
             logger.warning(f"Could not initialize SelfImprovementService: {e}")
             self.improvement_service = None
 
     
+    def _assign_hedge_alternates(self):
+        """Let each agent hedge a slow call onto the models the other agents use."""
+        for client in self.llm_providers.values():
+            seen = {(client.provider.name, client.provider.model)}
+            alternates = []
+            for other in self.llm_providers.values():
+                key = (other.provider.name, other.provider.model)
+                if key not in seen:
+                    seen.add(key)
+                    alternates.append(other.provider)
+            client.alternates = alternates
+
+    def start_debate(
+        self,
+        symbol: str,
+        economic_context: str = "",
+        stream_tokens: bool = True,
+        price_data: Optional[Dict] = None,
+        macro_backdrop: str = "",
+    ) -> "DebateRun":
+        """
+        Start a debate, or join the one already running for the same inputs.
+
+        Every caller (streaming or blocking) consumes the same DebateRun, so
+        concurrent requests for a symbol share one set of LLM calls.
+        A streaming caller joining a blocking run turns token streaming on
+        for the agents that have not started yet.
+        ``price_data`` skips the market data fetch when it is already known,
+        and ``macro_backdrop`` stands in for the Macro Hawk's LLM call.
+        The run's requests are queued under the caller's priority class; an
+        interactive caller joining a background run raises it to interactive.
+        """
+        key = (symbol, economic_context)
+        loop = asyncio.get_running_loop()
+        run = self._active_runs.get(key)
+        if run is None or run.finished or run.loop is not loop:
+            run = DebateRun(
+                self, symbol, economic_context,
+                stream_tokens=stream_tokens, price_data=price_data, macro_backdrop=macro_backdrop
+            )
+            self._active_runs[key] = run
+            run.start(on_finish=lambda: self._active_runs.pop(key, None) if self._active_runs.get(key) is run else None)
+        else:
+            logger.info(f"Joining debate already running for {symbol}")
+            run.stream_tokens = run.stream_tokens or stream_tokens
+            run.priority.raise_to(current_llm_priority())
+        return run
+
     async def debate_stream_async(self, symbol: str, economic_context: str = "") -> AsyncGenerator[Dict, None]:
         """
         Run 5-agent debate on a market move, yielding results as they complete.
         Returns an AsyncGenerator that yields Dicts with 'type' and 'data'.
+
+        Agent completions are streamed token by token, so an ``agent_partial``
+        event carrying the agent's thesis is yielded as soon as that field
+        closes, ahead of the full ``agent_result``.
+        """
+        async for event in self.start_debate(symbol, economic_context, stream_tokens=True).stream():
+            yield event
+
+    async def debate_move_async(self, symbol: str, economic_context: str = "") -> Dict:
+        """
+        Run 5-agent debate on a market move using REAL LLM calls.
+        
+        Args:
+            symbol: Stock symbol (e.g., "AAPL", "MSFT")
+            economic_context: Optional economic calendar/news context
+        
+        Returns:
+            JSON-ready dict with agent arguments, consensus, disagreements
+            (the same payload as the stream's ``debate_complete`` event)
+        """
+        return await self.start_debate(symbol, economic_context, stream_tokens=False).wait()
+
+    async def debate_many(
+        self,
+        symbols: List[str],
+        economic_context: str = "",
+        symbol_contexts: Optional[Dict[str, str]] = None,
+        priority: str = PRIORITY_BACKGROUND,
+    ) -> AsyncGenerator[Dict, None]:
+        """
+        Debate a list of symbols, yielding each result as soon as it finishes.
+
+        Market data for every symbol is fetched in one batch download, and the
+        symbol-independent macro view is produced once by the Macro Hawk and
+        shared by every debate in the batch, standing in for that agent's
+        per-symbol call. At most DEBATE_BATCH_CONCURRENCY
+        symbols are debated at once, across all concurrent batches.
+
+        Args:
+            symbols: Stock symbols to debate
+            economic_context: Market-wide calendar/news context shared by all symbols
+            symbol_contexts: Optional extra context per symbol (earnings, headlines)
+            priority: LLM priority class the batch's requests are queued under
+
+        Yields:
+            ``batch_start``, then one ``symbol_result`` (or ``symbol_error``) per
+            symbol in completion order, then ``batch_complete``.
+        """
+        symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s and s.strip()))
+        symbol_contexts = symbol_contexts or {}
+        started = time.monotonic()
+        yield {"type": "batch_start", "data": {"symbols": symbols}}
+
+        async def build_macro_backdrop() -> str:
+            with llm_priority(priority):
+                return await self._build_macro_backdrop(economic_context)
+
+        price_data, macro_backdrop = await asyncio.gather(
+            run_in_pool(POOL_MARKET_DATA, self._get_market_data_batch, symbols),
+            build_macro_backdrop(),
+        )
+        shared_context = economic_context
+        if macro_backdrop:
+            shared_context = f"{economic_context}\n\nMACRO BACKDROP (shared across this batch):\n{macro_backdrop}".strip()
+
+        slots = self._get_batch_slots()
+
+        async def debate_one(symbol: str) -> Dict:
+            context = "\n".join(part for part in (shared_context, symbol_contexts.get(symbol, "")) if part)
+            async with slots:
+                try:
+                    # The run takes its priority class from this context
+                    with llm_priority(priority):
+                        run = self.start_debate(
+                            symbol, context, stream_tokens=False,
+                            price_data=price_data.get(symbol), macro_backdrop=macro_backdrop
+                        )
+                    return {"type": "symbol_result", "symbol": symbol, "data": await run.wait()}
+                except Exception as e:
+                    logger.error(f"Batch debate for {symbol} failed: {e}")
+                    return {"type": "symbol_error", "symbol": symbol, "message": str(e)}
+
+        tasks = [asyncio.create_task(debate_one(symbol)) for symbol in symbols]
+        failed = 0
+        try:
+            for task in asyncio.as_completed(tasks):
+                event = await task
+                failed += event["type"] == "symbol_error"
+                yield event
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        yield {"type": "batch_complete", "data": {
+            "symbols": len(symbols),
+            "failed": failed,
+            "macro_backdrop": macro_backdrop,
+            "seconds": round(time.monotonic() - started, 2),
+        }}
+
+    def _get_batch_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._batch_slots is None or self._batch_slots_loop is not loop:
+            self._batch_slots = asyncio.Semaphore(max(1, settings.DEBATE_BATCH_CONCURRENCY))
+            self._batch_slots_loop = loop
+        return self._batch_slots
+
+    async def _build_macro_backdrop(self, economic_context: str) -> str:
+        """
+        One symbol-independent macro read from the Macro Hawk, reused by every
+        debate in a batch. Empty if that agent is unavailable or the call fails.
+        """
+        llm = self.llm_providers.get(MACRO_AGENT)
+        if llm is None:
+            return ""
+        prompt = f"""Summarize today's macro backdrop for US equities in 3 short bullet points
+(rates, inflation, growth, risk appetite). Do not discuss any single stock.
+
+ECONOMIC CALENDAR & NEWS:
+{economic_context if economic_context else "No scheduled economic events."}"""
+        try:
+            backdrop = await llm.complete_async(
+                prompt=prompt,
+                system=self._build_system_prompt(MACRO_AGENT),
+                temperature=0.3
+            )
+        except Exception as e:
+            logger.warning(f"Could not build shared macro backdrop: {e}")
+            return ""
+        return str(backdrop).strip()
+
+    async def _produce_debate(
+        self,
+        symbol: str,
+        economic_context: str,
+        emit: Callable[[DebateEvent], None],
+        stream_tokens: Union[bool, Callable[[], bool]] = True,
+        price_data: Optional[Dict] = None,
+        macro_backdrop: str = "",
+    ) -> Dict:
+        """
+        The single debate pipeline: fetch market data, run every agent in
+        parallel (for further rounds while they disagree, when
+        DEBATE_ITERATIVE is on), then build consensus and the judge summary.
+        Progress is reported through ``emit``; the final result is returned.
+        A batch's shared ``macro_backdrop`` replaces the Macro Hawk's call.
+        ``stream_tokens`` may be a callable, checked as each agent starts.
         """
-        yield {"type": "status", "message": f"Fetching market data for {symbol}..."}
+        emit(DebateEvent(EVENT_STATUS, message=f"Fetching market data for {symbol}..."))
 
-        # Get market data
-        price_data = self._get_market_data(symbol)
-        yield {"type": "market_data", "data": price_data}
+        # Get market data (batch debates pass it in, already fetched)
+        if price_data is None:
+            price_data = await run_in_pool(POOL_MARKET_DATA, self._get_market_data, symbol)
+        remember_market_data(symbol, price_data)
+        emit(DebateEvent(EVENT_MARKET_DATA, data=price_data))
 
         move_pct = price_data.get("change_percent", 0.8)
         move_direction = "UP" if move_pct > 0 else "DOWN"
         current_price = price_data.get("price", 100)
         volume = price_data.get("volume", 50000000)
 
-        logger.info(f"Stream Debating {symbol}: {move_pct:.2f}% {move_direction}")
+        logger.info(f"Debating {symbol}: {move_pct:.2f}% {move_direction} (price: ${current_price:.2f})")
 
-        # Context for all agents
-        market_context = f"""
-Current Price: ${current_price:.2f}
-Move Today: {move_direction} {abs(move_pct):.2f}%
-Trading Volume: {volume:,}
-Symbol: {symbol}
+        market_context = self._build_market_context(symbol, current_price, move_pct, move_direction, volume, economic_context)
 
-ECONOMIC CALENDAR & NEWS:
-{economic_context if economic_context else "No scheduled economic events."}
+        emit(DebateEvent(EVENT_STATUS, message="Starting 5-agent debate council..."))
+        logger.info(f"Starting parallel analysis for {len(AGENT_ROSTER)} agents...")
 
-Provide a realistic analysis from your agent perspective. Be specific, use data-driven reasoning.
-Include 3-4 supporting points with concrete details.
-Consider the economic calendar events when evaluating market drivers.
-"""
+        threshold = settings.DEBATE_CONSENSUS_THRESHOLD
+        max_rounds = max(1, settings.DEBATE_MAX_ROUNDS) if settings.DEBATE_ITERATIVE else 1
+        rounds: List[Dict] = []
+        prior_digest = ""
+        pending = set()
 
-        # Define agents
-        agents = [
-            {"name": "🦅 Macro Hawk", "role": "Macroeconomic analyst", "temperature": 0.6},
-            {"name": "🔬 Micro Forensic", "role": "Fundamental analyst", "temperature": 0.6},
-            {"name": "💧 Flow Detective", "role": "Market microstructure expert", "temperature": 0.7},
-            {"name": "📊 Tech Interpreter", "role": "Technical analyst", "temperature": 0.7},
-            {"name": "🤔 Skeptic", "role": "Critical risk analyst", "temperature": 0.8}
-        ]
+        for round_number in range(1, max_rounds + 1):
+            if round_number > 1:
+                emit(DebateEvent(
+                    EVENT_STATUS,
+                    message=f"Round {round_number}: agreement {rounds[-1]['agreement']:.0%} is below "
+                            f"{threshold:.0%}, agents are responding to each other..."
+                ))
 
-        yield {"type": "status", "message": f"Starting 5-agent debate council..."}
-        logger.info(f"Starting stream analysis for {len(agents)} agents...")
-
-        # Create tasks for all agents
-        tasks = []
-        for agent in agents:
-            # We wrap the call to attach agent metadata to the task if needed,
-            # but getting the result directly is easier.
-            task = asyncio.create_task(
-                self._get_agent_argument_async(
-                    symbol=symbol,
-                    agent_name=agent["name"],
-                    market_context=market_context,
-                    move_pct=move_pct,
-                    move_direction=move_direction,
-                    temperature=agent["temperature"]
+            with track_usage() as usage:
+                results, pending, quorum, closed_by = await self._run_round(
+                    symbol, market_context, move_pct, move_direction, emit, stream_tokens, prior_digest,
+                    macro_backdrop
                 )
-            )
-            tasks.append(task)
+            agent_arguments = [results[agent["name"]] for agent in AGENT_ROSTER]
+            agreement = self._measure_agreement(agent_arguments)
 
-        # Collect results as they complete
-        agent_arguments = []
+            rounds.append({
+                "round": round_number,
+                "agreement": agreement,
+                "closed_by": closed_by,
+                "llm_calls": usage["calls"],
+                "prompt_tokens": usage["prompt_tokens"],
+                "completion_tokens": usage["completion_tokens"],
+            })
+            emit(DebateEvent(EVENT_ROUND_COMPLETE, data=rounds[-1]))
 
-        # Use as_completed to yield results as soon as they are ready
-        for future in asyncio.as_completed(tasks):
-            try:
-                arg = await future
-                agent_arguments.append(arg)
-
-                # Convert Pydantic model to dict
-                arg_data = arg.model_dump() if hasattr(arg, "model_dump") else arg.dict()
-
-                yield {
-                    "type": "agent_result",
-                    "agent": arg.agent_name,
-                    "data": arg_data
-                }
-                logger.info(f"✓ Stream: {arg.agent_name} completed")
-
-            except Exception as e:
-                logger.error(f"Stream Agent failed: {e}")
-                yield {"type": "error", "message": str(e)}
+            # Stop once agents agree (or agreement cannot be measured); only
+            # contested symbols pay for another round
+            if round_number == max_rounds or agreement is None or agreement >= threshold:
+                break
+            for task in pending:
+                task.cancel()  # a straggler's answer to the old round is stale
+            prior_digest = self._build_round_digest(round_number, agreement, agent_arguments)
 
         # Build final consensus
-        yield {"type": "status", "message": "Synthesizing debate results..."}
+        emit(DebateEvent(EVENT_STATUS, message="Synthesizing debate results..."))
 
         consensus_points = self._build_consensus(agent_arguments, symbol)
         disagreement_points = self._build_disagreements(agent_arguments, symbol)
@@ -196,58 +583,174 @@ Consider the economic calendar events when evaluating market drivers.
             consensus_points=consensus_points
         )
 
-        # Prepare final result structure (matching standard output)
         final_result = {
             "symbol": symbol,
             "timestamp": datetime.utcnow().isoformat(),
-            "agent_arguments": [
-                (arg.model_dump() if hasattr(arg, "model_dump") else arg.dict())
-                for arg in agent_arguments
-            ],
-            "consensus_points": [
-                (cp.model_dump() if hasattr(cp, "model_dump") else cp.dict())
-                for cp in consensus_points
-            ],
-            "disagreement_points": [
-                (dp.model_dump() if hasattr(dp, "model_dump") else dp.dict())
-                for dp in disagreement_points
-            ],
+            "agent_arguments": [to_json_dict(arg) for arg in agent_arguments],
+            "consensus_points": [to_json_dict(cp) for cp in consensus_points],
+            "disagreement_points": [to_json_dict(dp) for dp in disagreement_points],
             "judge_summary": judge_summary,
             "market_context": {
                 "price": current_price,
                 "move_pct": move_pct,
                 "move_direction": move_direction,
                 "volume": volume,
-            }
+            },
+            "quorum": {
+                "required": quorum,
+                "received": len(AGENT_ROSTER) - len(pending),
+                "closed_by": closed_by,
+                "fallback_agents": [arg.agent_name for arg in agent_arguments if arg.is_fallback],
+            },
+            "rounds_used": len(rounds),
+            "rounds": rounds,
         }
 
-        yield {"type": "debate_complete", "data": final_result}
+        emit(DebateEvent(EVENT_DEBATE_COMPLETE, data=final_result))
 
+        # Late arrivals are sent as upgrades to whoever is still listening
+        if pending and settings.DEBATE_LATE_UPGRADES:
+            try:
+                for task in asyncio.as_completed(pending):
+                    arg = await task
+                    if not arg.is_fallback:
+                        emit(DebateEvent(EVENT_AGENT_UPGRADE, agent=arg.agent_name, data=to_json_dict(arg)))
+                        logger.info(f"⬆ {arg.agent_name} arrived late, sent as upgrade")
+            finally:
+                for task in pending:
+                    task.cancel()
+        else:
+            for task in pending:
+                task.cancel()
 
-    async def debate_move_async(self, symbol: str, economic_context: str = "") -> Dict:
+        return final_result
+
+    async def _run_round(
+        self,
+        symbol: str,
+        market_context: str,
+        move_pct: float,
+        move_direction: str,
+        emit: Callable[[DebateEvent], None],
+        stream_tokens: Union[bool, Callable[[], bool]],
+        prior_digest: str = "",
+        macro_backdrop: str = "",
+    ):
         """
-        Run 5-agent debate on a market move using REAL LLM calls.
-        
-        Args:
-            symbol: Stock symbol (e.g., "AAPL", "MSFT")
-            economic_context: Optional economic calendar/news context
-        
+        Run every agent once, closing the round on quorum or deadline.
+
         Returns:
-            Dict with debate results including agent arguments, consensus, disagreements
+            Tuple of (arguments by agent name, still-pending straggler tasks,
+            quorum size, what closed the round: "all", "quorum" or "deadline")
         """
-        
-        # Get market data
-        price_data = self._get_market_data(symbol)
-        
-        move_pct = price_data.get("change_percent", 0.8)
-        move_direction = "UP" if move_pct > 0 else "DOWN"
-        current_price = price_data.get("price", 100)
-        volume = price_data.get("volume", 50000000)
-        
-        logger.info(f"Debating {symbol}: {move_pct:.2f}% {move_direction} (price: ${current_price:.2f})")
-        
-        # Context for all agents
-        market_context = f"""
+        results: Dict[str, AgentArgument] = {}
+        wants_tokens = stream_tokens if callable(stream_tokens) else lambda: stream_tokens
+
+        def on_partial(agent_name: str, fields: Dict):
+            if agent_name not in results:
+                emit(DebateEvent(EVENT_AGENT_PARTIAL, agent=agent_name, data=fields))
+
+        async def run_agent(agent: Dict) -> AgentArgument:
+            if agent["name"] == MACRO_AGENT and macro_backdrop:
+                return self._macro_argument_from_backdrop(macro_backdrop, symbol, move_pct, move_direction)
+            try:
+                return await asyncio.wait_for(
+                    self._get_agent_argument_async(
+                        symbol=symbol,
+                        agent_name=agent["name"],
+                        market_context=market_context,
+                        move_pct=move_pct,
+                        move_direction=move_direction,
+                        temperature=agent["temperature"],
+                        on_partial=on_partial if wants_tokens() else None,
+                        prior_digest=prior_digest
+                    ),
+                    timeout=settings.DEBATE_AGENT_DEADLINE_SECONDS or None,
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"{agent['name']} missed its {settings.DEBATE_AGENT_DEADLINE_SECONDS}s deadline, using fallback")
+            except Exception as e:
+                logger.error(f"{agent['name']} failed: {e}")
+                emit(DebateEvent(EVENT_ERROR, message=str(e)))
+            return self._generate_fallback_argument(agent["name"], symbol, move_direction, move_pct)
+
+        tasks = {asyncio.create_task(run_agent(agent)): agent["name"] for agent in AGENT_ROSTER}
+        quorum = min(max(1, settings.DEBATE_QUORUM), len(tasks))
+        deadline = settings.DEBATE_QUORUM_DEADLINE_SECONDS
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        pending = set(tasks)
+        closed_by = "all"
+
+        # Collect agents as they finish until the quorum is in or time is up
+        try:
+            while pending:
+                if len(results) >= quorum:
+                    closed_by = "quorum"
+                    break
+                timeout = max(0.0, started + deadline - loop.time()) if deadline else None
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    closed_by = "deadline"
+                    break
+                for task in done:
+                    arg = task.result()
+                    results[tasks[task]] = arg
+                    emit(DebateEvent(EVENT_AGENT_RESULT, agent=arg.agent_name, data=to_json_dict(arg)))
+                    logger.info(f"✓ {arg.agent_name} analysis complete")
+        except BaseException:
+            for task in pending:
+                task.cancel()
+            raise
+
+        # Stragglers are replaced by flagged fallbacks so the round can close now
+        stragglers = [tasks[task] for task in pending]
+        for name in stragglers:
+            arg = self._generate_fallback_argument(name, symbol, move_direction, move_pct)
+            results[name] = arg
+            emit(DebateEvent(EVENT_AGENT_RESULT, agent=name, data=to_json_dict(arg)))
+        if stragglers:
+            logger.info(f"Round for {symbol} closed by {closed_by} without {', '.join(stragglers)}")
+
+        return results, pending, quorum, closed_by
+
+    @staticmethod
+    def _measure_agreement(agent_arguments: List[AgentArgument]) -> Optional[float]:
+        """
+        Share of agents holding the most common stance (fallbacks excluded).
+        None when fewer than two agents stated a stance.
+        """
+        stances = [arg.stance for arg in agent_arguments if arg.stance and not arg.is_fallback]
+        if len(stances) < 2:
+            return None
+        most_common = max(stances.count(stance) for stance in set(stances))
+        return round(most_common / len(stances), 3)
+
+    @staticmethod
+    def _build_round_digest(round_number: int, agreement: float, agent_arguments: List[AgentArgument]) -> str:
+        """Compact summary of a round for the agents to respond to in the next one."""
+        lines = [f"PREVIOUS ROUND {round_number} (stance agreement {agreement:.0%}):"]
+        for arg in agent_arguments:
+            if arg.is_fallback:
+                continue
+            thesis = arg.thesis if len(arg.thesis) <= 200 else arg.thesis[:197] + "..."
+            lines.append(f"- {arg.agent_name} [{arg.stance or 'no stance'}, {arg.confidence.value}]: {thesis}")
+        lines.append(
+            "Respond to the other agents: keep or change your stance, and address the strongest opposing argument."
+        )
+        return "\n".join(lines)
+
+    def _build_market_context(
+        self,
+        symbol: str,
+        current_price: float,
+        move_pct: float,
+        move_direction: str,
+        volume: int,
+        economic_context: str,
+    ) -> str:
+        """Market context shared by every agent's prompt."""
+        return f"""
 Current Price: ${current_price:.2f}
 Move Today: {move_direction} {abs(move_pct):.2f}%
 Trading Volume: {volume:,}
@@ -260,84 +763,6 @@ Provide a realistic analysis from your agent perspective. Be specific, use data-
 Include 3-4 supporting points with concrete details.
 Consider the economic calendar events when evaluating market drivers.
 """
-        
-        # Run 5 agents in parallel
-        agents = [
-            {
-                "name": "🦅 Macro Hawk",
-                "role": "Macroeconomic analyst",
-                "temperature": 0.6,
-            },
-            {
-                "name": "🔬 Micro Forensic",
-                "role": "Fundamental analyst",
-                "temperature": 0.6,
-            },
-            {
-                "name": "💧 Flow Detective",
-                "role": "Market microstructure expert",
-                "temperature": 0.7,
-            },
-            {
-                "name": "📊 Tech Interpreter",
-                "role": "Technical analyst",
-                "temperature": 0.7,
-            },
-            {
-                "name": "🤔 Skeptic",
-                "role": "Critical risk analyst",
-                "temperature": 0.8,
-            }
-        ]
-        
-        # Run all 5 agents in parallel using asyncio.gather
-        logger.info(f"Starting parallel analysis for {len(agents)} agents...")
-        try:
-            agent_arguments = await asyncio.gather(*[
-                self._get_agent_argument_async(
-                    symbol=symbol,
-                    agent_name=agent["name"],
-                    market_context=market_context,
-                    move_pct=move_pct,
-                    move_direction=move_direction,
-                    temperature=agent["temperature"]
-                )
-                for agent in agents
-            ])
-            
-            for agent, arg in zip(agents, agent_arguments):
-                logger.info(f"✓ {agent['name']} analysis complete")
-        except Exception as e:
-            logger.error(f"REAL LLM ERROR: {e}")
-            raise
-        
-        # Build consensus and disagreement points
-        consensus_points = self._build_consensus(agent_arguments, symbol)
-        disagreement_points = self._build_disagreements(agent_arguments, symbol)
-        
-        # Build judge summary
-        judge_summary = self._build_judge_summary(
-            agent_arguments=agent_arguments,
-            symbol=symbol,
-            move_pct=move_pct,
-            move_direction=move_direction,
-            consensus_points=consensus_points
-        )
-        
-        return {
-            "symbol": symbol,
-            "timestamp": datetime.utcnow(),
-            "agent_arguments": agent_arguments,
-            "consensus_points": consensus_points,
-            "disagreement_points": disagreement_points,
-            "judge_summary": judge_summary,
-            "market_context": {
-                "price": current_price,
-                "move_pct": move_pct,
-                "move_direction": move_direction,
-                "volume": volume,
-            }
-        }
     
     async def _get_agent_argument_async(
         self,
@@ -347,9 +772,18 @@ Consider the economic calendar events when evaluating market drivers.
         move_pct: float,
         move_direction: str,
         temperature: float = 0.7,
-        max_retries: int = 2
+        max_retries: int = 2,
+        on_partial: Optional[Callable[[str, Dict], None]] = None,
+        prior_digest: str = ""
     ) -> AgentArgument:
-        """Get agent argument from respective LLM provider (async version)."""
+        """
+        Get agent argument from respective LLM provider (async version).
+
+        If ``on_partial`` is given, the first attempt is streamed and the
+        callback receives each top-level field (e.g. thesis) as soon as it
+        is complete. ``prior_digest`` carries the previous round's arguments
+        in iterative debates.
+        """
         
         logger.info(f"Getting {agent_name} analysis...")
         
@@ -358,7 +792,55 @@ Consider the economic calendar events when evaluating market drivers.
         if not llm:
             raise ValueError(f"LLM provider not found for {agent_name}")
         
-        # Get detailed system prompt for this agent
+        system_prompt = self._build_system_prompt(agent_name)
+        prompt = self._build_agent_prompt(symbol, market_context, move_pct, move_direction, prior_digest)
+        
+        # Try up to max_retries times; malformed JSON is repaired locally first,
+        # so a retry is only paid for when the reply is unusable
+        request = prompt
+        for attempt in range(max_retries):
+            try:
+                if on_partial is not None and attempt == 0:
+                    response = await self._stream_agent_response(
+                        llm, agent_name, request, system_prompt, temperature, on_partial
+                    )
+                else:
+                    # Use async version for LLM call
+                    response = await llm.complete_async(
+                        prompt=request,
+                        system=system_prompt,
+                        temperature=temperature
+                    )
+                logger.info(f"{agent_name} response length: {len(response)}")
+                
+                return self._parse_agent_argument(agent_name, response)
+                    
+            except LLMProviderError as e:
+                # The provider scheduler already retried with backoff inside its
+                # deadline budget, so another round-trip here would only add latency
+                logger.error(f"{agent_name} provider failed ({e}), using fallback")
+                return self._generate_fallback_argument(agent_name, symbol, move_direction, move_pct)
+            except StructuredOutputError as e:
+                logger.warning(f"{agent_name} attempt {attempt + 1} unusable: {e}")
+                if attempt == max_retries - 1:
+                    logger.error(f"All retries failed for {agent_name}, using fallback")
+                    return self._generate_fallback_argument(agent_name, symbol, move_direction, move_pct)
+                get_structured_output_stats().record_retry(agent_name)
+                request = retry_prompt(prompt, e)
+            except Exception as e:
+                logger.warning(f"{agent_name} attempt {attempt + 1} failed: {e}")
+                if attempt == max_retries - 1:
+                    # Last attempt failed - use fallback
+                    logger.error(f"All retries failed for {agent_name}, using fallback")
+                    return self._generate_fallback_argument(agent_name, symbol, move_direction, move_pct)
+                # Wait a bit before retry
+                await asyncio.sleep(0.5)
+        
+        # Should never reach here, but just in case
+        return self._generate_fallback_argument(agent_name, symbol, move_direction, move_pct)
+
+    def _build_system_prompt(self, agent_name: str) -> str:
+        """Detailed system prompt for an agent, with self-improvement adjustments."""
         system_prompt = get_enhanced_system_prompt(agent_name)
 
         # Apply self-improvement optimizations
@@ -370,104 +852,101 @@ Consider the economic calendar events when evaluating market drivers.
                     logger.info(f"Applied optimization for {agent_name}: {optimization}")
             except Exception as e:
                 logger.warning(f"Failed to apply optimization for {agent_name}: {e}")
-        
-        # Build detailed user prompt (simplified for better success rate)
-        prompt = f"""Analyze {symbol} {move_direction} {abs(move_pct):.2f}% today.
 
-{market_context}
+        return system_prompt
+
+    def _build_agent_prompt(
+        self,
+        symbol: str,
+        market_context: str,
+        move_pct: float,
+        move_direction: str,
+        prior_digest: str = ""
+    ) -> str:
+        """Build detailed user prompt (simplified for better success rate)."""
+        debate_section = f"\n{prior_digest}\n" if prior_digest else ""
+        return f"""Analyze {symbol} {move_direction} {abs(move_pct):.2f}% today.
 
+{market_context}
+{debate_section}
 Respond in JSON format ONLY (no markdown):
 {{
     "thesis": "One sentence with numbers",
     "supporting_points": ["point 1", "point 2", "point 3"],
-    "confidence": "high"
+    "confidence": "high",
+    "stance": "bullish, bearish or neutral"
 }}"""
-        
-        # Try up to max_retries times
-        for attempt in range(max_retries):
-            try:
-                # Use async version for LLM call
-                response = await llm.complete_async(
-                    prompt=prompt,
-                    system=system_prompt,
-                    temperature=temperature
-                )
-                logger.info(f"{agent_name} response length: {len(response)}")
-                
-                # Parse JSON response with aggressive cleaning
-                text = self._clean_json_response(response)
-                data = json.loads(text)
-                
-                if "thesis" in data and "supporting_points" in data:
-                    confidence_map = {
-                        "high": ConfidenceLevel.HIGH,
-                        "moderate": ConfidenceLevel.MODERATE,
-                        "low": ConfidenceLevel.LOW,
-                    }
-                    
-                    supporting_points = data.get("supporting_points", [])
-                    if supporting_points and isinstance(supporting_points[0], dict):
-                        supporting_points = [
-                            f"{p.get('reason', '')} - {p.get('details', '')}" 
-                            if isinstance(p, dict) else str(p)
-                            for p in supporting_points
-                        ]
-                    
-                    return AgentArgument(
-                        agent_name=agent_name,
-                        thesis=data.get("thesis", ""),
-                        supporting_points=supporting_points[:4],
-                        confidence=confidence_map.get(
-                            str(data.get("confidence", "moderate")).lower(), 
-                            ConfidenceLevel.MODERATE
-                        ),
-                        references=[]
-                    )
-                    
-            except Exception as e:
-                logger.warning(f"{agent_name} attempt {attempt + 1} failed: {e}")
-                if attempt == max_retries - 1:
-                    # Last attempt failed - use fallback
-                    logger.error(f"All retries failed for {agent_name}, using fallback")
-                    return self._generate_fallback_argument(agent_name, symbol, move_direction, move_pct)
-                # Wait a bit before retry
-                await asyncio.sleep(0.5)
-        
-        # Should never reach here, but just in case
-        return self._generate_fallback_argument(agent_name, symbol, move_direction, move_pct)
-    
-    def _clean_json_response(self, response: str) -> str:
-        """Aggressively clean LLM response to extract valid JSON."""
-        text = response.strip()
-        
-        # Remove markdown code fences
-        if '```' in text:
-            patterns = [
-                r'```json\s*\n(.*?)\n```',
-                r'```\s*\n(.*?)\n```',
-                r'```json\s*(.*?)```',
-                r'```\s*(.*?)```',
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, text, re.DOTALL)
-                if match:
-                    text = match.group(1).strip()
-                    break
-            else:
-                text = text.replace('```json', '').replace('```', '').strip()
-        
-        # Remove control characters
-        text = text.replace('\r', '').replace('\t', ' ')
-        text = re.sub(r'[\x00-\x08\x0B-\x0C\x0E-\x1F]', '', text)
-        
-        # Fix common JSON issues
-        text = re.sub(r',(\s*[}\]])', r'\1', text)  # Trailing commas
-        text = re.sub(r'//.*?$', '', text, flags=re.MULTILINE)  # Comments
-        text = re.sub(r'/\*.*?\*/', '', text, flags=re.DOTALL)
-        
-        return text
+
+    async def _stream_agent_response(
+        self,
+        llm: LLMClient,
+        agent_name: str,
+        prompt: str,
+        system_prompt: str,
+        temperature: float,
+        on_partial: Callable[[str, Dict], None]
+    ) -> str:
+        """Stream a completion, reporting fields like the thesis as they close."""
+        parser = StreamingJSONFieldParser()
+        parts = []
+        async for chunk in llm.complete_stream(prompt=prompt, system=system_prompt, temperature=temperature):
+            parts.append(chunk)
+            completed = {k: v for k, v in parser.feed(chunk).items() if k in PARTIAL_FIELDS}
+            if completed:
+                on_partial(agent_name, completed)
+        return "".join(parts)
+
+    def _parse_agent_argument(self, agent_name: str, response: str) -> AgentArgument:
+        """
+        Validate a JSON agent reply into an AgentArgument.
+
+        Raises:
+            StructuredOutputError: if the reply is unusable even after local repair
+        """
+        reply = parse_structured(response, AgentReply, agent=agent_name)
+
+        confidence_map = {
+            "high": ConfidenceLevel.HIGH,
+            "moderate": ConfidenceLevel.MODERATE,
+            "low": ConfidenceLevel.LOW,
+        }
+
+        return AgentArgument(
+            agent_name=agent_name,
+            thesis=reply.thesis,
+            supporting_points=reply.supporting_points[:4],
+            confidence=confidence_map.get(reply.confidence, ConfidenceLevel.MODERATE),
+            stance=self._normalize_stance(reply.stance),
+            references=[]
+        )
+
+    @staticmethod
+    def _normalize_stance(raw) -> Optional[str]:
+        """Map free-form stance text onto bullish / bearish / neutral."""
+        text = str(raw or "").lower()
+        for stance, words in STANCE_KEYWORDS.items():
+            if any(word in text for word in words):
+                return stance
+        return None
     
+    @staticmethod
+    def _macro_argument_from_backdrop(
+        backdrop: str,
+        symbol: str,
+        move_pct: float,
+        move_direction: str
+    ) -> AgentArgument:
+        """The Macro Hawk's argument for one symbol of a batch, built from the shared backdrop."""
+        points = [line.strip(" \t-*•") for line in backdrop.splitlines()]
+        points = [point for point in points if point] or [backdrop.strip()]
+        return AgentArgument(
+            agent_name=MACRO_AGENT,
+            thesis=f"{symbol} moved {move_direction} {abs(move_pct):.2f}% against this macro backdrop: {points[0]}",
+            supporting_points=points[:4],
+            confidence=ConfidenceLevel.MODERATE,
+            references=[]
+        )
+
     def _generate_fallback_argument(
         self,
         agent_name: str,
@@ -494,7 +973,8 @@ Respond in JSON format ONLY (no markdown):
                 "Technical levels being tested"
             ],
             confidence=ConfidenceLevel.MODERATE,
-            references=[]
+            references=[],
+            is_fallback=True
         )
     
     def _build_consensus(self, agent_arguments: List[AgentArgument], symbol: str) -> List[ConsensusPoint]:
@@ -618,6 +1098,142 @@ Respond in JSON format ONLY (no markdown):
             "symbol": symbol
         }
 
+    def _get_market_data_batch(self, symbols: List[str]) -> Dict[str, Dict]:
+        """
+        Market data for many symbols from a single yfinance download.
+        Symbols missing from the batch fall back to a per-symbol fetch.
+        """
+        data: Dict[str, Dict] = {}
+        if symbols:
+            try:
+                import yfinance as yf
+                hist = yf.download(
+                    symbols, period="2d", group_by="ticker", progress=False, threads=True, auto_adjust=False
+                )
+                for symbol in symbols:
+                    try:
+                        frame = hist[symbol] if hist.columns.nlevels > 1 else hist
+                        frame = frame.dropna(subset=["Close"])
+                        if len(frame) < 2:
+                            continue
+                        current_price = frame['Close'].iloc[-1]
+                        prev_price = frame['Close'].iloc[-2]
+                        data[symbol] = {
+                            "price": float(current_price),
+                            "change_percent": float((current_price - prev_price) / prev_price * 100),
+                            "volume": int(frame['Volume'].iloc[-1]),
+                            "symbol": symbol
+                        }
+                    except Exception:
+                        continue
+            except Exception as e:
+                logger.warning(f"Batch market data download failed: {e}")
+
+        for symbol in symbols:
+            if symbol not in data:
+                data[symbol] = self._get_market_data(symbol)
+        return data
+
+
+# Last market data seen per symbol, so provisional results need no fetch.
+# Keyed by user-supplied symbols, so only the most recently debated are kept
+_recent_market_data: Dict[str, Dict] = {}
+RECENT_MARKET_DATA_MAX_SYMBOLS = 256
+
+
+def remember_market_data(symbol: str, market_data: Dict):
+    """Record a symbol's latest market data, dropping the least recently debated beyond the bound."""
+    _recent_market_data.pop(symbol, None)
+    _recent_market_data[symbol] = market_data
+    while len(_recent_market_data) > RECENT_MARKET_DATA_MAX_SYMBOLS:
+        del _recent_market_data[next(iter(_recent_market_data))]
+
+
+def build_provisional_result(symbol: str, market_data: Optional[Dict] = None) -> Dict:
+    """
+    Instant, rule-based stand-in for a council result (no LLM or network calls).
+
+    Each council agent is represented by its MultiAgentOrchestrator
+    counterpart, run on the last market data seen for the symbol (or neutral
+    defaults). Arguments are marked ``is_provisional`` so clients can replace
+    them as the LLM agents land.
+    """
+    market_data = market_data or _recent_market_data.get(symbol) or {}
+    inputs = {"price": market_data["price"]} if "price" in market_data else {}
+    analysis = MultiAgentOrchestrator().analyze(inputs)
+    outputs = {output["agent_name"]: output for output in analysis["agent_outputs"]}
+
+    arguments = []
+    for agent_name, rule_agent in PROVISIONAL_AGENTS.items():
+        output = outputs[rule_agent]
+        reasons = output["reasoning"] or ["No rule-based signal triggered."]
+        confidence = (
+            ConfidenceLevel.HIGH if output["confidence"] >= 0.8
+            else ConfidenceLevel.MODERATE if output["confidence"] >= 0.6
+            else ConfidenceLevel.LOW
+        )
+        argument = AgentArgument(
+            agent_name=agent_name,
+            thesis=f"Provisional {rule_agent} read: {output['stance'].lower()}. {reasons[0]}",
+            supporting_points=reasons[:4],
+            confidence=confidence,
+            stance=output["stance"].lower(),
+        )
+        arguments.append({**to_json_dict(argument), "is_provisional": True})
+
+    return {
+        "symbol": symbol,
+        "provisional": True,
+        "source": "rule_based",
+        "consensus_stance": analysis["consensus_stance"],
+        "consensus_confidence": analysis["consensus_confidence"],
+        "agent_arguments": arguments,
+        "market_context": market_data,
+    }
+
+
+# Process-wide engine, built once and rebuilt only when the provider settings change
+_debate_engine = None
+_debate_engine_fingerprint = None
+_debate_engine_lock = threading.Lock()
+
+
+def get_debate_engine() -> DebateEngine:
+    """
+    Get the shared DebateEngine, building it on first use.
+
+    The engine is rebuilt automatically if the provider settings have changed
+    since it was created (see reload_debate_engine). Raises ValueError when no
+    LLM provider is configured.
+    """
+    global _debate_engine, _debate_engine_fingerprint
+    fingerprint = settings.provider_fingerprint()
+    engine = _debate_engine
+    if engine is not None and _debate_engine_fingerprint == fingerprint:
+        return engine
+
+    with _debate_engine_lock:
+        if _debate_engine is None or _debate_engine_fingerprint != fingerprint:
+            if _debate_engine is not None:
+                logger.info("LLM provider settings changed, rebuilding debate engine")
+            _debate_engine = DebateEngine()
+            _debate_engine_fingerprint = fingerprint
+        return _debate_engine
+
+
+def reload_debate_engine() -> Dict:
+    """
+    Re-read provider keys from the environment and swap in a new engine if
+    they changed. Requests already running keep the engine they started with.
+    """
+    previous = _debate_engine
+    settings.reload_provider_settings()
+    engine = get_debate_engine()
+    return {
+        "reloaded": engine is not previous,
+        "agents": list(engine.llm_providers.keys()),
+    }
+
 
 # Convenience function for easy access
 async def get_council_analysis(symbol: str, economic_context: str = "") -> Dict:
@@ -632,7 +1248,7 @@ async def get_council_analysis(symbol: str, economic_context: str = "") -> Dict:
         result = await get_council_analysis("AAPL", economic_context="Earnings tomorrow")
     """
     try:
-        engine = DebateEngine()
+        engine = get_debate_engine()
         return await engine.debate_move_async(symbol, economic_context)
     except ValueError as e:
         # Handle missing API keys gracefully
@@ -662,7 +1278,7 @@ async def get_council_analysis_stream(symbol: str, economic_context: str = "") -
     Yields status updates and partial results.
     """
     try:
-        engine = DebateEngine()
+        engine = get_debate_engine()
         async for chunk in engine.debate_stream_async(symbol, economic_context):
             yield chunk
     except ValueError as e:
@@ -0,0 +1,97 @@
+"""
+Incremental JSON field extraction for streamed LLM output.
+Lets callers act on a top-level string field (e.g. an agent's "thesis") as
+soon as its closing quote arrives, long before the full object is complete.
+"""
+
+import json
+from typing import Dict
+
+
+class StreamingJSONFieldParser:
+    """
+    Feed text chunks of a JSON object and receive completed top-level string fields.
+
+    Anything before the first ``{`` (markdown fences, preamble) is ignored.
+    Nested objects/arrays are skipped over; only string values directly on the
+    outer object are reported, each exactly once.
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, str] = {}
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._buffer = []
+        self._expect = "key"  # key | colon | value | comma
+        self._key = None
+        self._done = False
+
+    def feed(self, chunk: str) -> Dict[str, str]:
+        """
+        Consume the next chunk of text.
+
+        Returns:
+            Dict of top-level string fields completed by this chunk
+        """
+        completed = {}
+        if self._done:
+            return completed
+
+        for char in chunk:
+            if self._in_string:
+                if self._depth == 1:
+                    self._buffer.append(char)
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._close_string(completed)
+                continue
+
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    self._expect = "key"
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    self._buffer = ['"']
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._done = True
+                    break
+                if self._depth == 1:
+                    self._expect = "comma"
+            elif self._depth == 1:
+                if char == ":":
+                    self._expect = "value"
+                elif char == ",":
+                    self._expect = "key"
+                    self._key = None
+
+        return completed
+
+    def _close_string(self, completed: Dict[str, str]):
+        try:
+            text = json.loads("".join(self._buffer))
+        except ValueError:
+            text = "".join(self._buffer)[1:-1]
+        self._buffer = []
+
+        if self._expect == "key":
+            self._key = text
+            self._expect = "colon"
+        elif self._expect == "value" and self._key is not None:
+            if self._key not in self.fields:
+                self.fields[self._key] = text
+                completed[self._key] = text
+            self._expect = "comma"
@@ -0,0 +1,224 @@
+"""
+Persistent completion cache for LLMClient.
+Entries expire after a TTL, the cache is bounded by a byte budget with
+least-recently-used eviction, and the contents are mirrored to a local JSON
+file so a restarted process starts warm. Writes to disk happen on a
+background thread, never on the caller's (event loop) thread.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache:
+    """TTL + LRU cache of completion text keyed by the full request."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl_seconds: float = 3600,
+        max_bytes: int = 32 * 1024 * 1024,
+        persist_interval: float = 5.0,
+    ):
+        """
+        Args:
+            path: JSON file the cache is persisted to (None = memory only)
+            ttl_seconds: How long an entry stays valid
+            max_bytes: Budget for cached keys + responses, in memory and on disk
+            persist_interval: Seconds between background writes to disk
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.persist_interval = persist_interval
+
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._write_lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._load()
+
+    @staticmethod
+    def make_key(provider: str, model: str, system: str, prompt: str, temperature: float) -> str:
+        """Stable hash of everything that determines a completion."""
+        raw = json.dumps([provider, model, system, prompt, round(float(temperature), 3)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _entry_size(key: str, value: str) -> int:
+        return len(key) + len(value.encode("utf-8"))
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached completion, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry["expires_at"] <= time.time():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["value"]
+
+    def set(self, key: str, value: str):
+        """Store a completion, evicting least-recently-used entries if over budget."""
+        size = self._entry_size(key, value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = {"value": value, "expires_at": time.time() + self.ttl_seconds, "size": size}
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+            self._dirty = True
+        self._start_writer()
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= entry["size"]
+        self._dirty = True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._dirty = True
+        self._start_writer()
+
+    def _start_writer(self):
+        """Start the background thread that persists dirty snapshots (idempotent)."""
+        if not self.path or (self._writer is not None and self._writer.is_alive()):
+            return
+        with self._lock:
+            if self._writer is not None and self._writer.is_alive():
+                return
+            self._stop.clear()
+            self._writer = threading.Thread(target=self._write_loop, name="llm-cache-writer", daemon=True)
+            self._writer.start()
+
+    def _write_loop(self):
+        while not self._stop.wait(self.persist_interval):
+            self.flush()
+
+    def close(self):
+        """Stop the background writer and persist any pending changes."""
+        self._stop.set()
+        if self._writer is not None:
+            self._writer.join(timeout=self.persist_interval + 1)
+            self._writer = None
+        self.flush()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                stored = json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load LLM cache from {self.path}: {e}")
+            return
+
+        now = time.time()
+        for key, entry in stored.items():
+            if entry.get("expires_at", 0) <= now:
+                continue
+            size = self._entry_size(key, entry["value"])
+            self._entries[key] = {"value": entry["value"], "expires_at": entry["expires_at"], "size": size}
+            self._bytes += size
+        while self._bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+        self._dirty = False
+        logger.info(f"Loaded {len(self._entries)} cached LLM responses from {self.path}")
+
+    def flush(self):
+        """
+        Write the cache to disk if anything changed since the last write.
+        The snapshot is taken under the cache lock; the (possibly large)
+        write is not. Blocking: called from the writer thread and at shutdown.
+        """
+        if not self.path:
+            return
+        # One writer at a time, so an older snapshot never overwrites a newer one
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                snapshot = {
+                    key: {"value": entry["value"], "expires_at": entry["expires_at"]}
+                    for key, entry in self._entries.items()
+                }
+                self._dirty = False
+
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(snapshot, f)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                logger.error(f"Failed to persist LLM cache to {self.path}: {e}")
+
+    def get_stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+# Global cache instance
+_response_cache = None
+
+
+def get_response_cache() -> LLMResponseCache:
+    """Get or create the process-wide LLM response cache."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = LLMResponseCache(
+            path=settings.LLM_CACHE_PATH or None,
+            ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+            max_bytes=settings.LLM_CACHE_MAX_BYTES,
+        )
+    return _response_cache
+
+
+def flush_response_cache():
+    """Stop the writer and persist the response cache if it has been created (shutdown hook)."""
+    if _response_cache is not None:
+        _response_cache.close()
@@ -4,281 +4,1758 @@ Supports multiple LLM providers: OpenRouter, Gemini, Mistral
 """
 import json
 import logging
-from typing import Optional
+import random
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncGenerator, Dict, List, Optional, Tuple, Union
 from abc import ABC, abstractmethod
 import requests
+from requests.adapters import HTTPAdapter
 import asyncio
 import aiohttp
 
+from ..core.config import settings
+from .llm_cache import LLMResponseCache, get_response_cache
+from .llm_metrics import LLMResponse, add_usage, count_tokens, get_llm_metrics
+
 logger = logging.getLogger(__name__)
 
+# Priority classes for LLM work: requests a user is waiting on are admitted
+# before queued background jobs (prefetch, batch debates, scheduled calls)
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BACKGROUND = "background"
+PRIORITY_CLASSES = (PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND)
+
+
+
+class PriorityHandle:
+    """
+    A priority class that can be raised after requests were submitted under
+    it (e.g. when a user joins a background debate). ``raise_to`` moves the
+    handle's requests still queued in a lower class into the new one.
+    """
+
+    def __init__(self, priority: str = PRIORITY_INTERACTIVE):
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown LLM priority class: {priority}")
+        self.priority = priority
+
+    def raise_to(self, priority: str):
+        """Raise to ``priority`` if it outranks the current class (never lowers)."""
+        if PRIORITY_CLASSES.index(priority) >= PRIORITY_CLASSES.index(self.priority):
+            return
+        self.priority = priority
+        for scheduler in list(_schedulers.values()):
+            scheduler.promote(self)
+
+
+_llm_priority: ContextVar[Union[str, PriorityHandle]] = ContextVar("llm_priority", default=PRIORITY_INTERACTIVE)
+
+
+def _resolve_priority(priority: Union[str, PriorityHandle]) -> Tuple[str, Optional[PriorityHandle]]:
+    if isinstance(priority, PriorityHandle):
+        return priority.priority, priority
+    return priority, None
+
+
+def current_llm_priority() -> str:
+    """Priority class LLM requests made in the current context are submitted under."""
+    return _resolve_priority(_llm_priority.get())[0]
+
+
+@contextmanager
+def llm_priority(priority: Union[str, PriorityHandle]):
+    """
+    Submit every LLM request made inside the block under ``priority``, a
+    class name or a ``PriorityHandle`` read when each request is queued.
+    Tasks created and threads started with ``asyncio.to_thread`` inside the
+    block inherit it (they copy the context).
+    """
+    if not isinstance(priority, PriorityHandle) and priority not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown LLM priority class: {priority}")
+    token = _llm_priority.set(priority)
+    try:
+        yield
+    finally:
+        _llm_priority.reset(token)
+
+
+class HTTPSessionManager:
+    """
+    Process-wide pool of long-lived HTTP sessions, one per provider.
+
+    Sessions are created lazily on first use and reused by every completion so
+    keep-alive connections survive across requests instead of paying a fresh
+    TCP+TLS handshake each time. aiohttp sessions are bound to the event loop
+    that created them, so a session is rebuilt if the running loop changes
+    (e.g. scripts calling ``asyncio.run`` more than once).
+    """
+
+    def __init__(self):
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._session_loops: Dict[str, asyncio.AbstractEventLoop] = {}
+        self._sync_sessions: Dict[str, requests.Session] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def pool_size(self, provider: str) -> int:
+        """Max open connections for a provider (LLM_POOL_SIZE_<PROVIDER>)."""
+        return getattr(settings, f"LLM_POOL_SIZE_{provider.upper()}", settings.LLM_POOL_SIZE_DEFAULT)
+
+    def _provider_stats(self, provider: str) -> Dict[str, int]:
+        if provider not in self._stats:
+            self._stats[provider] = {
+                "requests": 0,
+                "sync_requests": 0,
+                "connections_created": 0,
+                "connections_reused": 0,
+                "sessions_created": 0,
+            }
+        return self._stats[provider]
+
+    def _trace_config(self, provider: str) -> aiohttp.TraceConfig:
+        stats = self._provider_stats(provider)
+
+        async def on_request_start(session, ctx, params):
+            stats["requests"] += 1
+
+        async def on_connection_create_end(session, ctx, params):
+            stats["connections_created"] += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            stats["connections_reused"] += 1
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    def get_session(self, provider: str) -> aiohttp.ClientSession:
+        """Return the shared aiohttp session for a provider, creating it if needed."""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(provider)
+        if session is not None and not session.closed and self._session_loops.get(provider) is loop:
+            return session
+
+        if session is not None and not session.closed:
+            # Owned by a previous (now finished) event loop; it cannot be closed from here.
+            logger.debug(f"Discarding {provider} session bound to a stale event loop")
+
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size(provider),
+            keepalive_timeout=settings.LLM_KEEPALIVE_SECONDS,
+            ttl_dns_cache=300,
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            trace_configs=[self._trace_config(provider)],
+        )
+        self._sessions[provider] = session
+        self._session_loops[provider] = loop
+        self._provider_stats(provider)["sessions_created"] += 1
+        logger.info(f"Opened pooled HTTP session for {provider} (pool size {self.pool_size(provider)})")
+        return session
+
+    def get_sync_session(self, provider: str) -> requests.Session:
+        """Return the shared ``requests`` session used by blocking completions."""
+        with self._lock:
+            session = self._sync_sessions.get(provider)
+            if session is None:
+                size = self.pool_size(provider)
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sync_sessions[provider] = session
+            self._provider_stats(provider)["sync_requests"] += 1
+            return session
+
+    async def close(self):
+        """Close every pooled session. Called on application shutdown."""
+        loop = asyncio.get_running_loop()
+        for provider, session in list(self._sessions.items()):
+            if not session.closed and self._session_loops.get(provider) is loop:
+                await session.close()
+        self._sessions.clear()
+        self._session_loops.clear()
+
+        with self._lock:
+            for session in self._sync_sessions.values():
+                session.close()
+            self._sync_sessions.clear()
+        logger.info("Closed pooled LLM HTTP sessions")
+
+    def get_stats(self, provider: Optional[str] = None) -> Dict:
+        """Connection reuse statistics, for one provider or all of them."""
+        if provider is not None:
+            stats = dict(self._provider_stats(provider))
+            opened = stats["connections_created"] + stats["connections_reused"]
+            stats["reuse_ratio"] = round(stats["connections_reused"] / opened, 3) if opened else 0.0
+            stats["pool_size"] = self.pool_size(provider)
+            return stats
+        return {name: self.get_stats(name) for name in list(self._stats)}
+
+
+# Shared by every provider instance in the process
+session_manager = HTTPSessionManager()
+
+
+async def close_http_sessions():
+    """Close the process-wide LLM HTTP sessions (FastAPI shutdown hook)."""
+    await session_manager.close()
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight async requests.
+
+    The first caller for a key starts the work; callers arriving while it is
+    still running await the same task instead of issuing a duplicate request.
+    The shared task is only cancelled once every waiter has gone away.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def run(self, key: str, factory):
+        """
+        Await the in-flight task for ``key``, starting it with ``factory()`` if none.
+
+        Returns:
+            Tuple of (result, coalesced) where coalesced is True if this caller
+            joined a request started by someone else.
+        """
+        task = self._inflight.get(key)
+        coalesced = task is not None and task.get_loop() is asyncio.get_running_loop()
+        if coalesced:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            self._waiters[key] = 0
+            self.leaders += 1
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task), coalesced
+        finally:
+            if self._inflight.get(key) is task:
+                self._waiters[key] -= 1
+                if self._waiters[key] == 0 and not task.done():
+                    task.cancel()
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            self._waiters.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # mark retrieved; waiters already received it
+
+    def get_stats(self) -> Dict:
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "waiters": {key[:16]: count for key, count in self._waiters.items()},
+        }
+
+
+# Process-wide so identical prompts from different clients/users coalesce
+single_flight = SingleFlight()
+
+
+class _SharedStream:
+    """One upstream stream and the chunks it has produced so far."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.changed = asyncio.Event()
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+
+
+class StreamSingleFlight:
+    """
+    Coalesces identical in-flight streams.
+
+    The first caller for a key starts the upstream stream; callers arriving
+    while it is still running get the chunks buffered so far, then every new
+    chunk as it arrives. The upstream stream is only cancelled once every
+    subscriber has gone away.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, _SharedStream] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def subscribe(self, key: str, factory, on_coalesced=None) -> AsyncGenerator[str, None]:
+        """Yield every chunk of the stream for ``key``, starting it with ``factory()`` if none."""
+        loop = asyncio.get_running_loop()
+        shared = self._inflight.get(key)
+        if shared is not None and shared.loop is loop:
+            self.coalesced += 1
+            if on_coalesced is not None:
+                on_coalesced()
+        else:
+            shared = _SharedStream(loop)
+            self._inflight[key] = shared
+            self.leaders += 1
+            shared.task = asyncio.ensure_future(self._pump(key, shared, factory()))
+
+        shared.subscribers += 1
+        try:
+            index = 0
+            while True:
+                if index < len(shared.chunks):
+                    index += 1
+                    yield shared.chunks[index - 1]
+                elif shared.done:
+                    if shared.error is not None:
+                        raise shared.error
+                    return
+                else:
+                    shared.changed.clear()
+                    await shared.changed.wait()
+        finally:
+            shared.subscribers -= 1
+            if shared.subscribers == 0 and not shared.task.done():
+                # Nobody is listening: stop the upstream call, and let the next caller start afresh
+                self._forget(key, shared)
+                shared.task.cancel()
+
+    async def _pump(self, key: str, shared: _SharedStream, stream: AsyncGenerator[str, None]):
+        try:
+            async for chunk in stream:
+                shared.chunks.append(chunk)
+                shared.changed.set()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            shared.error = e
+        finally:
+            shared.done = True
+            shared.changed.set()
+            self._forget(key, shared)
+
+    def _forget(self, key: str, shared: _SharedStream):
+        if self._inflight.get(key) is shared:
+            del self._inflight[key]
+
+    def get_stats(self) -> Dict:
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "subscribers": {key[:16]: shared.subscribers for key, shared in self._inflight.items()},
+        }
+
+
+stream_single_flight = StreamSingleFlight()
+
+
+class LLMProviderError(Exception):
+    """A provider request failed (HTTP error, timeout, or exhausted retries)."""
+
+    RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+    def __init__(self, provider: str, message: str, status: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(f"{provider}: {message}")
+        self.provider = provider
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        # Network errors and timeouts have no status and are worth retrying
+        return self.status is None or self.status in self.RETRYABLE_STATUSES
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+class _AsyncWaiter:
+    """Queue entry for a coroutine waiting on a scheduler slot."""
+
+    def __init__(self, tokens: int, priority: Union[str, PriorityHandle]):
+        self.tokens = tokens
+        self.priority, self.handle = _resolve_priority(priority)
+        self.loop = asyncio.get_running_loop()
+        self.future = self.loop.create_future()
+
+    def reset(self):
+        if self.future.done():
+            self.future = self.loop.create_future()
+
+    def wake(self):
+        def _set(future):
+            if not future.done():
+                future.set_result(None)
+        self.loop.call_soon_threadsafe(_set, self.future)
+
+    async def wait(self, timeout: Optional[float]):
+        await asyncio.wait({self.future}, timeout=timeout)
+
+
+class _ThreadWaiter:
+    """Queue entry for a blocking caller (e.g. an agent running in an executor)."""
+
+    def __init__(self, tokens: int, priority: Union[str, PriorityHandle]):
+        self.tokens = tokens
+        self.priority, self.handle = _resolve_priority(priority)
+        self.event = threading.Event()
+
+    def reset(self):
+        self.event.clear()
+
+    def wake(self):
+        self.event.set()
+
+    def wait(self, timeout: Optional[float]):
+        self.event.wait(timeout)
+
+
+class ProviderScheduler:
+    """
+    Admission control for one LLM provider.
+
+    Requests queue (FIFO) for a concurrency slot and for capacity in
+    requests-per-minute and tokens-per-minute buckets instead of being fired
+    at the provider unconditionally. Retryable failures are retried with
+    jittered exponential backoff inside a per-request deadline budget, and a
+    ``Retry-After`` from the provider pauses the whole queue until it expires.
+    Works for both coroutines and blocking callers running in threads.
+
+    Each priority class (see ``llm_priority``) has its own queue: queued
+    interactive requests are admitted before any queued background request.
+    A class's reserved share of the slots is held back from the other class:
+    always for interactive work, so a user never waits behind background
+    requests already in flight, and only while background work is queued for
+    background work, so it cannot be starved.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrent: int = 4,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_retries: int = 3,
+        deadline_seconds: float = 90.0,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        reserved_shares: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Args:
+            name: Provider name
+            max_concurrent: Max requests in flight at once
+            requests_per_minute: Request bucket size/refill (0 = unlimited)
+            tokens_per_minute: Token bucket size/refill (0 = unlimited)
+            max_retries: Retries after the first attempt for retryable errors
+            deadline_seconds: Total budget per request, queueing included
+            backoff_base: First backoff delay in seconds
+            backoff_max: Cap on a single backoff delay
+            reserved_shares: Share of max_concurrent reserved per priority class
+        """
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.deadline_seconds = deadline_seconds
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        shares = reserved_shares or {}
+        reserved_interactive = min(self.max_concurrent - 1, round(self.max_concurrent * shares.get(PRIORITY_INTERACTIVE, 0)))
+        reserved_background = min(
+            self.max_concurrent - reserved_interactive, round(self.max_concurrent * shares.get(PRIORITY_BACKGROUND, 0))
+        )
+        self.reserved = {PRIORITY_INTERACTIVE: max(0, reserved_interactive), PRIORITY_BACKGROUND: max(0, reserved_background)}
+
+        self._lock = threading.Lock()
+        self._queues: Dict[str, deque] = {priority: deque() for priority in PRIORITY_CLASSES}
+        self._in_flight = 0
+        self._class_in_flight = {priority: 0 for priority in PRIORITY_CLASSES}
+        self._request_bucket = float(requests_per_minute)
+        self._token_bucket = float(tokens_per_minute)
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+
+        self.granted = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.deadline_exceeded = 0
+        self.max_queue_depth = 0
+        self.total_wait_seconds = 0.0
+        self._recent_waits: deque = deque(maxlen=500)
+        self._class_stats = {
+            priority: {"granted": 0, "max_queue_depth": 0, "total_wait_seconds": 0.0, "recent_waits": deque(maxlen=500)}
+            for priority in PRIORITY_CLASSES
+        }
+
+    # ── admission ──────────────────────────────────────────────
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        if self.requests_per_minute:
+            self._request_bucket = min(
+                self.requests_per_minute, self._request_bucket + elapsed * self.requests_per_minute / 60
+            )
+        if self.tokens_per_minute:
+            self._token_bucket = min(
+                self.tokens_per_minute, self._token_bucket + elapsed * self.tokens_per_minute / 60
+            )
+
+    def _try_grant(self, waiter) -> Optional[float]:
+        """
+        Grant a slot to ``waiter`` if possible (caller holds the lock).
+
+        Returns:
+            0 if granted, seconds until the waiter should re-check, or None
+            if it must wait to be woken (not at the head / no free slot).
+        """
+        if self._next_waiter() is not waiter:
+            return None
+        now = time.monotonic()
+        if now < self._blocked_until:
+            return self._blocked_until - now
+
+        self._refill(now)
+        if self.requests_per_minute and self._request_bucket < 1:
+            return (1 - self._request_bucket) * 60 / self.requests_per_minute
+        tokens = min(waiter.tokens, self.tokens_per_minute) if self.tokens_per_minute else 0
+        if self.tokens_per_minute and self._token_bucket < tokens:
+            return (tokens - self._token_bucket) * 60 / self.tokens_per_minute
+
+        if self.requests_per_minute:
+            self._request_bucket -= 1
+        self._token_bucket -= tokens
+        self._queues[waiter.priority].popleft()
+        self._in_flight += 1
+        self._class_in_flight[waiter.priority] += 1
+        self.granted += 1
+        self._class_stats[waiter.priority]["granted"] += 1
+        self._wake_next()
+        return 0
+
+    def _class_limit(self, priority: str) -> int:
+        """Slots ``priority`` may fill: the other class's unmet reservation is held back."""
+        limit = self.max_concurrent
+        for other in PRIORITY_CLASSES:
+            if other == priority:
+                continue
+            if other == PRIORITY_INTERACTIVE or self._queues[other]:
+                limit -= max(0, self.reserved[other] - self._class_in_flight[other])
+        return limit
+
+    def _next_waiter(self):
+        """The waiter admission is reserved for: head of the highest class that has room."""
+        for priority in PRIORITY_CLASSES:
+            queue = self._queues[priority]
+            if queue and self._in_flight < self._class_limit(priority):
+                return queue[0]
+        return None
+
+    def _wake_next(self):
+        waiter = self._next_waiter()
+        if waiter is not None:
+            waiter.wake()
+
+    def _queue_depth(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _enqueue(self, waiter):
+        with self._lock:
+            queue = self._queues[waiter.priority]
+            queue.append(waiter)
+            self.max_queue_depth = max(self.max_queue_depth, self._queue_depth())
+            stats = self._class_stats[waiter.priority]
+            stats["max_queue_depth"] = max(stats["max_queue_depth"], len(queue))
+
+    def promote(self, handle: PriorityHandle):
+        """Move queued requests submitted under ``handle`` into the class it was raised to."""
+        with self._lock:
+            target = self._queues[handle.priority]
+            for priority, queue in self._queues.items():
+                if priority == handle.priority:
+                    continue
+                for waiter in [waiter for waiter in queue if waiter.handle is handle]:
+                    queue.remove(waiter)
+                    waiter.priority = handle.priority
+                    target.append(waiter)
+            stats = self._class_stats[handle.priority]
+            stats["max_queue_depth"] = max(stats["max_queue_depth"], len(target))
+            self._wake_next()
+
+    def _abandon(self, waiter):
+        with self._lock:
+            try:
+                self._queues[waiter.priority].remove(waiter)
+            except ValueError:
+                return
+            self._wake_next()
+
+    def _record_wait(self, seconds: float, priority: str):
+        self.total_wait_seconds += seconds
+        self._recent_waits.append(seconds)
+        stats = self._class_stats[priority]
+        stats["total_wait_seconds"] += seconds
+        stats["recent_waits"].append(seconds)
+
+    async def acquire_async(self, tokens: int = 0, priority: Union[str, PriorityHandle, None] = None) -> str:
+        """
+        Wait (without blocking the loop) until a request may be sent.
+
+        Returns:
+            The priority class the slot was granted under (release it under the same one)
+        """
+        waiter = _AsyncWaiter(tokens, priority or _llm_priority.get())
+        self._enqueue(waiter)
+        started = time.monotonic()
+        try:
+            while True:
+                with self._lock:
+                    delay = self._try_grant(waiter)
+                    if delay == 0:
+                        break
+                    waiter.reset()
+                await waiter.wait(delay)
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        self._record_wait(time.monotonic() - started, waiter.priority)
+        return waiter.priority
+
+    def acquire(
+        self, tokens: int = 0, timeout: Optional[float] = None, priority: Union[str, PriorityHandle, None] = None
+    ) -> bool:
+        """Blocking acquire for threaded callers. Returns False on timeout."""
+        return self._acquire(tokens, timeout, priority) is not None
+
+    def _acquire(
+        self, tokens: int, timeout: Optional[float], priority: Union[str, PriorityHandle, None]
+    ) -> Optional[str]:
+        """Blocking acquire; the class the slot was granted under, or None on timeout."""
+        waiter = _ThreadWaiter(tokens, priority or _llm_priority.get())
+        self._enqueue(waiter)
+        started = time.monotonic()
+        while True:
+            with self._lock:
+                delay = self._try_grant(waiter)
+                if delay == 0:
+                    break
+                waiter.reset()
+            if timeout is not None:
+                remaining = timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self._abandon(waiter)
+                    return None
+                delay = remaining if delay is None else min(delay, remaining)
+            waiter.wait(delay)
+        self._record_wait(time.monotonic() - started, waiter.priority)
+        return waiter.priority
+
+    def release(self, reserved_tokens: int = 0, used_tokens: Optional[int] = None, priority: str = PRIORITY_INTERACTIVE):
+        """Free a slot and settle the token bucket against actual usage."""
+        with self._lock:
+            self._in_flight -= 1
+            self._class_in_flight[priority] -= 1
+            if self.tokens_per_minute and used_tokens is not None:
+                reserved = min(reserved_tokens, self.tokens_per_minute)
+                self._token_bucket = min(self.tokens_per_minute, self._token_bucket + reserved - used_tokens)
+            self._wake_next()
+
+    def _backoff_delay(self, attempt: int, error: LLMProviderError) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt)) * random.uniform(0.5, 1.5)
+        if error.retry_after is not None:
+            delay = max(delay, error.retry_after)
+        return delay
+
+    def _note_failure(self, error: LLMProviderError):
+        if error.status == 429:
+            self.rate_limited += 1
+            if error.retry_after:
+                with self._lock:
+                    self._blocked_until = max(self._blocked_until, time.monotonic() + error.retry_after)
+                logger.warning(f"{self.name} rate limited; pausing queue for {error.retry_after:.1f}s")
+
+    # ── execution ──────────────────────────────────────────────
+
+    async def run_async(self, fn, tokens: int = 0):
+        """
+        Run ``await fn(timeout)`` under admission control with retries.
+
+        ``fn`` receives the seconds left in the deadline budget and should use
+        it as its request timeout. It returns the completion text. The
+        request is queued under the caller's priority class.
+        """
+        source = _llm_priority.get()
+        deadline_at = time.monotonic() + self.deadline_seconds
+        attempt = 0
+        while True:
+            remaining = deadline_at - time.monotonic()
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError
+                priority = await asyncio.wait_for(self.acquire_async(tokens, source), remaining)
+            except asyncio.TimeoutError:
+                self.deadline_exceeded += 1
+                raise LLMProviderError(self.name, "deadline exceeded while queued")
+
+            used_tokens = None
+            try:
+                result = await fn(max(1.0, deadline_at - time.monotonic()))
+                used_tokens = tokens + estimate_tokens(result)
+                return result
+            except LLMProviderError as e:
+                error = e
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = LLMProviderError(self.name, f"{type(e).__name__}: {e}")
+            finally:
+                self.release(tokens, used_tokens, priority)
+
+            self._note_failure(error)
+            delay = self._backoff_delay(attempt, error)
+            if not error.retryable or attempt >= self.max_retries or time.monotonic() + delay >= deadline_at:
+                raise error
+            attempt += 1
+            self.retries += 1
+            logger.warning(f"{self.name} request failed ({error}); retry {attempt} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    @asynccontextmanager
+    async def slot_async(self, tokens: int = 0):
+        """Hold one admission slot for the lifetime of a streamed request (no retries)."""
+        try:
+            priority = await asyncio.wait_for(self.acquire_async(tokens, _llm_priority.get()), self.deadline_seconds)
+        except asyncio.TimeoutError:
+            self.deadline_exceeded += 1
+            raise LLMProviderError(self.name, "deadline exceeded while queued")
+        try:
+            yield
+        finally:
+            self.release(tokens, priority=priority)
+
+    def run(self, fn, tokens: int = 0):
+        """Blocking counterpart of run_async; ``fn(timeout)`` returns the text."""
+        source = _llm_priority.get()
+        deadline_at = time.monotonic() + self.deadline_seconds
+        attempt = 0
+        while True:
+            remaining = deadline_at - time.monotonic()
+            priority = self._acquire(tokens, remaining, source) if remaining > 0 else None
+            if priority is None:
+                self.deadline_exceeded += 1
+                raise LLMProviderError(self.name, "deadline exceeded while queued")
+
+            used_tokens = None
+            try:
+                result = fn(max(1.0, deadline_at - time.monotonic()))
+                used_tokens = tokens + estimate_tokens(result)
+                return result
+            except LLMProviderError as e:
+                error = e
+            except requests.RequestException as e:
+                error = LLMProviderError(self.name, f"{type(e).__name__}: {e}")
+            finally:
+                self.release(tokens, used_tokens, priority)
+
+            self._note_failure(error)
+            delay = self._backoff_delay(attempt, error)
+            if not error.retryable or attempt >= self.max_retries or time.monotonic() + delay >= deadline_at:
+                raise error
+            attempt += 1
+            self.retries += 1
+            logger.warning(f"{self.name} request failed ({error}); retry {attempt} in {delay:.2f}s")
+            time.sleep(delay)
+
+    def _class_snapshot(self, priority: str) -> Dict:
+        stats = self._class_stats[priority]
+        waits = sorted(stats["recent_waits"])
+        return {
+            "reserved_slots": self.reserved[priority],
+            "in_flight": self._class_in_flight[priority],
+            "queue_depth": len(self._queues[priority]),
+            "max_queue_depth": stats["max_queue_depth"],
+            "granted": stats["granted"],
+            "avg_wait_ms": round(stats["total_wait_seconds"] / stats["granted"] * 1000, 1) if stats["granted"] else 0.0,
+            "p95_wait_ms": round(_p95(waits) * 1000, 1),
+        }
+
+    def get_stats(self) -> Dict:
+        waits = sorted(self._recent_waits)
+        p95 = _p95(waits)
+        return {
+            "max_concurrent": self.max_concurrent,
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+            "in_flight": self._in_flight,
+            "queue_depth": self._queue_depth(),
+            "max_queue_depth": self.max_queue_depth,
+            "granted": self.granted,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "deadline_exceeded": self.deadline_exceeded,
+            "avg_wait_ms": round(self.total_wait_seconds / self.granted * 1000, 1) if self.granted else 0.0,
+            "p95_wait_ms": round(p95 * 1000, 1),
+            "paused_for_seconds": round(max(0.0, self._blocked_until - time.monotonic()), 2),
+            "classes": {priority: self._class_snapshot(priority) for priority in PRIORITY_CLASSES},
+        }
+
+
+def _p95(sorted_values: List[float]) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * 0.95))] if sorted_values else 0.0
+
+
+_schedulers: Dict[str, ProviderScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(provider: str) -> ProviderScheduler:
+    """Get or create the process-wide scheduler for a provider."""
+    with _schedulers_lock:
+        if provider not in _schedulers:
+            key = provider.upper()
+            _schedulers[provider] = ProviderScheduler(
+                name=provider,
+                max_concurrent=getattr(settings, f"LLM_MAX_CONCURRENT_{key}", settings.LLM_MAX_CONCURRENT_DEFAULT),
+                requests_per_minute=getattr(settings, f"LLM_RPM_{key}", 0),
+                tokens_per_minute=getattr(settings, f"LLM_TPM_{key}", 0),
+                max_retries=settings.LLM_MAX_RETRIES,
+                deadline_seconds=settings.LLM_REQUEST_DEADLINE_SECONDS,
+                reserved_shares={
+                    PRIORITY_INTERACTIVE: settings.LLM_RESERVED_SHARE_INTERACTIVE,
+                    PRIORITY_BACKGROUND: settings.LLM_RESERVED_SHARE_BACKGROUND,
+                },
+            )
+        return _schedulers[provider]
+
+
+def get_scheduler_stats() -> Dict:
+    """Queue depth / wait time statistics for every provider scheduler."""
+    return {name: scheduler.get_stats() for name, scheduler in list(_schedulers.items())}
+
+
+class LatencyTracker:
+    """Rolling window of successful completion latencies per provider/model."""
+
+    def __init__(self, window: int = 100):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+
+    def record(self, key: str, seconds: float):
+        self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, key: str, pct: float, min_samples: int = 1) -> Optional[float]:
+        """Return the pct-th percentile latency, or None until min_samples are recorded."""
+        samples = self._samples.get(key)
+        if not samples or len(samples) < max(1, min_samples):
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def get_stats(self) -> Dict:
+        return {
+            key: {
+                "samples": len(samples),
+                "p50_ms": round(self.percentile(key, 50) * 1000, 1),
+                "p90_ms": round(self.percentile(key, 90) * 1000, 1),
+            }
+            for key, samples in list(self._samples.items())
+            if samples
+        }
+
+
+class HedgeBudget:
+    """Caps how many hedge requests may be fired in any rolling 60 second window."""
+
+    def __init__(self, max_per_minute: int):
+        self.max_per_minute = max_per_minute
+        self._fired = deque()
+        self._lock = threading.Lock()
+        self.denied = 0
+
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            while self._fired and now - self._fired[0] >= 60:
+                self._fired.popleft()
+            if len(self._fired) >= self.max_per_minute:
+                self.denied += 1
+                return False
+            self._fired.append(now)
+            return True
+
+    def get_stats(self) -> Dict:
+        return {
+            "max_per_minute": self.max_per_minute,
+            "fired_last_minute": len(self._fired),
+            "denied": self.denied,
+        }
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one provider/model.
+
+    closed    -> requests flow; ``failure_threshold`` failures in a row open it
+    open      -> requests are refused until ``reset_seconds`` have passed
+    half_open -> a single probe request is let through; success closes the
+                 breaker, failure re-opens it for another window
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+        self.times_opened = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+
+    def allow_request(self) -> bool:
+        """Whether a request may be sent now (claims the probe slot when half-open)."""
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit for {self.name} closed")
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self, error: Exception):
+        with self._lock:
+            self.consecutive_failures += 1
+            self.last_error = str(error) or type(error).__name__
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                    logger.warning(f"Circuit for {self.name} opened after {self.consecutive_failures} failures")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def record_cancelled(self):
+        """A cancelled call proves nothing either way; free the probe slot."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def get_stats(self) -> Dict:
+        retry_in = 0.0
+        if self.state == self.OPEN:
+            retry_in = max(0.0, self.reset_seconds - (time.monotonic() - self._opened_at))
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_in_seconds": round(retry_in, 1),
+            "last_error": self.last_error,
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(provider: str, model: str) -> CircuitBreaker:
+    """Get or create the process-wide circuit breaker for a provider/model."""
+    name = f"{provider}/{model}"
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(
+                name,
+                failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+                reset_seconds=settings.LLM_BREAKER_RESET_SECONDS,
+            )
+        return _breakers[name]
+
+
+def get_breaker_stats() -> Dict:
+    """Circuit breaker state for every provider/model used so far."""
+    return {name: breaker.get_stats() for name, breaker in list(_breakers.items())}
+
+
+# Shared across clients: agents on the same model feed one latency profile,
+# and the hedge budget bounds the extra load on the whole process
+latency_tracker = LatencyTracker()
+hedge_budget = HedgeBudget(settings.LLM_HEDGE_MAX_PER_MINUTE)
+
 
 class LLMProvider(ABC):
     """Abstract base for LLM providers."""
+
+    name: str = "base"
+    # Request the provider's JSON output mode (set by LLMClient(json_mode=True))
+    json_mode: bool = False
     
     @abstractmethod
     def complete(self, prompt: str, system: str = "", temperature: float = 0.7) -> str:
         pass
 
+    async def _post_json_async(self, url: str, headers: dict, payload: dict, timeout: float) -> dict:
+        """POST on the pooled session; raise LLMProviderError on a non-200 reply."""
+        session = session_manager.get_session(self.name)
+        async with session.post(
+            url,
+            headers=headers,
+            json=payload,
+            timeout=aiohttp.ClientTimeout(total=min(60, timeout))
+        ) as response:
+            if response.status == 200:
+                return await response.json()
+            raise LLMProviderError(
+                self.name,
+                f"HTTP {response.status}",
+                status=response.status,
+                retry_after=parse_retry_after(response.headers.get("Retry-After")),
+            )
+
+    async def _stream_sse_async(self, url: str, headers: dict, payload: dict, tokens: int) -> AsyncGenerator[dict, None]:
+        """
+        POST a streaming request and yield each server-sent event as parsed JSON.
+        Holds one scheduler slot for the whole stream.
+        """
+        scheduler = get_scheduler(self.name)
+        async with scheduler.slot_async(tokens):
+            session = session_manager.get_session(self.name)
+            async with session.post(
+                url,
+                headers=headers,
+                json=payload,
+                timeout=aiohttp.ClientTimeout(total=scheduler.deadline_seconds, sock_read=60)
+            ) as response:
+                if response.status != 200:
+                    raise LLMProviderError(
+                        self.name,
+                        f"HTTP {response.status}",
+                        status=response.status,
+                        retry_after=parse_retry_after(response.headers.get("Retry-After")),
+                    )
+                async for raw_line in response.content:
+                    line = raw_line.decode("utf-8").strip()
+                    if not line.startswith("data:"):
+                        continue  # blank keep-alives and ": comment" lines
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    try:
+                        yield json.loads(data)
+                    except ValueError:
+                        continue
+
+    async def _stream_chat_async(self, url: str, headers: dict, payload: dict) -> AsyncGenerator[str, None]:
+        """Stream an OpenAI-compatible chat completion, yielding text deltas."""
+        tokens = estimate_tokens(json.dumps(payload["messages"]))
+        async for event in self._stream_sse_async(url, headers, {**payload, "stream": True}, tokens):
+            choices = event.get("choices") or [{}]
+            delta = (choices[0].get("delta") or {}).get("content")
+            if delta:
+                yield delta
+
+    @staticmethod
+    def _chat_response(result: dict) -> LLMResponse:
+        """Text and reported usage from an OpenAI-compatible chat completion."""
+        usage = result.get("usage") or {}
+        return LLMResponse(
+            result["choices"][0]["message"]["content"],
+            prompt_tokens=usage.get("prompt_tokens"),
+            completion_tokens=usage.get("completion_tokens"),
+        )
+
+    def _post_json(self, url: str, headers: dict, payload: dict, timeout: float) -> dict:
+        """Blocking POST on the pooled session; raise LLMProviderError on a non-200 reply."""
+        session = session_manager.get_sync_session(self.name)
+        response = session.post(url, headers=headers, json=payload, timeout=min(60, timeout))
+        if response.status_code == 200:
+            return response.json()
+        raise LLMProviderError(
+            self.name,
+            f"HTTP {response.status_code}",
+            status=response.status_code,
+            retry_after=parse_retry_after(response.headers.get("Retry-After")),
+        )
+
 
 class OpenRouterProvider(LLMProvider):
     """OpenRouter provider for free tier models."""
+
+    name = "openrouter"
     
     def __init__(self, api_key: str, model: str):
         self.api_key = api_key
         self.model = model
         self.base_url = "https://openrouter.ai/api/v1"
+
+    def _headers(self) -> dict:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "HTTP-Referer": "https://llm-council.local",
+            "X-Title": "LLM Council",
+            "Content-Type": "application/json"
+        }
+
+    def _payload(self, prompt: str, system: str, temperature: float) -> dict:
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": 2000
+        }
+        if self.json_mode:
+            payload["response_format"] = {"type": "json_object"}
+        return payload
     
     def complete(self, prompt: str, system: str = "", temperature: float = 0.7) -> str:
+        payload = self._payload(prompt, system, temperature)
+
+        def attempt(timeout: float) -> str:
+            result = self._post_json(f"{self.base_url}/chat/completions", self._headers(), payload, timeout)
+            return self._chat_response(result)
+
         try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "HTTP-Referer": "https://llm-council.local",
-                "X-Title": "LLM Council",
-                "Content-Type": "application/json"
-            }
-            
-            messages = []
-            if system:
-                messages.append({"role": "system", "content": system})
-            messages.append({"role": "user", "content": prompt})
-            
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers=headers,
-                json={
-                    "model": self.model,
-                    "messages": messages,
-                    "temperature": temperature,
-                    "max_tokens": 2000
-                },
-                timeout=60
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return result["choices"][0]["message"]["content"]
-            else:
-                logger.error(f"OpenRouter error: {response.status_code}")
-                return f"Error: {response.status_code}"
-        except Exception as e:
+            return get_scheduler(self.name).run(attempt, tokens=estimate_tokens(prompt + system))
+        except LLMProviderError as e:
             logger.error(f"OpenRouter error: {e}")
-            return f"Error: {str(e)}"
+            raise
     
     async def complete_async(self, prompt: str, system: str = "", temperature: float = 0.7) -> str:
         """Async version for parallel execution."""
+        payload = self._payload(prompt, system, temperature)
+
+        async def attempt(timeout: float) -> str:
+            result = await self._post_json_async(f"{self.base_url}/chat/completions", self._headers(), payload, timeout)
+            return self._chat_response(result)
+
         try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "HTTP-Referer": "https://llm-council.local",
-                "X-Title": "LLM Council",
-                "Content-Type": "application/json"
-            }
-            
-            messages = []
-            if system:
-                messages.append({"role": "system", "content": system})
-            messages.append({"role": "user", "content": prompt})
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.base_url}/chat/completions",
-                    headers=headers,
-                    json={
-                        "model": self.model,
-                        "messages": messages,
-                        "temperature": temperature,
-                        "max_tokens": 2000
-                    },
-                    timeout=aiohttp.ClientTimeout(total=60)
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        return result["choices"][0]["message"]["content"]
-                    else:
-                        logger.error(f"OpenRouter error: {response.status}")
-                        return f"Error: {response.status}"
-        except Exception as e:
+            return await get_scheduler(self.name).run_async(attempt, tokens=estimate_tokens(prompt + system))
+        except LLMProviderError as e:
             logger.error(f"OpenRouter async error: {e}")
-            return f"Error: {str(e)}"
+            raise
+
+
+    async def complete_stream(self, prompt: str, system: str = "", temperature: float = 0.7) -> AsyncGenerator[str, None]:
+        """Stream the completion as text deltas via server-sent events."""
+        payload = self._payload(prompt, system, temperature)
+        async for delta in self._stream_chat_async(f"{self.base_url}/chat/completions", self._headers(), payload):
+            yield delta
 
 
 class GeminiProvider(LLMProvider):
-    """Google Gemini provider."""
+    """Google Gemini provider (REST API)."""
+
+    name = "gemini"
     
     def __init__(self, api_key: str, model: str = "gemini-1.5-flash"):
         self.api_key = api_key
         self.model = model
-        try:
-            import google.generativeai as genai
-            genai.configure(api_key=api_key)
-            self.client = genai.GenerativeModel(model)
-        except ImportError:
-            logger.warning("google-generativeai not installed")
-            self.client = None
+        self.base_url = "https://generativelanguage.googleapis.com/v1beta"
+
+    @property
+    def supports_json_mode(self) -> bool:
+        """Only Gemini 1.5+ accepts responseMimeType; gemini-pro / 1.0 reject it with HTTP 400."""
+        match = re.match(r"(?:models/)?gemini-(\d+(?:\.\d+)?)", self.model)
+        return bool(match) and float(match.group(1)) >= 1.5
+
+    def _headers(self) -> dict:
+        return {
+            "x-goog-api-key": self.api_key,
+            "Content-Type": "application/json"
+        }
+
+    def _payload(self, prompt: str, system: str, temperature: float) -> dict:
+        payload = {
+            "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+            "generationConfig": {
+                "temperature": temperature,
+                "maxOutputTokens": 2000
+            }
+        }
+        if system:
+            payload["systemInstruction"] = {"parts": [{"text": system}]}
+        if self.json_mode and self.supports_json_mode:
+            payload["generationConfig"]["responseMimeType"] = "application/json"
+        return payload
+
+    @staticmethod
+    def _extract_text(result: dict) -> str:
+        candidates = result.get("candidates") or [{}]
+        parts = (candidates[0].get("content") or {}).get("parts") or []
+        return "".join(part.get("text", "") for part in parts)
+
+    def _result_text(self, result: dict) -> LLMResponse:
+        text = self._extract_text(result)
+        if not text:
+            reason = (result.get("candidates") or [{}])[0].get("finishReason") \
+                or (result.get("promptFeedback") or {}).get("blockReason", "empty response")
+            # A blocked or empty answer will not change on retry
+            raise LLMProviderError(self.name, f"no text returned ({reason})", status=400)
+        usage = result.get("usageMetadata") or {}
+        return LLMResponse(
+            text,
+            prompt_tokens=usage.get("promptTokenCount"),
+            completion_tokens=usage.get("candidatesTokenCount"),
+        )
     
     def complete(self, prompt: str, system: str = "", temperature: float = 0.7) -> str:
-        if not self.client:
-            return "Error: Gemini client not initialized"
-        
+        payload = self._payload(prompt, system, temperature)
+        url = f"{self.base_url}/models/{self.model}:generateContent"
+
+        def attempt(timeout: float) -> str:
+            return self._result_text(self._post_json(url, self._headers(), payload, timeout))
+
         try:
-            full_prompt = f"{system}\n\n{prompt}" if system else prompt
-            response = self.client.generate_content(
-                full_prompt,
-                generation_config={
-                    "temperature": temperature,
-                    "max_output_tokens": 2000
-                }
-            )
-            return response.text
-        except Exception as e:
+            return get_scheduler(self.name).run(attempt, tokens=estimate_tokens(prompt + system))
+        except LLMProviderError as e:
             logger.error(f"Gemini error: {e}")
-            return f"Error: {str(e)}"
+            raise
+
+    async def complete_async(self, prompt: str, system: str = "", temperature: float = 0.7) -> str:
+        """Async version for parallel execution."""
+        payload = self._payload(prompt, system, temperature)
+        url = f"{self.base_url}/models/{self.model}:generateContent"
+
+        async def attempt(timeout: float) -> str:
+            return self._result_text(await self._post_json_async(url, self._headers(), payload, timeout))
+
+        try:
+            return await get_scheduler(self.name).run_async(attempt, tokens=estimate_tokens(prompt + system))
+        except LLMProviderError as e:
+            logger.error(f"Gemini async error: {e}")
+            raise
+
+    async def complete_stream(self, prompt: str, system: str = "", temperature: float = 0.7) -> AsyncGenerator[str, None]:
+        """Stream the completion as text deltas via server-sent events."""
+        payload = self._payload(prompt, system, temperature)
+        url = f"{self.base_url}/models/{self.model}:streamGenerateContent?alt=sse"
+        async for event in self._stream_sse_async(url, self._headers(), payload, estimate_tokens(prompt + system)):
+            delta = self._extract_text(event)
+            if delta:
+                yield delta
 
 
 class MistralProvider(LLMProvider):
     """Mistral.ai provider."""
+
+    name = "mistral"
     
     def __init__(self, api_key: str, model: str = "mistral-large-latest"):
         self.api_key = api_key
         self.model = model
         self.base_url = "https://api.mistral.ai/v1"
+
+    def _headers(self) -> dict:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+
+    def _payload(self, prompt: str, system: str, temperature: float) -> dict:
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": 2000
+        }
+        if self.json_mode:
+            payload["response_format"] = {"type": "json_object"}
+        return payload
     
     def complete(self, prompt: str, system: str = "", temperature: float = 0.7) -> str:
+        payload = self._payload(prompt, system, temperature)
+
+        def attempt(timeout: float) -> str:
+            result = self._post_json(f"{self.base_url}/chat/completions", self._headers(), payload, timeout)
+            return self._chat_response(result)
+
         try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            messages = []
-            if system:
-                messages.append({"role": "system", "content": system})
-            messages.append({"role": "user", "content": prompt})
-            
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers=headers,
-                json={
-                    "model": self.model,
-                    "messages": messages,
-                    "temperature": temperature,
-                    "max_tokens": 2000
-                },
-                timeout=60
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return result["choices"][0]["message"]["content"]
-            else:
-                logger.error(f"Mistral error: {response.status_code}")
-                return f"Error: {response.status_code}"
-        except Exception as e:
+            return get_scheduler(self.name).run(attempt, tokens=estimate_tokens(prompt + system))
+        except LLMProviderError as e:
             logger.error(f"Mistral error: {e}")
-            return f"Error: {str(e)}"
+            raise
     
     async def complete_async(self, prompt: str, system: str = "", temperature: float = 0.7) -> str:
         """Async version for parallel execution."""
+        payload = self._payload(prompt, system, temperature)
+
+        async def attempt(timeout: float) -> str:
+            result = await self._post_json_async(f"{self.base_url}/chat/completions", self._headers(), payload, timeout)
+            return self._chat_response(result)
+
         try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            messages = []
-            if system:
-                messages.append({"role": "system", "content": system})
-            messages.append({"role": "user", "content": prompt})
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.base_url}/chat/completions",
-                    headers=headers,
-                    json={
-                        "model": self.model,
-                        "messages": messages,
-                        "temperature": temperature,
-                        "max_tokens": 2000
-                    },
-                    timeout=aiohttp.ClientTimeout(total=60)
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        return result["choices"][0]["message"]["content"]
-                    else:
-                        logger.error(f"Mistral error: {response.status}")
-                        return f"Error: {response.status}"
-        except Exception as e:
+            return await get_scheduler(self.name).run_async(attempt, tokens=estimate_tokens(prompt + system))
+        except LLMProviderError as e:
             logger.error(f"Mistral async error: {e}")
-            return f"Error: {str(e)}"
+            raise
+
+
+    async def complete_stream(self, prompt: str, system: str = "", temperature: float = 0.7) -> AsyncGenerator[str, None]:
+        """Stream the completion as text deltas via server-sent events."""
+        payload = self._payload(prompt, system, temperature)
+        async for delta in self._stream_chat_async(f"{self.base_url}/chat/completions", self._headers(), payload):
+            yield delta
+
+
+def create_provider(provider_type: str, api_key: Optional[str] = None, model: Optional[str] = None) -> LLMProvider:
+    """
+    Build a provider instance from its type name.
+
+    ``provider_type="replay"`` serves recorded cassettes for ``model`` given as
+    "<provider>:<model>". Otherwise settings.LLM_REPLAY_MODE may wrap the real
+    provider to record or replay its traffic.
+    """
+    # Imported here: llm_replay builds on the provider classes in this module
+    from .llm_replay import ReplayProvider, get_cassette_store, wrap_for_replay_mode
+
+    if provider_type == "replay":
+        recorded_provider, _, recorded_model = (model or "").partition(":")
+        if not recorded_provider or not recorded_model:
+            raise ValueError('replay model must be "<provider>:<model>"')
+        return ReplayProvider(
+            recorded_provider, recorded_model, get_cassette_store(),
+            simulate_latency=settings.LLM_REPLAY_SIMULATE_LATENCY,
+        )
+
+    if provider_type == "openrouter":
+        if not model:
+            raise ValueError("model required for OpenRouter")
+        provider = OpenRouterProvider(api_key or "", model)
+    elif provider_type == "gemini":
+        provider = GeminiProvider(api_key or "", model or "gemini-1.5-flash")
+    elif provider_type == "mistral":
+        provider = MistralProvider(api_key or "", model or "mistral-large-latest")
+    else:
+        raise ValueError(f"Unknown provider: {provider_type}")
+    return wrap_for_replay_mode(provider)
 
 
 class LLMClient:
     """Unified LLM client for debate system."""
     
-    def __init__(self, provider_type: str, api_key: Optional[str] = None, model: Optional[str] = None, **kwargs):
+    def __init__(
+        self,
+        provider_type: str,
+        api_key: Optional[str] = None,
+        model: Optional[str] = None,
+        cache: Optional[LLMResponseCache] = None,
+        use_cache: Optional[bool] = None,
+        alternates: Optional[List[LLMProvider]] = None,
+        hedging: Optional[bool] = None,
+        json_mode: bool = False,
+        **kwargs
+    ):
         """
         Initialize LLM client.
         
         Args:
-            provider_type: "openrouter", "gemini", or "mistral"
+            provider_type: "openrouter", "gemini", "mistral" or "replay"
             api_key: API key for the provider
             model: Model identifier (required for openrouter)
+            cache: Response cache to use (defaults to the shared process cache)
+            use_cache: Enable response caching (defaults to settings.LLM_CACHE_ENABLED)
+            alternates: Providers a slow request may be hedged onto
+            hedging: Enable hedged requests (defaults to settings.LLM_HEDGING_ENABLED)
+            json_mode: Ask the provider for a JSON reply (if settings.LLM_JSON_MODE_ENABLED)
         """
-        if provider_type == "openrouter":
-            if not model:
-                raise ValueError("model required for OpenRouter")
-            self.provider = OpenRouterProvider(api_key or "", model)
-        elif provider_type == "gemini":
-            self.provider = GeminiProvider(api_key or "", model or "gemini-pro")
-        elif provider_type == "mistral":
-            self.provider = MistralProvider(api_key or "", model or "mistral-large-latest")
-        else:
-            raise ValueError(f"Unknown provider: {provider_type}")
+        self.provider = create_provider(provider_type, api_key, model)
+        if json_mode and settings.LLM_JSON_MODE_ENABLED:
+            self.provider.json_mode = True
+        self.alternates: List[LLMProvider] = list(alternates or [])
+        self.hedging = settings.LLM_HEDGING_ENABLED if hedging is None else hedging
+
+        if use_cache is None:
+            use_cache = settings.LLM_CACHE_ENABLED
+        self.cache = (cache or get_response_cache()) if use_cache else None
         
         self.call_count = 0
-        self.token_estimate = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.coalesced_calls = 0
+        self.hedges_fired = 0
+        self.hedges_won = 0
+        self.hedges_denied = 0
+        self.rerouted_calls = 0
+
+    def _cache_key(self, prompt: str, system: str, temperature: float) -> str:
+        return LLMResponseCache.make_key(self.provider.name, self.provider.model, system, prompt, temperature)
+
+    def _cache_lookup(self, key: str) -> Optional[str]:
+        cached = self.cache.get(key)
+        if cached is None:
+            self.cache_misses += 1
+        else:
+            self.cache_hits += 1
+            logger.info(f"LLM cache hit ({self.provider.name}/{self.provider.model})")
+        return cached
+
+    def _cache_store(self, key: str, response: str):
+        if response:
+            self.cache.set(key, response)
     
+    def _route(self) -> LLMProvider:
+        """
+        The provider to send the next request to: the agent's own model unless
+        its circuit is open, otherwise the first alternate whose circuit allows it.
+        """
+        for provider in [self.provider] + self.alternates:
+            if get_breaker(provider.name, provider.model).allow_request():
+                if provider is not self.provider:
+                    self.rerouted_calls += 1
+                    logger.warning(
+                        f"Circuit open for {self._latency_key(self.provider)}, routing to {self._latency_key(provider)}"
+                    )
+                return provider
+        raise LLMProviderError(self.provider.name, "circuit open for every candidate model", status=503)
+
     def complete(self, prompt: str, system: str = "", temperature: float = 0.7) -> str:
         """Get a text completion."""
+        key = None
+        if self.cache is not None:
+            key = self._cache_key(prompt, system, temperature)
+            cached = self._cache_lookup(key)
+            if cached is not None:
+                return cached
+
         try:
-            response = self.provider.complete(prompt, system, temperature)
+            provider = self._route()
+            breaker = get_breaker(provider.name, provider.model)
+            start = time.monotonic()
+            try:
+                response = provider.complete(prompt, system, temperature)
+            except Exception as e:
+                breaker.record_failure(e)
+                get_llm_metrics().record_error(provider.name, provider.model, e)
+                raise
+            breaker.record_success()
+            self._record_usage(provider, prompt, system, response, time.monotonic() - start)
             self.call_count += 1
-            self.token_estimate += len(prompt.split()) + len(response.split())
             logger.info(f"LLM call {self.call_count} succeeded")
-            return response
         except Exception as e:
             logger.error(f"LLM call failed: {e}")
             raise
+
+        if key is not None:
+            self._cache_store(key, response)
+        return response
     
     async def complete_async(self, prompt: str, system: str = "", temperature: float = 0.7) -> str:
-        """Get a text completion asynchronously."""
+        """
+        Get a text completion asynchronously.
+
+        Identical requests already in flight anywhere in the process are
+        joined rather than sent again (see SingleFlight).
+        """
+        key = self._cache_key(prompt, system, temperature)
+        if self.cache is not None:
+            cached = self._cache_lookup(key)
+            if cached is not None:
+                return cached
+
+        if not settings.LLM_SINGLE_FLIGHT_ENABLED:
+            return await self._complete_uncached_async(key, prompt, system, temperature)
+
+        response, coalesced = await single_flight.run(
+            key, lambda: self._complete_uncached_async(key, prompt, system, temperature)
+        )
+        if coalesced:
+            self.coalesced_calls += 1
+            logger.info(f"Joined in-flight LLM request ({self.provider.name}/{self.provider.model})")
+        return response
+
+    async def _complete_uncached_async(
+        self,
+        key: str,
+        prompt: str,
+        system: str,
+        temperature: float,
+        provider: Optional[LLMProvider] = None,
+    ) -> str:
         try:
-            # For Gemini, we don't have async yet, so use sync in executor
-            if isinstance(self.provider, GeminiProvider):
-                loop = asyncio.get_event_loop()
-                response = await loop.run_in_executor(
-                    None, 
-                    self.provider.complete, 
-                    prompt, 
-                    system, 
-                    temperature
-                )
+            if provider is None:
+                provider = self._route()
+            alternates = [p for p in self.alternates + [self.provider] if p is not provider]
+            if self.hedging and alternates:
+                response = await self._complete_hedged_async(provider, alternates, prompt, system, temperature)
             else:
-                response = await self.provider.complete_async(prompt, system, temperature)
+                response = await self._timed_complete_async(provider, prompt, system, temperature)
             
             self.call_count += 1
-            self.token_estimate += len(prompt.split()) + len(response.split())
             logger.info(f"LLM call {self.call_count} succeeded")
-            return response
         except Exception as e:
             logger.error(f"LLM async call failed: {e}")
             raise
+
+        if self.cache is not None:
+            self._cache_store(key, response)
+        return response
     
+    @staticmethod
+    def _latency_key(provider: LLMProvider) -> str:
+        return f"{provider.name}/{provider.model}"
+
+    async def _timed_complete_async(self, provider: LLMProvider, prompt: str, system: str, temperature: float) -> str:
+        """Call one provider, feeding its latency tracker and circuit breaker."""
+        breaker = get_breaker(provider.name, provider.model)
+        start = time.monotonic()
+        try:
+            response = await provider.complete_async(prompt, system, temperature)
+        except asyncio.CancelledError:
+            # A cancelled (hedged-away) call still tells us the model took at least this long
+            latency_tracker.record(self._latency_key(provider), time.monotonic() - start)
+            breaker.record_cancelled()
+            raise
+        except Exception as e:
+            breaker.record_failure(e)
+            get_llm_metrics().record_error(provider.name, provider.model, e)
+            raise
+        latency = time.monotonic() - start
+        latency_tracker.record(self._latency_key(provider), latency)
+        breaker.record_success()
+        self._record_usage(provider, prompt, system, response, latency)
+        return response
+
+    def _record_usage(self, provider: LLMProvider, prompt: str, system: str, response: str, latency: float):
+        """Count tokens for a completed call, preferring the provider-reported usage."""
+        reported = isinstance(response, LLMResponse) and response.usage_reported
+        if reported:
+            prompt_tokens, completion_tokens = response.prompt_tokens, response.completion_tokens
+        else:
+            prompt_tokens, completion_tokens = count_tokens(system) + count_tokens(prompt), count_tokens(response)
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        add_usage(prompt_tokens, completion_tokens)
+        get_llm_metrics().record_success(
+            provider.name, provider.model, latency, prompt_tokens, completion_tokens, usage_reported=reported
+        )
+
+    def _expected_latency(self, provider: LLMProvider) -> float:
+        observed = latency_tracker.percentile(
+            self._latency_key(provider), settings.LLM_HEDGE_PERCENTILE, settings.LLM_HEDGE_MIN_SAMPLES
+        )
+        return observed if observed is not None else settings.LLM_HEDGE_DEFAULT_DELAY_SECONDS
+
+    def hedge_delay(self, provider: Optional[LLMProvider] = None) -> float:
+        """Seconds to wait on a provider before hedging: its observed latency percentile."""
+        return self._expected_latency(provider or self.provider)
+
+    def _pick_alternate(self, alternates: List[LLMProvider]) -> Optional[LLMProvider]:
+        """The healthy alternate with the lowest observed latency (unmeasured ones count as the default delay)."""
+        for provider in sorted(alternates, key=self._expected_latency):
+            if get_breaker(provider.name, provider.model).allow_request():
+                return provider
+        return None
+
+    async def _complete_hedged_async(
+        self,
+        primary_provider: LLMProvider,
+        alternates: List[LLMProvider],
+        prompt: str,
+        system: str,
+        temperature: float,
+    ) -> str:
+        """
+        Send the request to the primary provider; if it has not answered within
+        hedge_delay(), race a backup on an alternate and return the first success.
+        The losing request is cancelled.
+        """
+        primary = asyncio.ensure_future(self._timed_complete_async(primary_provider, prompt, system, temperature))
+        tasks = {primary: primary_provider}
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=self.hedge_delay(primary_provider))
+            if done:
+                return primary.result()
+
+            if not hedge_budget.try_acquire():
+                self.hedges_denied += 1
+                return await primary
+
+            alternate = self._pick_alternate(alternates)
+            if alternate is None:
+                return await primary
+            self.hedges_fired += 1
+            logger.info(
+                f"Hedging slow {self._latency_key(primary_provider)} request onto {self._latency_key(alternate)}"
+            )
+            backup = asyncio.ensure_future(self._timed_complete_async(alternate, prompt, system, temperature))
+            tasks[backup] = alternate
+
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self.hedges_won += 1
+                        return task.result()
+                    error = task.exception()
+                    logger.warning(f"Hedged request to {self._latency_key(tasks[task])} failed: {error}")
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def complete_stream(self, prompt: str, system: str = "", temperature: float = 0.7) -> AsyncGenerator[str, None]:
+        """
+        Stream a completion as text chunks.
+
+        Identical concurrent streams share one upstream call: later callers
+        get the chunks produced so far, then the rest as they arrive. Falls
+        back to a single chunk from a regular completion when the provider
+        cannot stream or the stream fails before producing any text.
+        """
+        key = self._cache_key(prompt, system, temperature)
+        if self.cache is not None:
+            cached = self._cache_lookup(key)
+            if cached is not None:
+                yield cached
+                return
+
+        if not settings.LLM_SINGLE_FLIGHT_ENABLED:
+            async for delta in self._complete_stream_uncached(key, prompt, system, temperature):
+                yield delta
+            return
+
+        def joined():
+            self.coalesced_calls += 1
+            logger.info(f"Joined in-flight LLM stream ({self.provider.name}/{self.provider.model})")
+
+        async for delta in stream_single_flight.subscribe(
+            key, lambda: self._complete_stream_uncached(key, prompt, system, temperature), on_coalesced=joined
+        ):
+            yield delta
+
+    async def _complete_stream_uncached(
+        self, key: str, prompt: str, system: str, temperature: float
+    ) -> AsyncGenerator[str, None]:
+        provider = self._route()
+        stream = getattr(provider, "complete_stream", None)
+        if stream is None:
+            yield await self._complete_uncached_async(key, prompt, system, temperature, provider=provider)
+            return
+
+        breaker = get_breaker(provider.name, provider.model)
+        start = time.monotonic()
+        parts = []
+        try:
+            async for delta in stream(prompt, system, temperature):
+                parts.append(delta)
+                yield delta
+        except (LLMProviderError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            breaker.record_failure(e)
+            get_llm_metrics().record_error(provider.name, provider.model, e)
+            if parts:
+                raise LLMProviderError(provider.name, f"stream interrupted: {e}")
+            logger.warning(f"LLM stream failed before first token ({e}), retrying without streaming")
+            yield await self._complete_uncached_async(key, prompt, system, temperature)
+            return
+        except Exception as e:
+            breaker.record_failure(e)
+            get_llm_metrics().record_error(provider.name, provider.model, e)
+            raise
+        except BaseException:
+            breaker.record_cancelled()
+            raise
+
+        breaker.record_success()
+        response = "".join(parts)
+        self._record_usage(provider, prompt, system, response, time.monotonic() - start)
+        self.call_count += 1
+        logger.info(f"LLM call {self.call_count} succeeded (streamed)")
+        if self.cache is not None:
+            self._cache_store(key, response)
+
     def get_stats(self) -> dict:
         """Get usage statistics."""
         return {
             "call_count": self.call_count,
-            "estimated_tokens": self.token_estimate
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "coalesced_calls": self.coalesced_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.prompt_tokens + self.completion_tokens,
+            "connection_pool": session_manager.get_stats(self.provider.name),
+            "single_flight": single_flight.get_stats(),
+            "stream_single_flight": stream_single_flight.get_stats(),
+            "scheduler": get_scheduler(self.provider.name).get_stats(),
+            "hedging": {
+                "enabled": bool(self.hedging and self.alternates),
+                "alternates": [self._latency_key(p) for p in self.alternates],
+                "hedge_after_seconds": round(self.hedge_delay(), 3),
+                "fired": self.hedges_fired,
+                "won": self.hedges_won,
+                "denied": self.hedges_denied,
+                "budget": hedge_budget.get_stats(),
+            },
+            "rerouted_calls": self.rerouted_calls,
+            "circuit": get_breaker(self.provider.name, self.provider.model).get_stats(),
         }
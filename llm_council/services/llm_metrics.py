@@ -0,0 +1,212 @@
+"""
+Process-wide LLM call metrics.
+Aggregates token usage (provider-reported where available, tokenizer
+estimates otherwise), latency percentiles, error rates and throughput per
+provider/model so the council's capacity can be planned from real numbers.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:  # not installed, or encoding data unavailable offline
+    _ENCODING = None
+
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (250, 500, 1000, 2000, 5000, 10000, 20000, 30000, 60000)
+
+
+def count_tokens(text: str) -> int:
+    """Token count from tiktoken when installed, else ~4 characters per token."""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return max(1, len(text) // 4)
+
+
+# Usage accumulator for the current debate round (or any other unit of work)
+_usage_scope: ContextVar[Optional[Dict[str, int]]] = ContextVar("llm_usage_scope", default=None)
+
+
+@contextmanager
+def track_usage():
+    """
+    Count the LLM calls and tokens made inside the block, including by tasks
+    it spawns (they inherit the context).
+
+    Usage:
+        with track_usage() as usage:
+            await run_round()
+        usage["prompt_tokens"], usage["completion_tokens"]
+    """
+    usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    token = _usage_scope.set(usage)
+    try:
+        yield usage
+    finally:
+        _usage_scope.reset(token)
+
+
+def add_usage(prompt_tokens: int, completion_tokens: int):
+    """Add a completed call to the active track_usage() scope, if any."""
+    usage = _usage_scope.get()
+    if usage is not None:
+        usage["calls"] += 1
+        usage["prompt_tokens"] += prompt_tokens
+        usage["completion_tokens"] += completion_tokens
+
+
+class LLMResponse(str):
+    """
+    Completion text that also carries the provider-reported token usage.
+
+    Subclasses ``str`` so every existing caller keeps working unchanged.
+    """
+
+    prompt_tokens: Optional[int]
+    completion_tokens: Optional[int]
+
+    def __new__(cls, text: str, prompt_tokens: Optional[int] = None, completion_tokens: Optional[int] = None):
+        response = super().__new__(cls, text)
+        response.prompt_tokens = prompt_tokens
+        response.completion_tokens = completion_tokens
+        return response
+
+    @property
+    def usage_reported(self) -> bool:
+        return self.prompt_tokens is not None and self.completion_tokens is not None
+
+
+class ModelMetrics:
+    """Counters and a latency window for one provider/model."""
+
+    def __init__(self, window: int = 1000):
+        self.calls = 0
+        self.errors = 0
+        self.error_types: Dict[str, int] = {}
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.reported_usage_calls = 0
+        self.generation_seconds = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self._latencies = deque(maxlen=window)
+
+    def _percentile(self, ordered, pct: float) -> Optional[float]:
+        if not ordered:
+            return None
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return round(ordered[index] * 1000, 1)
+
+    def snapshot(self) -> Dict:
+        ordered = sorted(self._latencies)
+        total = self.calls + self.errors
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "error_rate": round(self.errors / total, 4) if total else 0.0,
+            "error_types": dict(self.error_types),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "usage_reported_ratio": round(self.reported_usage_calls / self.calls, 3) if self.calls else 0.0,
+            "tokens_per_second": (
+                round(self.completion_tokens / self.generation_seconds, 1) if self.generation_seconds else 0.0
+            ),
+            "latency_ms": {
+                "p50": self._percentile(ordered, 50),
+                "p95": self._percentile(ordered, 95),
+                "p99": self._percentile(ordered, 99),
+                "histogram": {
+                    **{f"le_{bound}": count for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets)},
+                    "inf": self.buckets[-1],
+                },
+            },
+        }
+
+
+class LLMMetrics:
+    """Thread-safe registry of ModelMetrics keyed by "provider/model"."""
+
+    def __init__(self):
+        self._models: Dict[str, ModelMetrics] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def _model(self, provider: str, model: str) -> ModelMetrics:
+        key = f"{provider}/{model}"
+        if key not in self._models:
+            self._models[key] = ModelMetrics()
+        return self._models[key]
+
+    def record_success(
+        self,
+        provider: str,
+        model: str,
+        latency: float,
+        prompt_tokens: int,
+        completion_tokens: int,
+        usage_reported: bool = False,
+    ):
+        with self._lock:
+            metrics = self._model(provider, model)
+            metrics.calls += 1
+            metrics.prompt_tokens += prompt_tokens
+            metrics.completion_tokens += completion_tokens
+            metrics.generation_seconds += latency
+            if usage_reported:
+                metrics.reported_usage_calls += 1
+            metrics._latencies.append(latency)
+            latency_ms = latency * 1000
+            for index, bound in enumerate(LATENCY_BUCKETS_MS):
+                if latency_ms <= bound:
+                    metrics.buckets[index] += 1
+                    break
+            else:
+                metrics.buckets[-1] += 1
+
+    def record_error(self, provider: str, model: str, error: Exception):
+        status = getattr(error, "status", None)
+        kind = f"http_{status}" if status else type(error).__name__
+        with self._lock:
+            metrics = self._model(provider, model)
+            metrics.errors += 1
+            metrics.error_types[kind] = metrics.error_types.get(kind, 0) + 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            models = {key: metrics.snapshot() for key, metrics in self._models.items()}
+        return {
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "tokenizer": "tiktoken/cl100k_base" if _ENCODING is not None else "chars/4",
+            "totals": {
+                "calls": sum(m["calls"] for m in models.values()),
+                "errors": sum(m["errors"] for m in models.values()),
+                "prompt_tokens": sum(m["prompt_tokens"] for m in models.values()),
+                "completion_tokens": sum(m["completion_tokens"] for m in models.values()),
+            },
+            "models": models,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._models.clear()
+            self.started_at = time.time()
+
+
+# Global metrics instance
+_llm_metrics = None
+
+
+def get_llm_metrics() -> LLMMetrics:
+    """Get or create the process-wide LLM metrics registry."""
+    global _llm_metrics
+    if _llm_metrics is None:
+        _llm_metrics = LLMMetrics()
+    return _llm_metrics
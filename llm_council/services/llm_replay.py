@@ -0,0 +1,210 @@
+"""
+Record/replay ("cassette") LLM providers.
+In record mode every real completion is saved to a local cassette store keyed
+by a hash of the request; in replay mode completions are served from that
+store with no network access, optionally re-enacting the recorded latency.
+This makes debate runs deterministic for regression tests and lets the
+pipeline's own overhead be profiled without live API keys.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import AsyncGenerator, Dict, Optional
+
+from ..core.config import settings
+from .llm_cache import LLMResponseCache
+from .llm_client import LLMProvider, LLMProviderError
+from .llm_metrics import LLMResponse
+
+logger = logging.getLogger(__name__)
+
+# Replayed streams are cut into chunks of this many characters
+REPLAY_CHUNK_CHARS = 24
+
+
+class CassetteStore:
+    """One JSON file per recorded request under a directory."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._path(key), "r") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            logger.error(f"Unreadable cassette {key}: {e}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: Dict):
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{self._path(key)}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(entry, f, indent=2)
+            os.replace(tmp_path, self._path(key))
+            self.recorded += 1
+
+    def get_stats(self) -> Dict:
+        return {
+            "directory": self.directory,
+            "hits": self.hits,
+            "misses": self.misses,
+            "recorded": self.recorded,
+        }
+
+
+def _cassette_key(provider: str, model: str, system: str, prompt: str, temperature: float) -> str:
+    return LLMResponseCache.make_key(provider, model, system, prompt, temperature)
+
+
+class RecordingProvider(LLMProvider):
+    """Wraps a real provider and saves every successful completion to the cassette store."""
+
+    def __init__(self, inner: LLMProvider, store: CassetteStore):
+        self.inner = inner
+        self.store = store
+        self.name = inner.name
+        self.model = inner.model
+
+    @property
+    def json_mode(self) -> bool:
+        return self.inner.json_mode
+
+    @json_mode.setter
+    def json_mode(self, enabled: bool):
+        self.inner.json_mode = enabled
+
+    def _record(self, prompt: str, system: str, temperature: float, response: str, latency: float):
+        usage = {}
+        if isinstance(response, LLMResponse) and response.usage_reported:
+            usage = {"prompt_tokens": response.prompt_tokens, "completion_tokens": response.completion_tokens}
+        self.store.put(
+            _cassette_key(self.inner.name, self.inner.model, system, prompt, temperature),
+            {
+                "provider": self.inner.name,
+                "model": self.inner.model,
+                "request": {"system": system, "prompt": prompt, "temperature": temperature},
+                "response": str(response),
+                "usage": usage,
+                "latency_seconds": round(latency, 3),
+                "recorded_at": time.time(),
+            },
+        )
+
+    def complete(self, prompt: str, system: str = "", temperature: float = 0.7) -> str:
+        start = time.monotonic()
+        response = self.inner.complete(prompt, system, temperature)
+        self._record(prompt, system, temperature, response, time.monotonic() - start)
+        return response
+
+    async def complete_async(self, prompt: str, system: str = "", temperature: float = 0.7) -> str:
+        start = time.monotonic()
+        response = await self.inner.complete_async(prompt, system, temperature)
+        self._record(prompt, system, temperature, response, time.monotonic() - start)
+        return response
+
+    async def complete_stream(self, prompt: str, system: str = "", temperature: float = 0.7) -> AsyncGenerator[str, None]:
+        start = time.monotonic()
+        stream = getattr(self.inner, "complete_stream", None)
+        if stream is None:
+            yield await self.complete_async(prompt, system, temperature)
+            return
+        parts = []
+        async for delta in stream(prompt, system, temperature):
+            parts.append(delta)
+            yield delta
+        self._record(prompt, system, temperature, "".join(parts), time.monotonic() - start)
+
+
+class ReplayProvider(LLMProvider):
+    """Serves completions recorded for ``recorded_provider``/``model``; never touches the network."""
+
+    name = "replay"
+
+    def __init__(self, recorded_provider: str, model: str, store: CassetteStore, simulate_latency: bool = False):
+        self.recorded_provider = recorded_provider
+        self.model = model
+        self.store = store
+        self.simulate_latency = simulate_latency
+
+    def _lookup(self, prompt: str, system: str, temperature: float) -> Dict:
+        entry = self.store.get(_cassette_key(self.recorded_provider, self.model, system, prompt, temperature))
+        if entry is None:
+            # 404 is not retryable, so the caller falls back immediately
+            raise LLMProviderError(
+                self.name, f"no cassette recorded for {self.recorded_provider}/{self.model}", status=404
+            )
+        return entry
+
+    @staticmethod
+    def _response(entry: Dict) -> LLMResponse:
+        usage = entry.get("usage") or {}
+        return LLMResponse(
+            entry["response"],
+            prompt_tokens=usage.get("prompt_tokens"),
+            completion_tokens=usage.get("completion_tokens"),
+        )
+
+    def complete(self, prompt: str, system: str = "", temperature: float = 0.7) -> str:
+        entry = self._lookup(prompt, system, temperature)
+        if self.simulate_latency:
+            time.sleep(entry.get("latency_seconds", 0))
+        return self._response(entry)
+
+    async def complete_async(self, prompt: str, system: str = "", temperature: float = 0.7) -> str:
+        entry = self._lookup(prompt, system, temperature)
+        if self.simulate_latency:
+            await asyncio.sleep(entry.get("latency_seconds", 0))
+        return self._response(entry)
+
+    async def complete_stream(self, prompt: str, system: str = "", temperature: float = 0.7) -> AsyncGenerator[str, None]:
+        entry = self._lookup(prompt, system, temperature)
+        text = entry["response"]
+        chunks = [text[i:i + REPLAY_CHUNK_CHARS] for i in range(0, len(text), REPLAY_CHUNK_CHARS)] or [""]
+        delay = entry.get("latency_seconds", 0) / len(chunks) if self.simulate_latency else 0
+        for chunk in chunks:
+            if delay:
+                await asyncio.sleep(delay)
+            yield chunk
+
+
+# Global cassette store
+_cassette_store = None
+
+
+def get_cassette_store() -> CassetteStore:
+    """Get or create the process-wide cassette store."""
+    global _cassette_store
+    if _cassette_store is None:
+        _cassette_store = CassetteStore(settings.LLM_CASSETTE_DIR)
+    return _cassette_store
+
+
+def wrap_for_replay_mode(provider: LLMProvider) -> LLMProvider:
+    """Apply settings.LLM_REPLAY_MODE ("off", "record" or "replay") to a freshly built provider."""
+    mode = settings.LLM_REPLAY_MODE
+    if mode == "record":
+        return RecordingProvider(provider, get_cassette_store())
+    if mode == "replay":
+        return ReplayProvider(
+            provider.name, provider.model, get_cassette_store(), simulate_latency=settings.LLM_REPLAY_SIMULATE_LATENCY
+        )
+    return provider
@@ -0,0 +1,261 @@
+"""
+Structured (JSON) output for every agent.
+One place to turn an LLM reply into a validated Pydantic model: replies are
+requested in the provider's JSON mode where supported (see LLMClient
+``json_mode``), near-miss JSON (fences, trailing commas, single quotes, bare
+keys, truncation) is repaired locally instead of paying for another
+round-trip, and parse outcomes and retries are counted per agent.
+"""
+
+import json
+import logging
+import re
+import threading
+from typing import Any, Dict, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T", bound=BaseModel)
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*(.*?)(?:```|$)", re.DOTALL)
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+class StructuredOutputError(ValueError):
+    """Raised when a reply cannot be parsed or validated, even after repair."""
+
+    def __init__(self, message: str, raw: str = ""):
+        super().__init__(message)
+        self.raw = raw
+
+
+def extract_json(text: str) -> str:
+    """The JSON object in a reply, without markdown fences or surrounding prose."""
+    text = (text or "").strip()
+    fenced = _FENCE.search(text)
+    if fenced and "{" in fenced.group(1):
+        text = fenced.group(1).strip()
+    start = text.find("{")
+    if start == -1:
+        return text
+    end = text.rfind("}")
+    # No closing brace after the start means the reply was cut off: keep the rest
+    return text[start:end + 1] if end > start else text[start:]
+
+
+def repair_json(text: str) -> str:
+    """
+    Rewrite near-miss JSON into valid JSON in a single string-aware pass:
+    single-quoted strings, bare keys, Python literals, comments, raw newlines
+    in strings, trailing commas and unclosed strings/brackets (truncation).
+    """
+    out = []
+    stack = []
+    quote = None  # quote character of the string being read, if any
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if quote:
+            if ch == "\\" and i + 1 < len(text):
+                nxt = text[i + 1]
+                # \' is not a JSON escape
+                out.append(nxt if nxt == "'" else ch + nxt)
+                i += 2
+                continue
+            if ch == quote:
+                out.append('"')
+                quote = None
+            elif ch == '"':
+                out.append('\\"')
+            elif ch == "\n":
+                out.append("\\n")
+            elif ch in "\r\t":
+                out.append(" ")
+            elif ord(ch) >= 0x20:
+                out.append(ch)
+            i += 1
+            continue
+
+        if ch in "\"'":
+            quote = ch
+            out.append('"')
+        elif text.startswith("//", i):
+            newline = text.find("\n", i)
+            i = len(text) if newline == -1 else newline
+            continue
+        elif text.startswith("/*", i):
+            close = text.find("*/", i + 2)
+            i = len(text) if close == -1 else close + 2
+            continue
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            out.append(ch)
+        elif ch in "}]":
+            _strip_trailing_comma(out)
+            if stack:
+                stack.pop()
+            out.append(ch)
+        elif ch.isalpha() or ch == "_":
+            match = re.match(r"[A-Za-z_][A-Za-z0-9_]*", text[i:])
+            word = match.group(0)
+            rest = text[i + len(word):].lstrip()
+            if rest.startswith(":"):
+                out.append(json.dumps(word))
+            else:
+                out.append(_PY_LITERALS.get(word, word))
+            i += len(word)
+            continue
+        elif ord(ch) >= 0x20 or ch in "\n":
+            out.append(ch)
+        i += 1
+
+    if quote:
+        out.append('"')
+    _strip_trailing_comma(out)
+    if "".join(out).rstrip().endswith(":"):
+        out.append(" null")
+    while stack:
+        out.append(stack.pop())
+    return "".join(out)
+
+
+def _strip_trailing_comma(out: list):
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ",":
+        out.pop()
+
+
+def parse_json(text: str) -> Tuple[Any, bool]:
+    """
+    Parse a reply as JSON, repairing it locally if needed.
+
+    Returns:
+        Tuple of (parsed data, whether a repair was needed)
+
+    Raises:
+        json.JSONDecodeError: if the reply is not JSON even after repair
+    """
+    candidate = extract_json(text)
+    try:
+        return json.loads(candidate), False
+    except json.JSONDecodeError:
+        pass
+    return json.loads(repair_json(candidate)), True
+
+
+class StructuredOutputStats:
+    """Per-agent counts of clean, repaired and failed parses, and of LLM retries."""
+
+    OUTCOMES = ("clean", "repaired", "failed")
+
+    def __init__(self):
+        self._agents: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _counts(self, agent: str) -> Dict[str, int]:
+        if agent not in self._agents:
+            self._agents[agent] = {"clean": 0, "repaired": 0, "failed": 0, "retries": 0}
+        return self._agents[agent]
+
+    def record(self, agent: str, outcome: str):
+        with self._lock:
+            self._counts(agent)[outcome] += 1
+
+    def record_retry(self, agent: str):
+        with self._lock:
+            self._counts(agent)["retries"] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            agents = {agent: dict(counts) for agent, counts in self._agents.items()}
+        for counts in agents.values():
+            replies = sum(counts[outcome] for outcome in self.OUTCOMES)
+            counts["replies"] = replies
+            counts["parse_failure_rate"] = round(counts["failed"] / replies, 4) if replies else 0.0
+            counts["repair_rate"] = round(counts["repaired"] / replies, 4) if replies else 0.0
+            counts["retry_rate"] = round(counts["retries"] / replies, 4) if replies else 0.0
+        return agents
+
+    def reset(self):
+        with self._lock:
+            self._agents.clear()
+
+
+# Global stats instance
+_structured_output_stats = None
+
+
+def get_structured_output_stats() -> StructuredOutputStats:
+    """Get or create the process-wide structured output stats."""
+    global _structured_output_stats
+    if _structured_output_stats is None:
+        _structured_output_stats = StructuredOutputStats()
+    return _structured_output_stats
+
+
+def parse_structured(text: str, schema: Type[T], agent: Optional[str] = None) -> T:
+    """
+    Parse and validate a reply against a Pydantic schema.
+
+    Args:
+        text: Raw LLM reply
+        schema: Pydantic model the reply must satisfy
+        agent: Agent name to attribute the outcome to in the stats
+
+    Raises:
+        StructuredOutputError: if the reply is not valid even after local repair
+    """
+    stats = get_structured_output_stats()
+    try:
+        data, repaired = parse_json(text)
+        result = schema.model_validate(data)
+    except (json.JSONDecodeError, ValidationError) as e:
+        if agent:
+            stats.record(agent, "failed")
+        raise StructuredOutputError(f"{schema.__name__}: {e}", raw=text) from e
+    if agent:
+        stats.record(agent, "repaired" if repaired else "clean")
+        if repaired:
+            logger.info(f"Repaired malformed JSON from {agent} locally")
+    return result
+
+
+def retry_prompt(prompt: str, error: Exception) -> str:
+    """The prompt for a re-ask after an unusable reply (also avoids a cached repeat)."""
+    return (
+        f"{prompt}\n\nYour previous reply could not be used ({str(error)[:200]}). "
+        "Reply with the JSON object only, exactly matching the requested fields."
+    )
+
+
+def complete_structured(
+    llm,
+    prompt: str,
+    schema: Type[T],
+    agent: str,
+    system: str = "",
+    temperature: float = 0.7,
+    max_retries: int = 1,
+) -> T:
+    """
+    Complete a prompt and return the validated reply, re-asking the LLM only
+    when local repair cannot save it.
+
+    Raises:
+        StructuredOutputError: if every attempt is unusable
+    """
+    request = prompt
+    for attempt in range(max_retries + 1):
+        response = llm.complete(request, system=system, temperature=temperature)
+        try:
+            return parse_structured(response, schema, agent=agent)
+        except StructuredOutputError as e:
+            if attempt == max_retries:
+                raise
+            get_structured_output_stats().record_retry(agent)
+            logger.warning(f"{agent} reply unusable, asking again: {e}")
+            request = retry_prompt(prompt, e)
+
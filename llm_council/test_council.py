@@ -44,23 +44,23 @@ async def test_council(symbol: str = "AAPL"):
         print("\n📋 DETAILED AGENT ARGUMENTS:")
         print("-" * 70)
         for arg in result["agent_arguments"]:
-            print(f"\n{arg.agent_name} ({arg.confidence.value}):")
-            print(f"Thesis: {arg.thesis}")
+            print(f"\n{arg['agent_name']} ({arg['confidence']}):")
+            print(f"Thesis: {arg['thesis']}")
             print(f"Supporting Points:")
-            for i, point in enumerate(arg.supporting_points, 1):
+            for i, point in enumerate(arg['supporting_points'], 1):
                 print(f"  {i}. {point}")
         
         print("\n\n✨ CONSENSUS POINTS:")
         print("-" * 70)
         for cp in result["consensus_points"]:
-            print(f"✓ {cp.statement}")
-            print(f"  Supporting: {', '.join(cp.supporting_agents)}")
+            print(f"✓ {cp['statement']}")
+            print(f"  Supporting: {', '.join(cp['supporting_agents'])}")
         
         print("\n\n⚔️ DISAGREEMENTS:")
         print("-" * 70)
         for dp in result["disagreement_points"]:
-            print(f"Topic: {dp.topic}")
-            for view, opinion in dp.competing_views.items():
+            print(f"Topic: {dp['topic']}")
+            for view, opinion in dp['competing_views'].items():
                 print(f"  - {view}: {opinion}")
         
         print("\n\n📊 MARKET CONTEXT:")
@@ -73,38 +73,8 @@ async def test_council(symbol: str = "AAPL"):
         # Save to file
         output_file = Path(__file__).parent / f"debate_output_{symbol}.json"
         with open(output_file, "w") as f:
-            # Convert Pydantic models to dict for JSON serialization
-            output_data = {
-                "symbol": result["symbol"],
-                "timestamp": result["timestamp"].isoformat(),
-                "agent_arguments": [
-                    {
-                        "agent_name": arg.agent_name,
-                        "thesis": arg.thesis,
-                        "supporting_points": arg.supporting_points,
-                        "confidence": arg.confidence.value,
-                        "references": arg.references
-                    }
-                    for arg in result["agent_arguments"]
-                ],
-                "consensus_points": [
-                    {
-                        "statement": cp.statement,
-                        "supporting_agents": cp.supporting_agents,
-                        "evidence_strength": cp.evidence_strength.value
-                    }
-                    for cp in result["consensus_points"]
-                ],
-                "disagreement_points": [
-                    {
-                        "topic": dp.topic,
-                        "competing_views": dp.competing_views
-                    }
-                    for dp in result["disagreement_points"]
-                ],
-                "judge_summary": result["judge_summary"],
-                "market_context": result["market_context"]
-            }
+            # The council result is already JSON-ready
+            output_data = result
             json.dump(output_data, f, indent=2)
         
         print(f"\n💾 Full results saved to: {output_file}")
@@ -4,10 +4,11 @@ from fastapi.responses import StreamingResponse, Response
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional, AsyncGenerator
 import asyncio
+import copy
 import logging
 import json
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 from uuid import uuid4
 
 # Import agents
@@ -20,16 +21,39 @@ from agents.sentiment_agent import SentimentAnalysisAgent
 from agents.compliance_agent import ComplianceAgent
 from agents.shariah_compliance_agent import ShariahComplianceAgent
 from agents.calling_agent import CallingAgent
+from agents.fused_analysis_agent import FusedAnalysisAgent
 
 # Import LLM Council
-from llm_council.services.debate_engine import get_council_analysis, get_council_analysis_stream
+from llm_council.core.config import settings
+from llm_council.services.debate_engine import (
+    build_provisional_result,
+    get_council_analysis,
+    get_council_analysis_stream,
+    get_debate_engine,
+    reload_debate_engine,
+)
+from llm_council.services.llm_client import (
+    PRIORITY_BACKGROUND,
+    close_http_sessions,
+    get_breaker_stats,
+    get_scheduler_stats,
+    llm_priority,
+)
+from llm_council.services.llm_cache import flush_response_cache
+from llm_council.services.llm_metrics import get_llm_metrics
+from llm_council.services.structured_output import get_structured_output_stats
 
 # Import services
 from services.economic_calendar import EconomicCalendarService
 from services.trade_history import get_trade_history_service
 from services.market_metrics import get_market_metrics_service
 from services.asset_validator import validate_asset_symbol, AssetValidationError
-from services.self_improvement import SelfImprovementService
+from services.self_improvement import get_self_improvement_service
+from services.analysis_cache import SYMBOL_TIER_KEYS, AnalysisCache
+from services.analysis_prefetch import AnalysisPrefetcher
+from services.agent_pipeline import AgentPipeline
+from services.executors import POOL_AGENT, POOL_MARKET_DATA, get_executor_stats, run_in_pool, shutdown_executors
+from services.loop_monitor import get_loop_monitor
 from services.voice_service import (
     generate_speech,
     generate_speech_stream,
@@ -45,27 +69,17 @@ logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Multi-Agent Trading Psychology API")
 
-# Simple in-memory cache
-ANALYSIS_CACHE = {}
-CACHE_TTL = timedelta(minutes=10)
-
-# Initialize Self-Improvement Service
-self_improvement_service = SelfImprovementService()
-
-def get_cached_analysis(symbol: str) -> Optional[dict]:
-    if symbol in ANALYSIS_CACHE:
-        entry = ANALYSIS_CACHE[symbol]
-        if datetime.utcnow() - entry['timestamp'] < CACHE_TTL:
-            return entry['data']
-        else:
-            del ANALYSIS_CACHE[symbol]
-    return None
+# Two-tier analysis cache: shared per symbol, personal per (symbol, user)
+analysis_cache = AnalysisCache(
+    symbol_ttl_seconds=settings.ANALYSIS_CACHE_SYMBOL_TTL_SECONDS,
+    user_ttl_seconds=settings.ANALYSIS_CACHE_USER_TTL_SECONDS,
+    stale_seconds=settings.ANALYSIS_CACHE_STALE_SECONDS,
+    max_entries=settings.ANALYSIS_CACHE_MAX_ENTRIES,
+    max_bytes=settings.ANALYSIS_CACHE_MAX_BYTES,
+)
 
-def set_cached_analysis(symbol: str, data: dict):
-    ANALYSIS_CACHE[symbol] = {
-        'timestamp': datetime.utcnow(),
-        'data': data
-    }
+# Initialize Self-Improvement Service (shared with the debate engine)
+self_improvement_service = get_self_improvement_service()
 
 # Add CORS middleware to allow frontend requests
 app.add_middleware(
@@ -77,12 +91,67 @@ app.add_middleware(
 )
 
 
+@app.on_event("startup")
+def warm_llm_council():
+    """Build the shared debate engine up front so the first request pays no setup cost."""
+    try:
+        get_debate_engine()
+    except ValueError as e:
+        logger.warning(f"LLM council not initialized at startup: {e}")
+
+
+@app.on_event("startup")
+async def start_loop_monitor():
+    """Watch the event loop for stalls and name the code that caused them."""
+    if settings.LOOP_MONITOR_ENABLED:
+        get_loop_monitor().start()
+
+
+@app.on_event("startup")
+async def start_analysis_prefetch():
+    """Keep watchlist and scheduled-call analyses warm (needs an LLM council)."""
+    if not settings.ANALYSIS_PREFETCH_ENABLED:
+        return
+    try:
+        get_debate_engine()
+    except ValueError:
+        logger.info("Analysis prefetch disabled: no LLM provider configured")
+        return
+    analysis_prefetcher.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_llm_sessions():
+    """Stop the background tasks and executor pools, close the pooled LLM provider HTTP sessions and persist the response cache."""
+    await analysis_prefetcher.stop()
+    await get_loop_monitor().stop()
+    shutdown_executors()
+    await close_http_sessions()
+    flush_response_cache()
+
+
 class MarketWatcherAgent:
     """
     Market analysis using 5-agent LLM debate council.
     Provides diverse perspectives from macro, fundamental, flow, technical, and skeptic agents.
     """
-    
+
+    reads = ("asset",)
+    writes = (
+        "asset",
+        "market_opinions",
+        "council_debate",
+        "consensus_points",
+        "disagreement_topics",
+        "judge_summary",
+        "price_change_pct",
+        "move_direction",
+        "current_price",
+        "volume",
+        "economic_calendar",
+        "economic_summary",
+    )
+
     async def run_async(self, context: dict) -> dict:
         """Async version for LLM council integration."""
         try:
@@ -91,7 +160,7 @@ class MarketWatcherAgent:
             
             # Validate asset symbol
             from services.asset_validator import validate_asset_symbol
-            is_valid, error_msg = validate_asset_symbol(asset)
+            is_valid, error_msg = await run_in_pool(POOL_MARKET_DATA, validate_asset_symbol, asset)
             if not is_valid:
                 logger.error(f"Invalid asset symbol: {error_msg}")
                 context["market_opinions"] = [f"Invalid asset symbol '{asset}': {error_msg}"]
@@ -105,8 +174,8 @@ class MarketWatcherAgent:
             # Get economic calendar data
             try:
                 economic_service = EconomicCalendarService()
-                economic_data = economic_service.get_stock_events(asset)
-                economic_summary = economic_service.get_market_summary(asset)
+                economic_data = await run_in_pool(POOL_MARKET_DATA, economic_service.get_stock_events, asset)
+                economic_summary = await run_in_pool(POOL_MARKET_DATA, economic_service.get_market_summary, asset)
                 
                 # Add to context for downstream agents
                 context["economic_calendar"] = economic_data
@@ -137,14 +206,14 @@ class MarketWatcherAgent:
             # Format market opinions from all 5 agents
             market_opinions = []
             for arg in debate_result["agent_arguments"]:
-                opinion = f"{arg.agent_name} ({arg.confidence.value}): {arg.thesis}"
+                opinion = f"{arg['agent_name']} ({arg['confidence']}): {arg['thesis']}"
                 market_opinions.append(opinion)
             
             # Add council results to context
             context["market_opinions"] = market_opinions
             context["council_debate"] = debate_result
-            context["consensus_points"] = [cp.statement for cp in debate_result["consensus_points"]]
-            context["disagreement_topics"] = [dp.topic for dp in debate_result["disagreement_points"]]
+            context["consensus_points"] = [cp["statement"] for cp in debate_result["consensus_points"]]
+            context["disagreement_topics"] = [dp["topic"] for dp in debate_result["disagreement_points"]]
             context["judge_summary"] = debate_result["judge_summary"]
             
             # Extract market context
@@ -171,6 +240,52 @@ class MarketWatcherAgent:
         return asyncio.run(self.run_async(context))
 
 
+# Agents run after the council debate: (name, class, has run_async)
+POST_DEBATE_AGENTS = [
+    ("SentimentAnalysisAgent", SentimentAnalysisAgent, True),
+    ("RiskManagerAgent", RiskManagerAgent, True),
+    ("ShariahComplianceAgent", ShariahComplianceAgent, True),
+    ("NarratorAgent", NarratorAgent, False),
+    ("PersonaAgent", PersonaAgent, False),
+    ("ModeratorAgent", ModeratorAgent, False),
+    ("ComplianceAgent", ComplianceAgent, True),
+    ("CallingAgent", CallingAgent, True)
+]
+
+# Fused mode: one LLM call covers sentiment, risk, Shariah, persona, moderation and compliance
+FUSED_POST_DEBATE_AGENTS = [
+    ("NarratorAgent", NarratorAgent, False),
+    ("FusedAnalysisAgent", FusedAnalysisAgent, True),
+    ("CallingAgent", CallingAgent, True)
+]
+
+
+# Personal agents rerun on top of a cached symbol-tier analysis
+USER_TIER_AGENTS = [
+    ("NarratorAgent", NarratorAgent, False),
+    ("PersonaAgent", PersonaAgent, False),
+    ("ModeratorAgent", ModeratorAgent, False),
+    ("ComplianceAgent", ComplianceAgent, True),
+    ("CallingAgent", CallingAgent, True)
+]
+
+
+def get_post_debate_agents() -> List[tuple]:
+    return FUSED_POST_DEBATE_AGENTS if settings.ANALYSIS_FUSED_MODE else POST_DEBATE_AGENTS
+
+
+def _without_side_effects(agents: List[tuple]) -> List[tuple]:
+    """Agents safe for speculative (prefetch/revalidate) runs: no outbound calls logged."""
+    return [agent for agent in agents if agent[1] is not CallingAgent]
+
+
+# Agents before the post-debate ones when the endpoint runs the council itself
+PRE_DEBATE_AGENTS = [
+    ("BehaviorMonitorAgent", BehaviorMonitorAgent, False),
+    ("MarketWatcherAgent", MarketWatcherAgent, True),
+]
+
+
 class Trade(BaseModel):
     timestamp: str
     symbol: str  
@@ -254,6 +369,11 @@ class WalletTopupRequest(BaseModel):
     note: Optional[str] = "Manual top-up"
 
 
+class CouncilBatchRequest(BaseModel):
+    symbols: List[str]
+    economic_context: str = ""
+
+
 # ── In-memory audio cache for Twilio TwiML playback ─────────
 _audio_cache: Dict[str, bytes] = {}
 
@@ -844,88 +964,125 @@ def invest_in_portfolio(request: InvestInPortfolioRequest):
     }
 
 
-@app.get("/analyze-asset-stream")
-async def analyze_asset_stream(asset: str, user_id: Optional[str] = "default_user"):
+async def _analysis_events(
+    asset: str, user_id: Optional[str], prefetch: bool = False, revalidate: bool = False
+) -> AsyncGenerator[str, None]:
     """
-    Streaming endpoint for real-time analysis updates.
-    Yields NDJSON (newline delimited JSON) events.
+    The streaming analysis pipeline as NDJSON lines (see /analyze-asset-stream).
+    With ``prefetch`` the cache checks and the provisional council result are
+    skipped: the background prefetcher only wants the pipeline to refresh the
+    cached analysis. Speculative runs (``prefetch``/``revalidate``) also skip
+    the CallingAgent and the self-improvement record.
+
+    When another user (or the prefetcher) already paid for the symbol-tier
+    analysis, only the personal part (trades, behavior, persona, narrative)
+    is recomputed on top of it.
+
+    Expired cache entries are still served, flagged ``stale``, while one
+    background refresh runs. That refresh uses ``revalidate``: it skips this
+    user's cached analysis and recomputes the symbol tier if it is stale.
     """
+    late_council_task = None
+    symbol = asset.strip().upper()
+    # Nobody asked for a speculative run: no calls, no self-improvement records
+    speculative = prefetch or revalidate
+    # Check cache first
+    cached, stale = (None, False) if prefetch or revalidate else analysis_cache.get_user(symbol, user_id)
+    if cached:
+        if stale:
+            _revalidate_analysis(symbol, user_id)
+        yield json.dumps({"type": "status", "message": "Using cached analysis (fast path)..."}) + "\n"
+        await asyncio.sleep(0.5) # Simulate slight delay for UX
+        yield json.dumps({"type": "complete", "data": {**cached, "stale": stale}}) + "\n"
+        return
+
+    shared, stale = (None, False) if prefetch else analysis_cache.get_symbol(symbol)
+    if stale and revalidate:
+        shared, stale = None, False
+    elif stale:
+        _revalidate_analysis(symbol, user_id)
+
+    # Instant rule-based council so the UI has something to render while
+    # validation, data fetching and the LLM agents run
+    if symbol and len(symbol) <= 15 and not (prefetch or revalidate) and shared is None:
+        yield json.dumps({"type": "provisional", "data": build_provisional_result(symbol)}) + "\n"
+
+    yield json.dumps({"type": "status", "message": f"Validating symbol {asset}..."}) + "\n"
+
+    # Validate asset
+    is_valid, error_msg = await run_in_pool(POOL_MARKET_DATA, validate_asset_symbol, asset)
+    if not is_valid:
+        yield json.dumps({"type": "error", "message": error_msg}) + "\n"
+        return
 
-    async def event_generator() -> AsyncGenerator[str, None]:
-        nonlocal asset
-        # Check cache first
-        cached = get_cached_analysis(asset.upper())
-        if cached:
-            yield json.dumps({"type": "status", "message": "Using cached analysis (fast path)..."}) + "\n"
-            await asyncio.sleep(0.5) # Simulate slight delay for UX
-            yield json.dumps({"type": "complete", "data": cached}) + "\n"
-            return
-
-        yield json.dumps({"type": "status", "message": f"Validating symbol {asset}..."}) + "\n"
-
-        # Validate asset
-        is_valid, error_msg = validate_asset_symbol(asset)
-        if not is_valid:
-            yield json.dumps({"type": "error", "message": error_msg}) + "\n"
-            return
-
-        asset = asset.strip().upper()
-        context = {"asset": asset, "user_id": user_id}
-
-        try:
-            # 1. Fetch Trade History
-            yield json.dumps({"type": "status", "message": "Fetching trade history..."}) + "\n"
-            trade_service = get_trade_history_service()
-            trade_summary = trade_service.get_trading_summary(asset, user_id)
-            user_trades = trade_summary["trades"]
-
-            # Auto-select persona
-            persona_style = trade_service.auto_select_persona(user_trades)
-            context.update({
-                "user_trades": user_trades,
-                "trade_summary": trade_summary,
-                "persona_style": persona_style
-            })
+    asset = asset.strip().upper()
+    context = {"asset": asset, "user_id": user_id}
 
-            yield json.dumps({
-                "type": "trade_history",
-                "data": trade_summary,
-                "persona": persona_style
-            }) + "\n"
+    try:
+        # 1. Fetch Trade History
+        yield json.dumps({"type": "status", "message": "Fetching trade history..."}) + "\n"
+        trade_service = get_trade_history_service()
+        trade_summary = await run_in_pool(POOL_AGENT, trade_service.get_trading_summary, asset, user_id)
+        user_trades = trade_summary["trades"]
 
-            # 2. Economic Calendar
+        # Auto-select persona
+        persona_style = trade_service.auto_select_persona(user_trades)
+        context.update({
+            "user_trades": user_trades,
+            "trade_summary": trade_summary,
+            "persona_style": persona_style
+        })
+
+        yield json.dumps({
+            "type": "trade_history",
+            "data": trade_summary,
+            "persona": persona_style
+        }) + "\n"
+
+        # 2. Economic Calendar
+        if shared:
+            context.update(copy.deepcopy(shared["context"]))
+        else:
             yield json.dumps({"type": "status", "message": "Scanning economic calendar..."}) + "\n"
             economic_service = EconomicCalendarService()
-            economic_data = economic_service.get_stock_events(asset)
-            economic_summary = economic_service.get_market_summary(asset)
-
             context.update({
-                "economic_calendar": economic_data,
-                "economic_summary": economic_summary
+                "economic_calendar": await run_in_pool(POOL_MARKET_DATA, economic_service.get_stock_events, asset),
+                "economic_summary": await run_in_pool(POOL_MARKET_DATA, economic_service.get_market_summary, asset)
             })
-
-            yield json.dumps({
-                "type": "economic_data",
-                "data": economic_data
-            }) + "\n"
-
-            # 3. Behavior Analysis
-            yield json.dumps({"type": "status", "message": "Analyzing behavioral patterns..."}) + "\n"
-            behavior_agent = BehaviorMonitorAgent()
-            # Note: BehaviorMonitorAgent usually runs sync, but we can wrap it or just call it
-            # The original code called it via run/run_async method of the agent instance
-            # We'll re-use the agent interface if possible, or just call behavior agent methods
-            # Let's assume standard agent interface:
-            context = behavior_agent.run(context)
-
-            yield json.dumps({
-                "type": "behavior_analysis",
-                "data": {
-                    "flags": context.get("behavior_flags", []),
-                    "insights": context.get("insights", [])
-                }
-            }) + "\n"
-
+        economic_data = context["economic_calendar"]
+        economic_summary = context["economic_summary"]
+
+        yield json.dumps({
+            "type": "economic_data",
+            "data": economic_data
+        }) + "\n"
+
+        # 3. Behavior Analysis
+        yield json.dumps({"type": "status", "message": "Analyzing behavioral patterns..."}) + "\n"
+        behavior_agent = BehaviorMonitorAgent()
+        # Note: BehaviorMonitorAgent usually runs sync, but we can wrap it or just call it
+        # The original code called it via run/run_async method of the agent instance
+        # We'll re-use the agent interface if possible, or just call behavior agent methods
+        # Let's assume standard agent interface:
+        context = await run_in_pool(POOL_AGENT, behavior_agent.run, context)
+
+        yield json.dumps({
+            "type": "behavior_analysis",
+            "data": {
+                "flags": context.get("behavior_flags", []),
+                "insights": context.get("insights", [])
+            }
+        }) + "\n"
+
+        if shared:
+            # 4-6. Shared analysis from the symbol tier; only personal agents run
+            yield json.dumps({"type": "status", "message": "Using shared council analysis (cached)..."}) + "\n"
+            yield json.dumps({"type": "debate_complete", "data": context["council_debate"]}) + "\n"
+            yield json.dumps({"type": "status", "message": "Running personal agents (Narrator, Persona)..."}) + "\n"
+            user_agents = _without_side_effects(USER_TIER_AGENTS) if speculative else USER_TIER_AGENTS
+            pipeline_report = await AgentPipeline(user_agents).run(context)
+            market_metrics_summary = shared["market_metrics"]
+        else:
             # 4. LLM Council Debate (Streaming)
             yield json.dumps({"type": "status", "message": "Convening 5-agent LLM Council..."}) + "\n"
 
@@ -933,29 +1090,57 @@ async def analyze_asset_stream(asset: str, user_id: Optional[str] = "default_use
             market_opinions = []
 
             # Stream the debate
-            async for chunk in get_council_analysis_stream(asset, economic_summary):
+            council_stream = get_council_analysis_stream(asset, economic_summary)
+            async for chunk in council_stream:
                 if chunk["type"] == "debate_complete":
                     council_debate_result = chunk["data"]
                     # Extract opinions for next agents
                     for arg in council_debate_result["agent_arguments"]:
-                        # Handle both dict and object
-                        if isinstance(arg, dict):
-                            opinion = f"{arg['agent_name']} ({arg['confidence']}): {arg['thesis']}"
-                        else:
-                            opinion = f"{arg.agent_name} ({arg.confidence.value}): {arg.thesis}"
+                        opinion = f"{arg['agent_name']} ({arg['confidence']}): {arg['thesis']}"
                         market_opinions.append(opinion)
 
                 # Forward the chunk to the client
                 yield json.dumps(chunk) + "\n"
 
+                # A real LLM argument replaces the agent's provisional one
+                if chunk["type"] == "agent_result" and not chunk["data"].get("is_fallback"):
+                    yield json.dumps({"type": "upgrade", "agent": chunk["agent"], "data": chunk["data"]}) + "\n"
+
+                if chunk["type"] == "debate_complete":
+                    break
+
+            # Agents that missed the quorum may still answer: collect their
+            # agent_upgrade events in the background while the pipeline goes on
+            late_council_events = asyncio.Queue()
+
+            async def collect_late_council_events():
+                async for chunk in council_stream:
+                    late_council_events.put_nowait(chunk)
+
+            late_council_task = asyncio.create_task(collect_late_council_events())
+
+            def drain_late_council_events() -> List[str]:
+                lines = []
+                while not late_council_events.empty():
+                    chunk = late_council_events.get_nowait()
+                    if chunk["type"] == "agent_upgrade" and council_debate_result:
+                        council_debate_result["agent_arguments"] = [
+                            chunk["data"] if arg["agent_name"] == chunk["agent"] else arg
+                            for arg in council_debate_result["agent_arguments"]
+                        ]
+                    lines.append(json.dumps(chunk) + "\n")
+                    if chunk["type"] == "agent_upgrade":
+                        lines.append(json.dumps({"type": "upgrade", "agent": chunk["agent"], "data": chunk["data"]}) + "\n")
+                return lines
+
             if not council_debate_result:
                 yield json.dumps({"type": "error", "message": "Council debate failed to return results"}) + "\n"
                 return
 
             context["market_opinions"] = market_opinions
             context["council_debate"] = council_debate_result
-            context["consensus_points"] = [cp['statement'] if isinstance(cp, dict) else cp.statement for cp in council_debate_result["consensus_points"]]
-            context["disagreement_topics"] = [dp['topic'] if isinstance(dp, dict) else dp.topic for dp in council_debate_result["disagreement_points"]]
+            context["consensus_points"] = [cp["statement"] for cp in council_debate_result["consensus_points"]]
+            context["disagreement_topics"] = [dp["topic"] for dp in council_debate_result["disagreement_points"]]
             context["judge_summary"] = council_debate_result["judge_summary"]
 
             mc = council_debate_result["market_context"]
@@ -967,54 +1152,43 @@ async def analyze_asset_stream(asset: str, user_id: Optional[str] = "default_use
             # 5. Risk, Sentiment, Narrator, Persona, Moderator, Compliance
             yield json.dumps({"type": "status", "message": "Running advanced agents (Risk, Sentiment)..."}) + "\n"
 
-            agent_flow = [
-                ("SentimentAnalysisAgent", SentimentAnalysisAgent, True),
-                ("RiskManagerAgent", RiskManagerAgent, True),
-                ("ShariahComplianceAgent", ShariahComplianceAgent, True),
-                ("NarratorAgent", NarratorAgent, False),
-                ("PersonaAgent", PersonaAgent, False),
-                ("ModeratorAgent", ModeratorAgent, False),
-                ("ComplianceAgent", ComplianceAgent, True),
-                ("CallingAgent", CallingAgent, True)
-            ]
-
-            for agent_name, agent_cls, is_async in agent_flow:
-                try:
-                    agent = agent_cls()
-                    if is_async:
-                        context = await agent.run_async(context)
-                    else:
-                        context = agent.run(context)
-                except Exception as e:
-                    logger.error(f"{agent_name} failed: {e}")
+            post_debate_agents = get_post_debate_agents()
+            if speculative:
+                post_debate_agents = _without_side_effects(post_debate_agents)
+            pipeline_report = await AgentPipeline(post_debate_agents).run(context)
+
+            for line in drain_late_council_events():
+                yield line
 
             # Record run for self-improvement
-            try:
-                # Extract agent outputs from debate result
-                agent_outputs = {}
-                if "council_debate" in context and "agent_arguments" in context["council_debate"]:
-                    for arg in context["council_debate"]["agent_arguments"]:
-                        # arg might be dict or object
-                        name = arg.get("agent_name") if isinstance(arg, dict) else arg.agent_name
-                        thesis = arg.get("thesis") if isinstance(arg, dict) else arg.thesis
-                        agent_outputs[name] = thesis
-
-                moderation = context.get("moderation", {})
-                # Use X platform verdict as primary for now
-                verdict = moderation.get("x", {})
-
-                self_improvement_service.record_run(
-                    asset=asset,
-                    agent_outputs=agent_outputs,
-                    moderator_verdict=verdict
-                )
-                yield json.dumps({"type": "status", "message": "Self-improvement cycle complete..."}) + "\n"
-            except Exception as e:
-                logger.error(f"Failed to record run: {e}")
+            if not speculative:
+                try:
+                    # Extract agent outputs from debate result
+                    agent_outputs = {}
+                    if "council_debate" in context and "agent_arguments" in context["council_debate"]:
+                        for arg in context["council_debate"]["agent_arguments"]:
+                            agent_outputs[arg["agent_name"]] = arg["thesis"]
+
+                    moderation = context.get("moderation", {})
+                    # Use X platform verdict as primary for now
+                    verdict = moderation.get("x", {})
+
+                    await run_in_pool(
+                        POOL_AGENT,
+                        self_improvement_service.record_run,
+                        asset=asset,
+                        agent_outputs=agent_outputs,
+                        moderator_verdict=verdict
+                    )
+                    yield json.dumps({"type": "status", "message": "Self-improvement cycle complete..."}) + "\n"
+                except Exception as e:
+                    logger.error(f"Failed to record run: {e}")
 
             # 6. Calculate Metrics
             metrics_service = get_market_metrics_service()
-            market_metrics = metrics_service.get_all_metrics(
+            market_metrics = await run_in_pool(
+                POOL_MARKET_DATA,
+                metrics_service.get_all_metrics,
                 symbol=asset,
                 agent_data={
                     "consensus_points": context.get("consensus_points", []),
@@ -1022,67 +1196,160 @@ async def analyze_asset_stream(asset: str, user_id: Optional[str] = "default_use
                     "council_opinions": context.get("market_opinions", [])
                 }
             )
-
-            # 7. Final Response Construction
-            final_response = {
-                "asset": asset,
-                "user_id": user_id,
-                "analysis_type": "automated",
-                "persona_selected": persona_style,
-                "market_metrics": {
-                    "vix": market_metrics["vix"],
-                    "market_regime": market_metrics["market_regime"],
-                    "risk_index": market_metrics["risk_index"],
-                    "asset_volatility": market_metrics["asset_volatility"],
-                    "risk_level": metrics_service.get_risk_level_description(market_metrics["risk_index"]),
-                    "regime_color": metrics_service.get_regime_color(market_metrics["market_regime"])
-                },
-                "trade_history": {
-                    "total_trades": trade_summary["total_trades"],
-                    "total_pnl": trade_summary["total_pnl"],
-                    "win_rate": trade_summary["win_rate"],
-                    "last_trade": trade_summary.get("last_trade")
-                },
-                "economic_calendar": {
-                    "earnings": economic_data.get("earnings_calendar", {}),
-                    "recent_news": economic_data.get("recent_news", [])[:3],
-                    "economic_events": economic_data.get("economic_events", []),
-                    "summary": economic_summary
-                },
-                "behavioral_analysis": {
-                    "flags": context.get("behavior_flags", []),
-                    "insights": context.get("insights", [])
-                },
-                "market_analysis": {
-                    "council_opinions": context.get("market_opinions", []),
-                    "consensus": context.get("consensus_points", []),
-                    "disagreements": context.get("disagreement_topics", []),
-                    "judge_summary": context.get("judge_summary", ""),
-                    "market_context": context["council_debate"]["market_context"]
-                },
-                "narrative": {
-                    "summary": context.get("summary", ""),
-                    "styled_message": context.get("final_message", ""),
-                    "moderated_output": context.get("moderated_output", "")
-                },
-                "persona_post": context.get("persona_post", {"x": "", "linkedin": ""}),
-                "risk_analysis": context.get("risk_analysis", {}),
-                "sentiment_analysis": context.get("sentiment_analysis", {}),
-                "compliance_analysis": context.get("compliance_analysis", {}),
-                "shariah_compliance": context.get("shariah_compliance", {}),
-                "timestamp": datetime.utcnow().isoformat()
+            market_metrics_summary = {
+                "vix": market_metrics["vix"],
+                "market_regime": market_metrics["market_regime"],
+                "risk_index": market_metrics["risk_index"],
+                "asset_volatility": market_metrics["asset_volatility"],
+                "risk_level": metrics_service.get_risk_level_description(market_metrics["risk_index"]),
+                "regime_color": metrics_service.get_regime_color(market_metrics["market_regime"])
             }
 
-            # Cache the result
-            set_cached_analysis(asset, final_response)
+            # Share the user-independent part with everyone asking for this symbol
+            analysis_cache.set_symbol(asset, {
+                "context": {key: context[key] for key in SYMBOL_TIER_KEYS if key in context},
+                "market_metrics": market_metrics_summary,
+            })
+
+        # 7. Final Response Construction
+        final_response = {
+            "asset": asset,
+            "user_id": user_id,
+            "analysis_type": "automated",
+            "persona_selected": persona_style,
+            "market_metrics": market_metrics_summary,
+            "trade_history": {
+                "total_trades": trade_summary["total_trades"],
+                "total_pnl": trade_summary["total_pnl"],
+                "win_rate": trade_summary["win_rate"],
+                "last_trade": trade_summary.get("last_trade")
+            },
+            "economic_calendar": {
+                "earnings": economic_data.get("earnings_calendar", {}),
+                "recent_news": economic_data.get("recent_news", [])[:3],
+                "economic_events": economic_data.get("economic_events", []),
+                "summary": economic_summary
+            },
+            "behavioral_analysis": {
+                "flags": context.get("behavior_flags", []),
+                "insights": context.get("insights", [])
+            },
+            "market_analysis": {
+                "council_opinions": context.get("market_opinions", []),
+                "consensus": context.get("consensus_points", []),
+                "disagreements": context.get("disagreement_topics", []),
+                "judge_summary": context.get("judge_summary", ""),
+                "market_context": context["council_debate"]["market_context"]
+            },
+            "narrative": {
+                "summary": context.get("summary", ""),
+                "styled_message": context.get("final_message", ""),
+                "moderated_output": context.get("moderated_output", "")
+            },
+            "persona_post": context.get("persona_post", {"x": "", "linkedin": ""}),
+            "risk_analysis": context.get("risk_analysis", {}),
+            "sentiment_analysis": context.get("sentiment_analysis", {}),
+            "compliance_analysis": context.get("compliance_analysis", {}),
+            "shariah_compliance": context.get("shariah_compliance", {}),
+            "fused_analysis": context.get("fused_analysis"),
+            "pipeline": pipeline_report,
+            "symbol_cache_hit": shared is not None,
+            "stale": stale,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+        # Cache the result: this user's analysis on top of the shared tier
+        analysis_cache.set_user(asset, user_id, final_response)
 
-            yield json.dumps({"type": "complete", "data": final_response}) + "\n"
+        if not shared:
+            for line in drain_late_council_events():
+                yield line
+        yield json.dumps({"type": "complete", "data": final_response}) + "\n"
 
-        except Exception as e:
-            logger.error(f"Stream error: {e}", exc_info=True)
-            yield json.dumps({"type": "error", "message": str(e)}) + "\n"
+    except Exception as e:
+        logger.error(f"Stream error: {e}", exc_info=True)
+        yield json.dumps({"type": "error", "message": str(e)}) + "\n"
+    finally:
+        if late_council_task is not None:
+            late_council_task.cancel()
 
-    return StreamingResponse(event_generator(), media_type="application/x-ndjson")
+
+@app.get("/analyze-asset-stream")
+async def analyze_asset_stream(asset: str, user_id: Optional[str] = "default_user"):
+    """
+    Streaming endpoint for real-time analysis updates.
+    Yields NDJSON (newline delimited JSON) events.
+
+    Council events are forwarded as they happen: ``agent_partial`` (an
+    agent's thesis as soon as it is generated), ``agent_result`` (the full
+    argument) and ``debate_complete``. Agents that missed the quorum and
+    answer later are sent as ``agent_upgrade`` before the final ``complete``.
+
+    Before any of that, a rule-based ``provisional`` council result is sent
+    immediately; each real (non-fallback) LLM argument then arrives as an
+    ``upgrade`` event replacing that agent's provisional entry.
+
+    An expired cached analysis is sent at once with ``stale: true`` while a
+    single background refresh brings the cache up to date.
+    """
+    return StreamingResponse(_analysis_events(asset, user_id), media_type="application/x-ndjson")
+
+
+# ── Background prefetch of analyses ───────────────────────────
+
+PREFETCH_USER_ID = "default_user"
+
+
+def _analysis_demand() -> List[str]:
+    """One entry per watchlist and active scheduled call naming a symbol."""
+    symbols = [symbol for account in list(_user_accounts.values()) for symbol in account.get("watchlist", [])]
+    symbols += [schedule.asset for schedule in list(CallingAgent._schedules.values()) if schedule.active and schedule.asset]
+    return symbols
+
+
+async def _refresh_analysis(symbol: str, user_id: Optional[str], **options):
+    """Run the streaming pipeline to completion; it caches the result itself."""
+    with llm_priority(PRIORITY_BACKGROUND):
+        async for line in _analysis_events(symbol, user_id, **options):
+            event = json.loads(line)
+            if event["type"] == "error":
+                raise RuntimeError(event["message"])
+
+
+async def _prefetch_analysis(symbol: str):
+    await _refresh_analysis(symbol, PREFETCH_USER_ID, prefetch=True)
+
+
+def _revalidate_analysis(symbol: str, user_id: Optional[str]):
+    """
+    Refresh a stale analysis in the background: the whole pipeline once per
+    symbol while the shared tier is stale, otherwise just this user's part.
+    """
+    key = symbol if analysis_cache.symbol_is_stale(symbol) else (symbol, user_id)
+    analysis_cache.revalidate(key, lambda: _refresh_analysis(symbol, user_id, revalidate=True))
+
+
+analysis_prefetcher = AnalysisPrefetcher(
+    demand=_analysis_demand,
+    cache_age=analysis_cache.symbol_age,
+    refresh=_prefetch_analysis,
+    ttl_seconds=settings.ANALYSIS_CACHE_SYMBOL_TTL_SECONDS,
+    refresh_margin_seconds=settings.ANALYSIS_PREFETCH_MARGIN_SECONDS,
+    interval_seconds=settings.ANALYSIS_PREFETCH_INTERVAL_SECONDS,
+    max_symbols=settings.ANALYSIS_PREFETCH_MAX_SYMBOLS,
+)
+
+
+@app.get("/analysis/prefetch")
+def get_prefetch_stats():
+    """Background prefetcher state: demand ranking and refresh counts."""
+    return {"enabled": settings.ANALYSIS_PREFETCH_ENABLED, **analysis_prefetcher.get_stats()}
+
+
+@app.get("/analysis/cache")
+def get_analysis_cache_stats():
+    """Hit, miss, stale and eviction counters of both analysis cache tiers, plus running refreshes."""
+    return analysis_cache.get_stats()
 
 
 @app.post("/analyze-asset")
@@ -1099,7 +1366,7 @@ async def analyze_asset(asset: str, user_id: Optional[str] = "default_user"):
         Complete multi-agent analysis with economic calendar impacts
     """
     # Validate asset symbol first
-    is_valid, error_msg = validate_asset_symbol(asset)
+    is_valid, error_msg = await run_in_pool(POOL_MARKET_DATA, validate_asset_symbol, asset)
     if not is_valid:
         logger.warning(f"Invalid asset symbol rejected: {asset} - {error_msg}")
         raise HTTPException(status_code=400, detail=error_msg)
@@ -1111,15 +1378,15 @@ async def analyze_asset(asset: str, user_id: Optional[str] = "default_user"):
     try:
         # 1. Fetch trade history from database (currently synthetic)
         trade_service = get_trade_history_service()
-        trade_summary = trade_service.get_trading_summary(asset, user_id)
+        trade_summary = await run_in_pool(POOL_AGENT, trade_service.get_trading_summary, asset, user_id)
         user_trades = trade_summary["trades"]
         
         logger.info(f"Found {len(user_trades)} trades for {asset}")
         
         # 2. Get economic calendar and news
         economic_service = EconomicCalendarService()
-        economic_data = economic_service.get_stock_events(asset)
-        economic_summary = economic_service.get_market_summary(asset)
+        economic_data = await run_in_pool(POOL_MARKET_DATA, economic_service.get_stock_events, asset)
+        economic_summary = await run_in_pool(POOL_MARKET_DATA, economic_service.get_market_summary, asset)
         
         logger.info(f"Economic events: {economic_summary[:100]}...")
         
@@ -1144,34 +1411,7 @@ async def analyze_asset(asset: str, user_id: Optional[str] = "default_user"):
         }
         
         # 6. Run agent pipeline
-        agent_flow = [
-            ("BehaviorMonitorAgent", BehaviorMonitorAgent, False),
-            ("MarketWatcherAgent", MarketWatcherAgent, True),
-            ("SentimentAnalysisAgent", SentimentAnalysisAgent, True),
-            ("RiskManagerAgent", RiskManagerAgent, True),
-            ("ShariahComplianceAgent", ShariahComplianceAgent, True),
-            ("NarratorAgent", NarratorAgent, False),
-            ("PersonaAgent", PersonaAgent, False),
-            ("ModeratorAgent", ModeratorAgent, False),
-            ("ComplianceAgent", ComplianceAgent, True),
-            ("CallingAgent", CallingAgent, True)
-        ]
-        
-        for agent_name, agent_cls, is_async in agent_flow:
-            try:
-                logger.info(f"Running {agent_name}...")
-                agent = agent_cls ()
-                
-                if is_async:
-                    context = await agent.run_async(context)
-                else:
-                    context = agent.run(context)
-                    
-                logger.info(f"✓ {agent_name} completed")
-                
-            except Exception as e:
-                logger.error(f"✗ {agent_name} failed: {e}")
-                context[f"{agent_name}_error"] = str(e)
+        pipeline_report = await AgentPipeline(PRE_DEBATE_AGENTS + get_post_debate_agents()).run(context)
 
         # Record run for self-improvement
         try:
@@ -1179,16 +1419,15 @@ async def analyze_asset(asset: str, user_id: Optional[str] = "default_user"):
             agent_outputs = {}
             if "council_debate" in context and "agent_arguments" in context["council_debate"]:
                 for arg in context["council_debate"]["agent_arguments"]:
-                    # arg might be dict or object
-                    name = arg.get("agent_name") if isinstance(arg, dict) else arg.agent_name
-                    thesis = arg.get("thesis") if isinstance(arg, dict) else arg.thesis
-                    agent_outputs[name] = thesis
+                    agent_outputs[arg["agent_name"]] = arg["thesis"]
 
             moderation = context.get("moderation", {})
             # Use X platform verdict as primary for now
             verdict = moderation.get("x", {})
 
-            self_improvement_service.record_run(
+            await run_in_pool(
+                POOL_AGENT,
+                self_improvement_service.record_run,
                 asset=asset,
                 agent_outputs=agent_outputs,
                 moderator_verdict=verdict
@@ -1198,7 +1437,9 @@ async def analyze_asset(asset: str, user_id: Optional[str] = "default_user"):
         
         # 7. Calculate market metrics (VIX, regime, risk index)
         metrics_service = get_market_metrics_service()
-        market_metrics = metrics_service.get_all_metrics(
+        market_metrics = await run_in_pool(
+            POOL_MARKET_DATA,
+            metrics_service.get_all_metrics,
             symbol=asset,
             agent_data={
                 "consensus_points": context.get("consensus_points", []),
@@ -1273,8 +1514,10 @@ async def analyze_asset(asset: str, user_id: Optional[str] = "default_user"):
             "sentiment_analysis": context.get("sentiment_analysis", {}),
             "compliance_analysis": context.get("compliance_analysis", {}),
             "shariah_compliance": context.get("shariah_compliance", {}),
+            "fused_analysis": context.get("fused_analysis"),
 
             # Metadata
+            "pipeline": pipeline_report,
             "timestamp": economic_data.get("timestamp"),
             "errors": {k: v for k, v in context.items() if k.endswith("_error")}
         }
@@ -1326,35 +1569,19 @@ async def run_agents(request: RunAgentsRequest):
         "persona_style": request.persona_style
     }
     
-    # Running agents in sequence
-    agent_flow = [
-        ("BehaviorMonitorAgent", BehaviorMonitorAgent, False),
-        ("MarketWatcherAgent", MarketWatcherAgent, True),
+    # Agents run as soon as the context keys they read are available
+    pipeline = AgentPipeline(PRE_DEBATE_AGENTS + [
         ("NarratorAgent", NarratorAgent, False),
         ("PersonaAgent", PersonaAgent, False),
         ("ModeratorAgent", ModeratorAgent, False)
-    ]
-    
-    for agent_name, agent_cls, is_async in agent_flow:
-        try:
-            logger.info(f"Running {agent_name}...")
-            agent = agent_cls()
-            
-            if is_async:
-                context = await agent.run_async(context)
-            else:
-                context = agent.run(context)
-                
-            logger.info(f"✓ {agent_name} completed")
-            
-        except Exception as e:
-            logger.error(f"✗ {agent_name} failed: {e}")
-            context[f"{agent_name}_error"] = str(e)
-    
+    ])
+    pipeline_report = await pipeline.run(context)
+
     return {
         "message": "Multi-agent pipeline completed",
         "result": context,
-        "agents_run": len(agent_flow)
+        "agents_run": len(pipeline),
+        "pipeline": pipeline_report
     }
 
 
@@ -1465,6 +1692,67 @@ def get_call_logs(user_id: str):
     return {"user_id": user_id, "logs": calling_service.get_call_logs(user_id)}
 
 
+@app.post("/council/reload")
+def reload_council():
+    """Re-read LLM provider keys from the environment and rebuild the council if they changed."""
+    try:
+        return reload_debate_engine()
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@app.post("/council/batch")
+async def council_batch(request: CouncilBatchRequest):
+    """
+    Debate many symbols in one request (e.g. a morning watchlist run).
+    Streams NDJSON: ``batch_start``, one ``symbol_result``/``symbol_error`` per
+    symbol as it finishes, then ``batch_complete``.
+    """
+    # Format checks only: a per-symbol yfinance lookup here would cost more than
+    # the batch market data download the debate does anyway
+    if not request.symbols:
+        raise HTTPException(status_code=400, detail="No symbols given")
+    invalid = [symbol for symbol in request.symbols if not symbol.strip() or len(symbol.strip()) > 15]
+    if invalid:
+        raise HTTPException(status_code=400, detail={"invalid_symbols": invalid})
+
+    try:
+        engine = get_debate_engine()
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    async def batch_generator():
+        try:
+            async for event in engine.debate_many(request.symbols, request.economic_context):
+                yield json.dumps(event) + "\n"
+        except Exception as e:
+            logger.error(f"Batch debate error: {e}", exc_info=True)
+            yield json.dumps({"type": "error", "message": str(e)}) + "\n"
+
+    return StreamingResponse(batch_generator(), media_type="application/x-ndjson")
+
+
+@app.get("/metrics/llm")
+def get_llm_call_metrics():
+    """
+    Process-wide LLM token usage, latency percentiles, error rates and
+    throughput per model, plus JSON parse/repair/retry rates per agent.
+    """
+    return {**get_llm_metrics().snapshot(), "structured_output": get_structured_output_stats().snapshot()}
+
+
+@app.get("/metrics/loop")
+def get_loop_lag_metrics():
+    """Event loop lag percentiles and stalls grouped by the agent or code that blocked the loop."""
+    return get_loop_monitor().get_stats()
+
+
+@app.get("/metrics/executors")
+def get_executor_metrics():
+    """Saturation of the named executor pools (market data, sync LLM, CPU, agent)."""
+    return get_executor_stats()
+
+
 @app.get("/self-improvement/metrics")
 def get_improvement_metrics():
     """Get self-improvement metrics."""
@@ -1677,7 +1965,7 @@ async def _get_analysis_context(asset: str, user_id: str = "default_user") -> di
     """
     import os
 
-    cached = get_cached_analysis(asset)
+    cached, _ = analysis_cache.get_user(asset.upper(), user_id)
     if cached:
         return cached
 
@@ -1687,7 +1975,7 @@ async def _get_analysis_context(asset: str, user_id: str = "default_user") -> di
     try:
         # Market metrics
         metrics_service = get_market_metrics_service()
-        market_metrics = metrics_service.get_comprehensive_metrics(asset)
+        market_metrics = await run_in_pool(POOL_MARKET_DATA, metrics_service.get_comprehensive_metrics, asset)
         context["market_metrics"] = {
             "risk_index": market_metrics.get("risk_index"),
             "risk_level": metrics_service.get_risk_level_description(market_metrics.get("risk_index", 50)),
@@ -1713,15 +2001,16 @@ async def _get_analysis_context(asset: str, user_id: str = "default_user") -> di
 
     try:
         # Risk
+        # yfinance on the market data pool, the LLM review on the LLM pool
         risk_agent = RiskManagerAgent()
-        context = risk_agent.run(context)
+        context = await risk_agent.run_async(context)
     except Exception as e:
         logger.warning(f"Voice context – risk agent failed: {e}")
 
     try:
         # Narrator
         narrator = NarratorAgent()
-        context = narrator.run(context)
+        context = await run_in_pool(NarratorAgent.executor, narrator.run, context)
     except Exception as e:
         logger.warning(f"Voice context – narrator failed: {e}")
 
@@ -1762,7 +2051,9 @@ def health_check():
             "trade_history": "operational (synthetic)",
             "voice_elevenlabs": "operational" if is_elevenlabs_configured() else "not configured",
             "voice_twilio": "operational" if is_twilio_configured() else "not configured",
-        }
+        },
+        "llm_queues": get_scheduler_stats(),
+        "llm_circuits": get_breaker_stats()
     }
 
 
@@ -0,0 +1,115 @@
+"""
+Agent Pipeline Service
+Runs a list of agents as a dependency graph instead of strictly in sequence.
+Each agent class declares the context keys it ``reads`` and ``writes``; an
+agent waits only for the earlier agents that write what it reads (or touch
+what it writes), and every agent whose inputs are ready runs concurrently.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Tuple
+
+from services.executors import POOL_AGENT, run_in_pool
+
+logger = logging.getLogger(__name__)
+
+
+class AgentNode:
+    """One agent in a pipeline: ``(name, agent class, is_async)`` plus its declared keys."""
+
+    def __init__(self, name: str, agent_cls: type, is_async: bool):
+        self.name = name
+        self.agent_cls = agent_cls
+        self.is_async = is_async
+        self.reads = frozenset(getattr(agent_cls, "reads", ()))
+        self.writes = frozenset(getattr(agent_cls, "writes", ()))
+        # Thread pool a sync agent's run() is offloaded to
+        self.executor = getattr(agent_cls, "executor", POOL_AGENT)
+        self.depends_on: List[str] = []
+
+    def conflicts_with(self, earlier: "AgentNode") -> bool:
+        """Whether this node must wait for ``earlier`` (read-after-write, write-after-read/write)."""
+        return bool(self.reads & earlier.writes or self.writes & (earlier.reads | earlier.writes))
+
+
+class AgentPipeline:
+    """
+    Dependency-graph runner shared by the analysis endpoints.
+
+    List order still matters: it decides which of two conflicting agents goes
+    first, so any sequential flow keeps its meaning. Agents share one context
+    dict; sync agents are offloaded to the thread pool they declare (see
+    services/executors.py). A failing agent is recorded as ``<name>_error``
+    in the context and does not stop the rest.
+    """
+
+    def __init__(self, agents: List[Tuple[str, type, bool]]):
+        """
+        Args:
+            agents: ``(name, agent class, is_async)`` tuples in sequential order
+        """
+        self.nodes: List[AgentNode] = []
+        for name, agent_cls, is_async in agents:
+            node = AgentNode(name, agent_cls, is_async)
+            node.depends_on = [earlier.name for earlier in self.nodes if node.conflicts_with(earlier)]
+            self.nodes.append(node)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def stages(self) -> List[List[str]]:
+        """Node names grouped by dependency depth (each stage can run at once)."""
+        depth: Dict[str, int] = {}
+        for node in self.nodes:
+            depth[node.name] = 1 + max((depth[dep] for dep in node.depends_on), default=-1)
+        stages: List[List[str]] = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+        for node in self.nodes:
+            stages[depth[node.name]].append(node.name)
+        return stages
+
+    async def _run_node(self, node: AgentNode, context: Dict, tasks: Dict[str, asyncio.Task], started: float) -> Dict:
+        await asyncio.gather(*(tasks[dep] for dep in node.depends_on))
+        node_started = time.monotonic()
+        report = {"depends_on": node.depends_on, "started_at": round(node_started - started, 3)}
+        try:
+            logger.info(f"Running {node.name}...")
+            if node.is_async:
+                result = await node.agent_cls().run_async(context)
+            else:
+                result = await run_in_pool(node.executor, lambda: node.agent_cls().run(context))
+            # Agents normally mutate and return the shared context
+            if isinstance(result, dict) and result is not context:
+                context.update({key: result[key] for key in node.writes if key in result})
+            report["status"] = "ok"
+            logger.info(f"✓ {node.name} completed")
+        except Exception as e:
+            logger.error(f"✗ {node.name} failed: {e}")
+            context[f"{node.name}_error"] = str(e)
+            report.update(status="failed", error=str(e))
+        report["seconds"] = round(time.monotonic() - node_started, 3)
+        return report
+
+    async def run(self, context: Dict) -> Dict[str, Dict]:
+        """
+        Run every agent against ``context`` as soon as its dependencies finish.
+
+        Returns:
+            Per-agent report: status, dependencies, start offset and duration
+        """
+        started = time.monotonic()
+        tasks: Dict[str, asyncio.Task] = {}
+        for node in self.nodes:
+            tasks[node.name] = asyncio.create_task(self._run_node(node, context, tasks, started))
+        try:
+            reports = await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+        report = dict(zip(tasks, reports))
+        logger.info(
+            f"Agent pipeline finished in {time.monotonic() - started:.2f}s: "
+            + ", ".join(f"{name} {r['seconds']:.2f}s" for name, r in report.items())
+        )
+        return report
@@ -0,0 +1,257 @@
+"""
+Analysis Cache Service
+Two-tier cache for the streaming analysis pipeline. The expensive,
+user-independent part of an analysis (council debate, market metrics,
+economic calendar, sentiment, risk, Shariah) is cached per symbol and shared
+by every user; the cheap personal part (trade history, behavior, persona,
+narrative) is cached per (symbol, user) and only valid on top of the symbol
+entry it was built from.
+
+Both tiers are bounded (entry count and byte budget, least-recently-used
+eviction) and serve stale-while-revalidate: for a while after its TTL an
+entry is still returned, flagged stale, while one background refresh runs.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Pipeline context keys that do not depend on who asked
+SYMBOL_TIER_KEYS = (
+    "market_opinions",
+    "council_debate",
+    "consensus_points",
+    "disagreement_topics",
+    "judge_summary",
+    "price_change_pct",
+    "move_direction",
+    "current_price",
+    "volume",
+    "economic_calendar",
+    "economic_summary",
+    "sentiment_analysis",
+    "risk_analysis",
+    "shariah_compliance",
+)
+
+
+class CacheTier:
+    """Bounded TTL + LRU cache of analysis data with its own hit metrics."""
+
+    def __init__(
+        self,
+        name: str,
+        ttl_seconds: float,
+        stale_seconds: float = 0,
+        max_entries: int = 500,
+        max_bytes: int = 64 * 1024 * 1024,
+    ):
+        """
+        Args:
+            name: Tier name (used in logs and stats)
+            ttl_seconds: How long an entry stays fresh
+            stale_seconds: How long after the TTL an entry may still be served stale
+            max_entries: Entry budget
+            max_bytes: Budget for the JSON size of the cached data
+        """
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Dict]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _size(data: Any) -> int:
+        return len(json.dumps(data, default=str))
+
+    def is_stale(self, entry: Dict) -> bool:
+        return time.time() - entry["stored_at"] >= self.ttl_seconds
+
+    def peek(self, key: Hashable) -> Optional[Dict]:
+        """Return ``{"data", "stored_at", ...}`` for a servable entry, or None (not counted)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry["stored_at"] >= self.ttl_seconds + self.stale_seconds:
+                self._remove(key)
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def record(self, entry: Optional[Dict]):
+        """Count a lookup that found ``entry`` as a hit, stale hit or miss."""
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            elif self.is_stale(entry):
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+
+    def get_entry(self, key: Hashable) -> Optional[Dict]:
+        """Like ``peek``, counted as a hit, stale hit or miss."""
+        entry = self.peek(key)
+        self.record(entry)
+        return entry
+
+    def set(self, key: Hashable, data: Any, **meta) -> Optional[Dict]:
+        """Store an entry, evicting least-recently-used ones if over budget."""
+        size = self._size(data)
+        if size > self.max_bytes:
+            logger.warning(f"Analysis cache ({self.name}): {key} is {size} bytes, over the whole budget")
+            return None
+        entry = {"data": data, "stored_at": time.time(), "size": size, **meta}
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return entry
+
+    def discard(self, key: Hashable):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def _remove(self, key: Hashable):
+        self._bytes -= self._entries.pop(key)["size"]
+
+    def age(self, key: Hashable) -> Optional[float]:
+        """Seconds since ``key`` was stored (no metrics, no expiry), or None."""
+        entry = self._entries.get(key)
+        return None if entry is None else time.time() - entry["stored_at"]
+
+    def get_stats(self) -> Dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "stale_seconds": self.stale_seconds,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class AnalysisCache:
+    """Symbol tier shared by all users plus a per-user tier built on top of it."""
+
+    def __init__(
+        self,
+        symbol_ttl_seconds: float = 600,
+        user_ttl_seconds: float = 120,
+        stale_seconds: float = 0,
+        max_entries: int = 500,
+        max_bytes: int = 64 * 1024 * 1024,
+    ):
+        """
+        Args:
+            symbol_ttl_seconds: Freshness of the shared per-symbol tier
+            user_ttl_seconds: Freshness of the per-user tier
+            stale_seconds: How long after its TTL an entry is served stale
+            max_entries: Entry budget of each tier
+            max_bytes: Byte budget of each tier
+        """
+        self.symbols = CacheTier("symbol", symbol_ttl_seconds, stale_seconds, max_entries, max_bytes)
+        self.users = CacheTier("user", user_ttl_seconds, stale_seconds, max_entries, max_bytes)
+        self.revalidations = 0
+        self._revalidating: Dict[Hashable, asyncio.Task] = {}
+
+    def get_symbol(self, symbol: str) -> Tuple[Optional[Dict], bool]:
+        """Shared analysis data for ``symbol`` (see SYMBOL_TIER_KEYS) and whether it is stale."""
+        entry = self.symbols.get_entry(symbol)
+        if entry is None:
+            return None, False
+        return entry["data"], self.symbols.is_stale(entry)
+
+    def set_symbol(self, symbol: str, data: Dict):
+        self.symbols.set(symbol, data)
+
+    def symbol_is_stale(self, symbol: str) -> bool:
+        entry = self.symbols.peek(symbol)
+        return entry is not None and self.symbols.is_stale(entry)
+
+    def get_user(self, symbol: str, user_id: Optional[str]) -> Tuple[Optional[Dict], bool]:
+        """
+        The complete analysis last built for this user and whether it is
+        stale (past its own TTL, or built on a stale symbol entry). An entry
+        is only served while the symbol entry it was built on is still
+        current, so a refreshed debate is never hidden behind an older
+        personal result.
+        """
+        entry = self.users.peek((symbol, user_id))
+        shared = self.symbols.peek(symbol)
+        if entry is not None and (shared is None or shared["stored_at"] != entry["symbol_stored_at"]):
+            self.users.discard((symbol, user_id))
+            entry = None
+        self.users.record(entry)
+        if entry is None:
+            return None, False
+        return entry["data"], self.users.is_stale(entry) or self.symbols.is_stale(shared)
+
+    def set_user(self, symbol: str, user_id: Optional[str], data: Dict):
+        shared = self.symbols.peek(symbol)
+        if shared is None:
+            return
+        self.users.set((symbol, user_id), data, symbol_stored_at=shared["stored_at"])
+
+    def symbol_age(self, symbol: str) -> Optional[float]:
+        return self.symbols.age(symbol)
+
+    def revalidate(self, key: Hashable, refresh: Callable[[], Awaitable]) -> bool:
+        """
+        Run ``refresh()`` in the background unless a refresh for ``key`` is
+        already running (must be called from the event loop).
+
+        Returns:
+            True if a refresh was started
+        """
+        task = self._revalidating.get(key)
+        if task is not None and not task.done():
+            return False
+        self.revalidations += 1
+        task = asyncio.create_task(refresh())
+        self._revalidating[key] = task
+
+        def finished(done: asyncio.Task):
+            if self._revalidating.get(key) is done:
+                del self._revalidating[key]
+            if not done.cancelled() and done.exception() is not None:
+                logger.error(f"Analysis cache refresh of {key} failed: {done.exception()}")
+
+        task.add_done_callback(finished)
+        return True
+
+    def get_stats(self) -> Dict:
+        return {
+            "symbol": self.symbols.get_stats(),
+            "user": self.users.get_stats(),
+            "revalidations": self.revalidations,
+            "revalidating": [str(key) for key in self._revalidating],
+        }
@@ -0,0 +1,159 @@
+"""
+Analysis Prefetch Service
+Keeps the council analyses users are about to ask for warm: symbols on
+watchlists and scheduled calls are ranked by demand and re-analyzed in the
+background shortly before their cache entry expires, so interactive requests
+hit the cache instead of paying for the full pipeline.
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from llm_council.services.llm_client import PRIORITY_INTERACTIVE, get_scheduler_stats
+
+logger = logging.getLogger(__name__)
+
+
+def llm_budget_busy() -> bool:
+    """
+    Whether the LLM concurrency budget is under load: any provider has
+    interactive requests queued or more than half its slots in flight.
+    Prefetch requests are queued as background work and would yield to
+    users anyway; waiting here keeps them from piling up in the queue.
+    """
+    for stats in get_scheduler_stats().values():
+        interactive = stats["classes"][PRIORITY_INTERACTIVE]
+        if interactive["queue_depth"] > 0 or stats["in_flight"] * 2 > stats["max_concurrent"]:
+            return True
+    return False
+
+
+class AnalysisPrefetcher:
+    """Refreshes the most-demanded analyses one at a time, ahead of expiry."""
+
+    def __init__(
+        self,
+        demand: Callable[[], Iterable[str]],
+        cache_age: Callable[[str], Optional[float]],
+        refresh: Callable[[str], Awaitable[None]],
+        ttl_seconds: float,
+        refresh_margin_seconds: float = 120.0,
+        interval_seconds: float = 30.0,
+        max_symbols: int = 20,
+        busy: Callable[[], bool] = llm_budget_busy,
+        busy_poll_seconds: float = 1.0,
+    ):
+        """
+        Args:
+            demand: Returns every symbol someone wants, once per watchlist/schedule
+            cache_age: Seconds since a symbol was cached, or None if it is not
+            refresh: Runs the analysis pipeline for a symbol and caches the result
+            ttl_seconds: Lifetime of a cache entry
+            refresh_margin_seconds: Refresh entries this long before they expire
+            interval_seconds: Pause between passes over the ranked symbols
+            max_symbols: Only the most-demanded symbols are kept warm
+            busy: Returns True while interactive load should not be competed with
+            busy_poll_seconds: How often to re-check a busy LLM budget
+        """
+        self.demand = demand
+        self.cache_age = cache_age
+        self.refresh = refresh
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.interval_seconds = interval_seconds
+        self.max_symbols = max_symbols
+        self.busy = busy
+        self.busy_poll_seconds = busy_poll_seconds
+
+        self._task: Optional[asyncio.Task] = None
+        self.passes = 0
+        self.refreshed = 0
+        self.failed = 0
+        self.busy_waits = 0
+        self.last_pass_at: Optional[float] = None
+        self.last_ranking: List[Tuple[str, int]] = []
+
+    def rank(self) -> List[Tuple[str, int]]:
+        """Symbols by demand (number of watchlists and schedules naming them), highest first."""
+        counts = Counter(symbol.strip().upper() for symbol in self.demand() if symbol and symbol.strip())
+        # Ties broken alphabetically so passes are deterministic
+        ranking = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        return ranking[:self.max_symbols]
+
+    def due(self, ranking: List[Tuple[str, int]]) -> List[str]:
+        """Ranked symbols that are uncached or within the refresh margin of expiry."""
+        threshold = self.ttl_seconds - self.refresh_margin_seconds
+        due = []
+        for symbol, _ in ranking:
+            age = self.cache_age(symbol)
+            if age is None or age >= threshold:
+                due.append(symbol)
+        return due
+
+    async def _wait_until_idle(self):
+        while self.busy():
+            self.busy_waits += 1
+            await asyncio.sleep(self.busy_poll_seconds)
+
+    async def run_once(self) -> int:
+        """
+        One pass: refresh every due symbol, most-demanded first.
+
+        Returns:
+            Number of symbols refreshed
+        """
+        self.last_ranking = self.rank()
+        refreshed = 0
+        for symbol in self.due(self.last_ranking):
+            await self._wait_until_idle()
+            # An interactive request may have warmed it while we waited
+            if symbol not in self.due([(symbol, 0)]):
+                continue
+            try:
+                await self.refresh(symbol)
+                refreshed += 1
+                self.refreshed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.warning(f"Prefetch of {symbol} failed: {e}")
+        self.passes += 1
+        self.last_pass_at = time.time()
+        if refreshed:
+            logger.info(f"Prefetched {refreshed} analysis(es)")
+        return refreshed
+
+    async def run_forever(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Prefetch pass failed: {e}", exc_info=True)
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        """Start the background loop on the running event loop (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self) -> Dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "passes": self.passes,
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "busy_waits": self.busy_waits,
+            "last_pass_at": self.last_pass_at,
+            "ranking": [{"symbol": symbol, "demand": demand} for symbol, demand in self.last_ranking],
+        }
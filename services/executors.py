@@ -0,0 +1,184 @@
+"""
+Executor Pools
+Named, bounded executors per workload class, so yfinance downloads, blocking
+LLM HTTP calls and CPU-bound numeric work no longer compete for the single
+default thread pool:
+
+- ``market_data``: threads for market data / scraping network I/O
+- ``llm``: threads for agents making blocking LLM calls
+- ``cpu``: processes for CPU-bound numeric work (e.g. portfolio optimization)
+- ``agent``: threads for any other sync agent or blocking call
+
+Sizes come from EXECUTOR_<POOL>_WORKERS. Agents declare the pool they need
+with an ``executor`` class attribute.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from llm_council.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+POOL_AGENT = "agent"
+POOL_MARKET_DATA = "market_data"
+POOL_LLM = "llm"
+POOL_CPU = "cpu"
+
+# Pools that run in worker processes (callables and arguments must pickle)
+PROCESS_POOLS = (POOL_CPU,)
+
+
+class ExecutorPool:
+    """
+    A bounded executor plus saturation metrics: calls queued and running,
+    peak concurrency, utilization and queue/run time percentiles.
+    """
+
+    def __init__(self, name: str, max_workers: int, processes: bool = False):
+        """
+        Args:
+            name: Pool name (used for thread names and metrics)
+            max_workers: Maximum concurrent calls
+            processes: Run calls in worker processes instead of threads
+        """
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.processes = processes
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.peak_in_flight = 0
+        self._in_flight = 0
+        self._running = 0
+        self._busy_seconds = 0.0
+        self._created_at = time.monotonic()
+        self._recent_waits: deque = deque(maxlen=500)
+        self._recent_durations: deque = deque(maxlen=500)
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.processes:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+            return self._executor
+
+    def _timed(self, submitted_at: float, fn: Callable, *args, **kwargs):
+        """Thread-pool wrapper measuring queue wait and busy time."""
+        started = time.monotonic()
+        with self._lock:
+            self._running += 1
+            self._recent_waits.append(started - submitted_at)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._busy_seconds += time.monotonic() - started
+
+    def _done(self, submitted_at: float, future: Future):
+        with self._lock:
+            self._in_flight -= 1
+            self.completed += 1
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+            self._recent_durations.append(time.monotonic() - submitted_at)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Submit a call; thread pools run it in a copy of the caller's context."""
+        submitted_at = time.monotonic()
+        with self._lock:
+            self.submitted += 1
+            self._in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self._in_flight)
+        if self.processes:
+            future = self._get_executor().submit(fn, *args, **kwargs)
+        else:
+            context = contextvars.copy_context()
+            future = self._get_executor().submit(context.run, self._timed, submitted_at, fn, *args, **kwargs)
+        future.add_done_callback(functools.partial(self._done, submitted_at))
+        return future
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """Run a call on the pool and block until it returns (for sync callers)."""
+        return self.submit(fn, *args, **kwargs).result()
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run a call on the pool without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            in_flight = self._in_flight
+            # Process pools cannot report from inside a worker: assume full use
+            running = min(in_flight, self.max_workers) if self.processes else self._running
+            waits = sorted(self._recent_waits)
+            durations = sorted(self._recent_durations)
+            uptime = max(time.monotonic() - self._created_at, 1e-9)
+            busy = self._busy_seconds
+
+        def p95(values) -> float:
+            return round(values[min(len(values) - 1, int(len(values) * 0.95))] * 1000, 1) if values else 0.0
+
+        stats = {
+            "kind": "process" if self.processes else "thread",
+            "max_workers": self.max_workers,
+            "running": running,
+            "queued": max(0, in_flight - running),
+            "saturation": round(running / self.max_workers, 3),
+            "peak_in_flight": self.peak_in_flight,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "p95_run_ms": p95(durations),
+        }
+        if not self.processes:
+            stats["p95_queue_wait_ms"] = p95(waits)
+            stats["utilization"] = round(busy / (uptime * self.max_workers), 4)
+        return stats
+
+
+_pools: Dict[str, ExecutorPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_executor(name: str) -> ExecutorPool:
+    """Get or create the process-wide pool ``name`` (sized by EXECUTOR_<NAME>_WORKERS)."""
+    with _pools_lock:
+        if name not in _pools:
+            workers = getattr(settings, f"EXECUTOR_{name.upper()}_WORKERS", settings.EXECUTOR_AGENT_WORKERS)
+            _pools[name] = ExecutorPool(name, workers, processes=name in PROCESS_POOLS)
+        return _pools[name]
+
+
+async def run_in_pool(name: str, fn: Callable, *args, **kwargs):
+    """Run a blocking call on the named pool without blocking the event loop."""
+    return await get_executor(name).run(fn, *args, **kwargs)
+
+
+def get_executor_stats() -> Dict:
+    """Saturation metrics for every pool created so far."""
+    return {name: pool.get_stats() for name, pool in list(_pools.items())}
+
+
+def shutdown_executors():
+    for pool in list(_pools.values()):
+        pool.shutdown()
@@ -0,0 +1,160 @@
+"""
+Event Loop Lag Monitor
+Measures how late the event loop wakes up and attributes every stall to the
+code that was holding it. A heartbeat coroutine notices the lag once the loop
+is free again; a watchdog thread samples the loop thread's stack while the
+stall is still happening, so the blocking agent or pipeline stage is named.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from llm_council.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Frames in these files only say *that* the loop ran something, not what
+_IGNORED_FILES = (os.path.abspath(__file__),)
+
+
+class LoopLagMonitor:
+    """Loop lag percentiles plus per-culprit stall counts for one event loop."""
+
+    def __init__(self, interval_seconds: float = 0.05, threshold_seconds: float = 0.1, max_recent: int = 50):
+        """
+        Args:
+            interval_seconds: Heartbeat period (also the lag resolution)
+            threshold_seconds: Lag above which a wake-up counts as a stall
+            max_recent: Number of recent stalls kept for inspection
+        """
+        self.interval_seconds = interval_seconds
+        self.threshold_seconds = threshold_seconds
+
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._expected_wake = 0.0
+        self._pending_culprit: Optional[Dict] = None
+        self._lock = threading.Lock()
+
+        self.beats = 0
+        self.stalls = 0
+        self.max_lag_seconds = 0.0
+        self._recent_lags: deque = deque(maxlen=2000)
+        self._recent_stalls: deque = deque(maxlen=max_recent)
+        self._culprits: Dict[str, Dict] = {}
+
+    # ── attribution ────────────────────────────────────────────
+
+    def _sample(self) -> Dict:
+        """Name the project code currently running on the loop thread."""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        agent = None
+        location = None
+        while frame is not None:
+            path = os.path.abspath(frame.f_code.co_filename)
+            if path.startswith(PROJECT_ROOT) and path not in _IGNORED_FILES and "site-packages" not in path:
+                if location is None:
+                    location = f"{os.path.relpath(path, PROJECT_ROOT)}:{frame.f_lineno} in {frame.f_code.co_name}"
+                owner = frame.f_locals.get("self")
+                if agent is None and owner is not None and type(owner).__name__.endswith("Agent"):
+                    agent = f"{type(owner).__name__}.{frame.f_code.co_name}"
+            frame = frame.f_back
+        return {"culprit": agent or location or "outside project code", "location": location}
+
+    def _watch(self):
+        while not self._stop.wait(self.threshold_seconds / 2):
+            overdue = time.monotonic() - self._expected_wake
+            if overdue > self.threshold_seconds and self._pending_culprit is None:
+                self._pending_culprit = self._sample()
+
+    # ── measurement ────────────────────────────────────────────
+
+    def _record(self, lag: float):
+        with self._lock:
+            self.beats += 1
+            self._recent_lags.append(lag)
+            self.max_lag_seconds = max(self.max_lag_seconds, lag)
+            if lag <= self.threshold_seconds:
+                return
+            sample = self._pending_culprit or {"culprit": "unknown", "location": None}
+            self.stalls += 1
+            stats = self._culprits.setdefault(sample["culprit"], {"stalls": 0, "total_ms": 0.0, "max_ms": 0.0})
+            stats["stalls"] += 1
+            stats["total_ms"] += lag * 1000
+            stats["max_ms"] = max(stats["max_ms"], lag * 1000)
+            self._recent_stalls.append({**sample, "lag_ms": round(lag * 1000, 1), "at": time.time()})
+        logger.warning(f"Event loop blocked for {lag * 1000:.0f}ms by {sample['culprit']}")
+
+    async def _heartbeat(self):
+        while True:
+            self._expected_wake = time.monotonic() + self.interval_seconds
+            self._pending_culprit = None
+            await asyncio.sleep(self.interval_seconds)
+            self._record(max(0.0, time.monotonic() - self._expected_wake))
+
+    def start(self):
+        """Start monitoring the running event loop (idempotent)."""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._expected_wake = time.monotonic() + self.interval_seconds
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            lags = sorted(self._recent_lags)
+            culprits = {
+                name: {**stats, "total_ms": round(stats["total_ms"], 1), "max_ms": round(stats["max_ms"], 1)}
+                for name, stats in sorted(self._culprits.items(), key=lambda item: -item[1]["total_ms"])
+            }
+            recent = list(self._recent_stalls)
+
+        def percentile(p: float) -> float:
+            return round(lags[min(len(lags) - 1, int(len(lags) * p))] * 1000, 1) if lags else 0.0
+
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "threshold_ms": round(self.threshold_seconds * 1000, 1),
+            "beats": self.beats,
+            "stalls": self.stalls,
+            "lag_p50_ms": percentile(0.5),
+            "lag_p99_ms": percentile(0.99),
+            "max_lag_ms": round(self.max_lag_seconds * 1000, 1),
+            "culprits": culprits,
+            "recent_stalls": recent,
+        }
+
+
+# Global monitor instance
+_loop_monitor = None
+
+
+def get_loop_monitor() -> LoopLagMonitor:
+    """Get or create the process-wide loop lag monitor."""
+    global _loop_monitor
+    if _loop_monitor is None:
+        _loop_monitor = LoopLagMonitor(threshold_seconds=settings.LOOP_LAG_THRESHOLD_MS / 1000)
+    return _loop_monitor
@@ -111,3 +111,15 @@ class SelfImprovementService:
              optimization += " Provide constructive criticism, avoid overly negative doom-mongering."
 
         return optimization
+
+
+# Global service instance
+_self_improvement_service = None
+
+
+def get_self_improvement_service() -> SelfImprovementService:
+    """Get or create the process-wide learning history (loaded from disk once)."""
+    global _self_improvement_service
+    if _self_improvement_service is None:
+        _self_improvement_service = SelfImprovementService()
+    return _self_improvement_service
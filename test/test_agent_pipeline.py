@@ -0,0 +1,92 @@
+import asyncio
+import time
+
+from services.agent_pipeline import AgentPipeline
+
+
+class DebateAgent:
+    reads = ("asset",)
+    writes = ("council_debate",)
+
+    async def run_async(self, context):
+        await asyncio.sleep(0.02)
+        context["council_debate"] = {"asset": context["asset"]}
+        return context
+
+
+class SlowAgent:
+    """Sync agent that needs the debate; several of these must overlap."""
+
+    reads = ("council_debate",)
+    writes = ()
+
+    def run(self, context):
+        time.sleep(0.1)
+        context.setdefault("slow_done", []).append(context["council_debate"]["asset"])
+        return context
+
+
+class PostAgent:
+    reads = ("market_opinions",)
+    writes = ("persona_post",)
+
+    def run(self, context):
+        context["persona_post"] = {"x": "post"}
+        return context
+
+
+class BrokenModerator:
+    reads = ("persona_post",)
+    writes = ("moderation",)
+
+    def run(self, context):
+        raise RuntimeError("moderator down")
+
+
+class Compliance:
+    reads = ("persona_post",)
+    writes = ("compliance_analysis",)
+
+    async def run_async(self, context):
+        # A fresh dict is merged back through the declared writes
+        return {"compliance_analysis": {"status": "PASS", "post": context["persona_post"]["x"]}, "ignored": 1}
+
+
+def _pipeline():
+    return AgentPipeline([
+        ("Debate", DebateAgent, True),
+        ("Sentiment", type("Sentiment", (SlowAgent,), {"writes": ("sentiment",)}), False),
+        ("Risk", type("Risk", (SlowAgent,), {"writes": ("risk",)}), False),
+        ("Persona", PostAgent, False),
+        ("Moderator", BrokenModerator, False),
+        ("Compliance", Compliance, True),
+    ])
+
+
+def test_pipeline_runs_independent_agents_concurrently():
+    pipeline = _pipeline()
+
+    assert pipeline.stages() == [["Debate", "Persona"], ["Sentiment", "Risk", "Moderator", "Compliance"]]
+
+    context = {"asset": "AAPL", "market_opinions": []}
+    started = time.monotonic()
+    report = asyncio.run(pipeline.run(context))
+
+    # Two 0.1s agents overlap instead of running back to back
+    assert time.monotonic() - started < 0.19
+    assert context["slow_done"] == ["AAPL", "AAPL"]
+    assert report["Sentiment"]["depends_on"] == ["Debate"]
+    assert report["Risk"]["started_at"] >= report["Debate"]["seconds"]
+    assert report["Risk"]["seconds"] >= 0.1
+
+
+def test_failing_agent_is_isolated_and_recorded():
+    context = {"asset": "AAPL", "market_opinions": []}
+
+    report = asyncio.run(_pipeline().run(context))
+
+    assert report["Moderator"]["status"] == "failed"
+    assert context["Moderator_error"] == "moderator down"
+    assert report["Compliance"]["status"] == "ok"
+    assert context["compliance_analysis"] == {"status": "PASS", "post": "post"}
+    assert "ignored" not in context
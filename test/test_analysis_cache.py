@@ -0,0 +1,120 @@
+import asyncio
+
+from services import analysis_cache
+from services.analysis_cache import AnalysisCache, CacheTier
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _cache(monkeypatch, **kwargs):
+    clock = Clock()
+    monkeypatch.setattr(analysis_cache.time, "time", clock)
+    return AnalysisCache(symbol_ttl_seconds=600, user_ttl_seconds=120, **kwargs), clock
+
+
+def test_symbol_tier_is_shared_and_user_tier_is_personal(monkeypatch):
+    cache, clock = _cache(monkeypatch)
+    cache.set_symbol("AAPL", {"context": {"judge_summary": "hold"}})
+    cache.set_user("AAPL", "alice", {"persona_selected": "coach"})
+
+    assert cache.get_user("AAPL", "alice") == ({"persona_selected": "coach"}, False)
+    # Bob gets nothing personal, but reuses the shared debate
+    assert cache.get_user("AAPL", "bob") == (None, False)
+    assert cache.get_symbol("AAPL") == ({"context": {"judge_summary": "hold"}}, False)
+
+    # Each tier expires on its own TTL
+    clock.now += 121
+    assert cache.get_user("AAPL", "alice") == (None, False)
+    assert cache.get_symbol("AAPL")[0] is not None
+    assert cache.symbol_age("AAPL") == 121
+
+    stats = cache.get_stats()
+    assert stats["symbol"]["hits"] == 2 and stats["symbol"]["misses"] == 0
+    assert stats["user"]["hits"] == 1 and stats["user"]["misses"] == 2
+    assert stats["user"]["hit_rate"] == 0.333 and stats["user"]["expirations"] == 1
+
+
+def test_user_entry_is_dropped_when_symbol_tier_is_refreshed(monkeypatch):
+    cache, clock = _cache(monkeypatch)
+    cache.set_user("AAPL", "alice", {"stale": True})
+    # Nothing shared to build on: not cached
+    assert cache.get_user("AAPL", "alice") == (None, False)
+
+    cache.set_symbol("AAPL", {"context": {}})
+    cache.set_user("AAPL", "alice", {"stale": True})
+    clock.now += 30
+    cache.set_symbol("AAPL", {"context": {"judge_summary": "new debate"}})
+
+    assert cache.get_user("AAPL", "alice") == (None, False)
+    assert cache.get_stats()["user"]["entries"] == 0
+    clock.now += 600
+    assert cache.get_symbol("AAPL") == (None, False)
+    assert cache.get_stats()["symbol"]["expirations"] == 1
+
+
+def test_expired_entries_are_served_stale_within_the_window(monkeypatch):
+    cache, clock = _cache(monkeypatch, stale_seconds=300)
+    cache.set_symbol("AAPL", {"context": {}})
+    cache.set_user("AAPL", "alice", {"persona_selected": "coach"})
+
+    # Personal part expired, shared part still fresh
+    clock.now += 200
+    assert cache.get_user("AAPL", "alice") == ({"persona_selected": "coach"}, True)
+    assert not cache.symbol_is_stale("AAPL")
+
+    # A stale symbol entry makes everything built on it stale too
+    clock.now += 500
+    assert cache.get_symbol("AAPL") == ({"context": {}}, True)
+    assert cache.symbol_is_stale("AAPL")
+
+    clock.now += 300
+    assert cache.get_symbol("AAPL") == (None, False)
+    assert cache.get_user("AAPL", "alice") == (None, False)
+    stats = cache.get_stats()
+    assert stats["symbol"]["stale_hits"] == 1 and stats["user"]["stale_hits"] == 1
+
+
+def test_tier_evicts_least_recently_used_within_its_budgets():
+    tier = CacheTier("symbol", ttl_seconds=600, max_entries=2, max_bytes=100)
+    tier.set("AAPL", {"v": 1})
+    tier.set("MSFT", {"v": 2})
+    tier.get_entry("AAPL")
+    tier.set("TSLA", {"v": 3})
+
+    assert tier.peek("MSFT") is None
+    assert tier.peek("AAPL") and tier.peek("TSLA")
+
+    # Over the byte budget: evicts the oldest until it fits; too large to fit at all: not stored
+    tier.set("NVDA", {"v": "x" * 80})
+    assert [key for key in ("AAPL", "TSLA", "NVDA") if tier.peek(key)] == ["TSLA", "NVDA"]
+    assert tier.set("SPY", {"v": "x" * 200}) is None
+
+    stats = tier.get_stats()
+    assert stats["evictions"] == 2
+    assert stats["entries"] == 2 and stats["bytes"] <= 100
+
+
+def test_revalidation_runs_once_per_key():
+    cache = AnalysisCache()
+    refreshed = []
+
+    async def refresh():
+        await asyncio.sleep(0.01)
+        refreshed.append("AAPL")
+
+    async def scenario():
+        started = [cache.revalidate("AAPL", refresh) for _ in range(3)]
+        assert cache.get_stats()["revalidating"] == ["AAPL"]
+        await asyncio.sleep(0.05)
+        return started
+
+    assert asyncio.run(scenario()) == [True, False, False]
+    assert refreshed == ["AAPL"]
+    stats = cache.get_stats()
+    assert stats["revalidations"] == 1 and stats["revalidating"] == []
@@ -0,0 +1,73 @@
+import asyncio
+
+from services import analysis_prefetch
+from services.analysis_prefetch import AnalysisPrefetcher
+
+
+def _prefetcher(demand, ages, busy=lambda: False):
+    refreshed = []
+
+    async def refresh(symbol):
+        refreshed.append(symbol)
+        ages[symbol] = 0.0
+
+    prefetcher = AnalysisPrefetcher(
+        demand=lambda: demand,
+        cache_age=ages.get,
+        refresh=refresh,
+        ttl_seconds=600,
+        refresh_margin_seconds=120,
+        max_symbols=3,
+        busy=busy,
+        busy_poll_seconds=0,
+    )
+    return prefetcher, refreshed
+
+
+def test_refreshes_most_demanded_symbols_before_expiry():
+    demand = ["aapl", "MSFT", "TSLA", "AAPL", "NVDA", "MSFT", "AAPL", "SPY ", "SPY"]
+    # AAPL is fresh, MSFT is inside the refresh margin, SPY is not cached
+    ages = {"AAPL": 60.0, "MSFT": 500.0, "TSLA": 100.0}
+    prefetcher, refreshed = _prefetcher(demand, ages)
+
+    assert prefetcher.rank() == [("AAPL", 3), ("MSFT", 2), ("SPY", 2)]
+    assert asyncio.run(prefetcher.run_once()) == 2
+    assert refreshed == ["MSFT", "SPY"]
+
+    # Everything ranked is warm now
+    assert asyncio.run(prefetcher.run_once()) == 0
+    stats = prefetcher.get_stats()
+    assert stats["refreshed"] == 2 and stats["passes"] == 2
+    assert stats["ranking"][0] == {"symbol": "AAPL", "demand": 3}
+
+
+def test_waits_for_interactive_load_and_skips_symbols_warmed_meanwhile():
+    ages = {}
+    checks = []
+
+    def busy():
+        checks.append(1)
+        if len(checks) == 2:
+            ages["MSFT"] = 1.0  # an interactive request cached it
+        return len(checks) <= 2
+
+    prefetcher, refreshed = _prefetcher(["AAPL", "AAPL", "MSFT"], ages, busy=busy)
+
+    asyncio.run(prefetcher.run_once())
+
+    assert refreshed == ["AAPL"]
+    assert prefetcher.busy_waits == 2
+
+
+def test_budget_is_busy_when_requests_queue_or_slots_fill(monkeypatch):
+    classes = {"interactive": {"queue_depth": 0}, "background": {"queue_depth": 3}}
+    stats = {"openrouter": {"in_flight": 2, "max_concurrent": 4, "classes": classes}}
+    monkeypatch.setattr(analysis_prefetch, "get_scheduler_stats", lambda: stats)
+    assert not analysis_prefetch.llm_budget_busy()
+
+    stats["openrouter"]["in_flight"] = 3
+    assert analysis_prefetch.llm_budget_busy()
+
+    stats["openrouter"]["in_flight"] = 0
+    classes["interactive"]["queue_depth"] = 1
+    assert analysis_prefetch.llm_budget_busy()
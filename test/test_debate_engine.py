@@ -0,0 +1,283 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from llm_council.core.config import settings
+from llm_council.services import debate_engine, llm_client
+from llm_council.services.llm_client import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, ProviderScheduler, llm_priority
+
+
+def test_engine_is_shared_and_rebuilt_only_when_provider_settings_change(monkeypatch):
+    monkeypatch.setattr(settings, "OPENROUTER_API_KEY", "key-one")
+    monkeypatch.setattr(settings, "MISTRAL_API_KEY", None)
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", None)
+    monkeypatch.setattr(debate_engine, "_debate_engine", None)
+
+    first = debate_engine.get_debate_engine()
+    assert debate_engine.get_debate_engine() is first
+    assert "🤔 Skeptic" not in first.llm_providers
+
+    monkeypatch.setattr(settings, "MISTRAL_API_KEY", "key-two")
+    second = debate_engine.get_debate_engine()
+
+    assert second is not first
+    assert "🤔 Skeptic" in second.llm_providers
+    assert second.improvement_service is first.improvement_service
+    monkeypatch.setattr(debate_engine, "_debate_engine", None)
+
+
+def _offline_engine(monkeypatch):
+    monkeypatch.setattr(settings, "OPENROUTER_API_KEY", "key")
+    monkeypatch.setattr(settings, "MISTRAL_API_KEY", "key")
+    engine = debate_engine.DebateEngine()
+    calls = []
+
+    async def fake_argument(symbol, agent_name, market_context, move_pct, move_direction,
+                            temperature=0.7, max_retries=2, on_partial=None, prior_digest=""):
+        calls.append(agent_name)
+        if on_partial:
+            on_partial(agent_name, {"thesis": f"{agent_name} thesis"})
+        await asyncio.sleep(0.01)
+        arg = engine._generate_fallback_argument(agent_name, symbol, move_direction, move_pct)
+        return arg.model_copy(update={"is_fallback": False})
+
+    monkeypatch.setattr(engine, "_get_agent_argument_async", fake_argument)
+    monkeypatch.setattr(engine, "_get_market_data", lambda symbol: {
+        "price": 100.0, "change_percent": 1.5, "volume": 1000, "symbol": symbol
+    })
+    return engine, calls
+
+
+def test_blocking_and_streaming_callers_share_one_debate_run(monkeypatch):
+    engine, calls = _offline_engine(monkeypatch)
+
+    async def scenario():
+        async def consume_stream():
+            return [event async for event in engine.debate_stream_async("AAPL")]
+
+        return await asyncio.gather(consume_stream(), engine.debate_move_async("AAPL"))
+
+    events, result = asyncio.run(scenario())
+
+    assert len(calls) == 5
+    types = [event["type"] for event in events]
+    assert types.count("agent_partial") == 5 and types.count("agent_result") == 5
+    assert events[-1] == {"type": "debate_complete", "data": result}
+    assert isinstance(result["timestamp"], str)
+    assert all(isinstance(arg["confidence"], str) for arg in result["agent_arguments"])
+    json.dumps(result)
+
+
+def test_streaming_caller_joining_a_blocking_run_gets_token_events(monkeypatch):
+    engine, calls = _offline_engine(monkeypatch)
+
+    def slow_market_data(symbol):
+        time.sleep(0.05)
+        return {"price": 100.0, "change_percent": 1.5, "volume": 1000, "symbol": symbol}
+
+    monkeypatch.setattr(engine, "_get_market_data", slow_market_data)
+
+    async def scenario():
+        blocking = asyncio.create_task(engine.debate_move_async("AAPL"))
+        await asyncio.sleep(0.01)
+        events = [event async for event in engine.debate_stream_async("AAPL")]
+        return events, await blocking
+
+    events, result = asyncio.run(scenario())
+
+    assert len(calls) == 5
+    assert [event["type"] for event in events].count("agent_partial") == 5
+    assert events[-1] == {"type": "debate_complete", "data": result}
+
+
+def test_interactive_join_raises_a_background_run_ahead_of_other_background_work(monkeypatch):
+    engine, _ = _offline_engine(monkeypatch)
+    scheduler = ProviderScheduler("test", max_concurrent=1)
+    monkeypatch.setitem(llm_client._schedulers, "test", scheduler)
+    order = []
+
+    async def call(name):
+        async def fn(timeout):
+            order.append(name)
+            return name
+        return await scheduler.run_async(fn)
+
+    async def queued_argument(symbol, agent_name, market_context, move_pct, move_direction, **kwargs):
+        await call(agent_name)
+        return engine._generate_fallback_argument(agent_name, symbol, move_direction, move_pct)
+
+    async def other_background_work(name):
+        with llm_priority(PRIORITY_BACKGROUND):
+            return await call(name)
+
+    monkeypatch.setattr(engine, "_get_agent_argument_async", queued_argument)
+
+    async def scenario():
+        await scheduler.acquire_async(priority=PRIORITY_BACKGROUND)  # keep the queue backed up
+        others = [asyncio.create_task(other_background_work(f"other-{i}")) for i in range(2)]
+        await asyncio.sleep(0.01)
+        with llm_priority(PRIORITY_BACKGROUND):
+            run = engine.start_debate("AAPL", stream_tokens=False)
+        await asyncio.sleep(0.05)
+        assert scheduler.get_stats()["classes"][PRIORITY_BACKGROUND]["queue_depth"] == 7
+
+        joined = engine.start_debate("AAPL", stream_tokens=False)
+        assert joined is run and run.priority.priority == PRIORITY_INTERACTIVE
+        scheduler.release(priority=PRIORITY_BACKGROUND)
+        await asyncio.gather(joined.wait(), *others)
+
+    asyncio.run(scenario())
+
+    agents = [agent["name"] for agent in debate_engine.AGENT_ROSTER]
+    assert sorted(order[:5]) == sorted(agents) and order[5:] == ["other-0", "other-1"]
+    classes = scheduler.get_stats()["classes"]
+    assert classes[PRIORITY_INTERACTIVE]["granted"] == 5 and classes[PRIORITY_INTERACTIVE]["in_flight"] == 0
+    assert classes[PRIORITY_BACKGROUND]["in_flight"] == 0
+
+
+def test_straggler_is_replaced_by_flagged_fallback_then_upgraded(monkeypatch):
+    engine, calls = _offline_engine(monkeypatch)
+    monkeypatch.setattr(settings, "DEBATE_QUORUM", 4)
+    monkeypatch.setattr(settings, "DEBATE_QUORUM_DEADLINE_SECONDS", 5)
+    original = engine._get_agent_argument_async
+
+    async def slow_skeptic(symbol, agent_name, *args, **kwargs):
+        if agent_name == "🤔 Skeptic":
+            await asyncio.sleep(0.2)
+            arg = await original(symbol, agent_name, *args, **kwargs)
+            return arg.model_copy(update={"thesis": "late but real"})
+        return await original(symbol, agent_name, *args, **kwargs)
+
+    monkeypatch.setattr(engine, "_get_agent_argument_async", slow_skeptic)
+
+    async def scenario():
+        start = time.monotonic()
+        result = await engine.debate_move_async("MSFT")
+        blocking_seconds = time.monotonic() - start
+        events = [event async for event in engine.debate_stream_async("TSLA")]
+        return result, blocking_seconds, events
+
+    result, blocking_seconds, events = asyncio.run(scenario())
+
+    assert blocking_seconds < 0.2
+    assert result["quorum"]["closed_by"] == "quorum"
+    assert result["quorum"]["fallback_agents"] == ["🤔 Skeptic"]
+    skeptic = [arg for arg in result["agent_arguments"] if arg["agent_name"] == "🤔 Skeptic"][0]
+    assert skeptic["is_fallback"] is True
+
+    types = [event["type"] for event in events]
+    assert types.index("debate_complete") < types.index("agent_upgrade")
+    assert events[-1]["agent"] == "🤔 Skeptic" and events[-1]["data"]["thesis"] == "late but real"
+
+
+def test_iterative_debate_runs_another_round_until_agents_agree(monkeypatch):
+    engine, calls = _offline_engine(monkeypatch)
+    monkeypatch.setattr(settings, "DEBATE_ITERATIVE", True)
+    monkeypatch.setattr(settings, "DEBATE_MAX_ROUNDS", 3)
+    monkeypatch.setattr(settings, "DEBATE_CONSENSUS_THRESHOLD", 0.8)
+    original = engine._get_agent_argument_async
+    digests = []
+
+    async def arguing_agents(symbol, agent_name, *args, prior_digest="", **kwargs):
+        digests.append(prior_digest)
+        arg = await original(symbol, agent_name, *args, **kwargs)
+        # Round one splits 3/2; after reading the digest everyone turns bullish
+        stance = "bullish" if prior_digest or agent_name in ("🦅 Macro Hawk", "💧 Flow Detective", "📊 Tech Interpreter") else "bearish"
+        return arg.model_copy(update={"stance": stance})
+
+    monkeypatch.setattr(engine, "_get_agent_argument_async", arguing_agents)
+
+    result = asyncio.run(engine.debate_move_async("NVDA"))
+
+    assert result["rounds_used"] == 2
+    assert [r["agreement"] for r in result["rounds"]] == [0.6, 1.0]
+    assert len(calls) == 10
+    assert all(digest == "" for digest in digests[:5])
+    assert all("PREVIOUS ROUND 1" in digest for digest in digests[5:])
+
+
+def test_single_round_by_default(monkeypatch):
+    engine, calls = _offline_engine(monkeypatch)
+
+    result = asyncio.run(engine.debate_move_async("AMD"))
+
+    assert result["rounds_used"] == 1 and len(calls) == 5
+
+
+def test_debate_many_shares_market_data_and_macro_backdrop(monkeypatch):
+    engine, calls = _offline_engine(monkeypatch)
+    monkeypatch.setattr(settings, "DEBATE_BATCH_CONCURRENCY", 2)
+    batches, backdrops, contexts = [], [], []
+    running, peak = 0, 0
+
+    def fake_batch(symbols):
+        batches.append(list(symbols))
+        return {s: {"price": 10.0, "change_percent": -2.0, "volume": 5, "symbol": s} for s in symbols}
+
+    async def fake_backdrop(economic_context):
+        backdrops.append(economic_context)
+        calls.append(debate_engine.MACRO_AGENT)
+        return "- Rates on hold.\n- Inflation cooling."
+
+    original_produce = engine._produce_debate
+
+    async def tracking_produce(symbol, economic_context, emit, stream_tokens=True, price_data=None, macro_backdrop=""):
+        nonlocal running, peak
+        assert price_data["change_percent"] == -2.0
+        contexts.append(economic_context)
+        running += 1
+        peak = max(peak, running)
+        try:
+            return await original_produce(symbol, economic_context, emit, stream_tokens, price_data, macro_backdrop)
+        finally:
+            running -= 1
+
+    monkeypatch.setattr(engine, "_get_market_data_batch", fake_batch)
+    monkeypatch.setattr(engine, "_build_macro_backdrop", fake_backdrop)
+    monkeypatch.setattr(engine, "_produce_debate", tracking_produce)
+    monkeypatch.setattr(engine, "_get_market_data", lambda symbol: pytest.fail("fetched per symbol"))
+
+    async def scenario():
+        return [event async for event in engine.debate_many(["aapl", "MSFT", "NVDA", "AAPL"], "CPI Tuesday")]
+
+    events = asyncio.run(scenario())
+
+    assert batches == [["AAPL", "MSFT", "NVDA"]] and backdrops == ["CPI Tuesday"]
+    assert events[0]["type"] == "batch_start" and events[-1]["type"] == "batch_complete"
+    results = [event for event in events if event["type"] == "symbol_result"]
+    assert sorted(event["symbol"] for event in results) == ["AAPL", "MSFT", "NVDA"]
+    assert all("Rates on hold." in context for context in contexts)
+    macro = [event["data"]["agent_arguments"][0] for event in results]
+    assert all(arg["agent_name"] == debate_engine.MACRO_AGENT and not arg["is_fallback"] for arg in macro)
+    assert all(arg["supporting_points"] == ["Rates on hold.", "Inflation cooling."] for arg in macro)
+    # One shared macro call plus four agents per symbol
+    assert peak == 2 and len(calls) == 3 * 4 + 1
+
+
+def test_provisional_result_is_instant_and_uses_last_market_data(monkeypatch):
+    engine, _ = _offline_engine(monkeypatch)
+    monkeypatch.setattr(debate_engine, "_recent_market_data", {})
+
+    start = time.perf_counter()
+    provisional = debate_engine.build_provisional_result("TSLA")
+    assert time.perf_counter() - start < 0.2
+
+    names = [arg["agent_name"] for arg in provisional["agent_arguments"]]
+    assert names == [agent["name"] for agent in debate_engine.AGENT_ROSTER]
+    assert all(arg["is_provisional"] and arg["stance"] for arg in provisional["agent_arguments"])
+    assert provisional["market_context"] == {}
+
+    asyncio.run(engine.debate_move_async("TSLA"))
+    assert debate_engine.build_provisional_result("TSLA")["market_context"]["price"] == 100.0
+
+
+def test_recent_market_data_is_bounded(monkeypatch):
+    monkeypatch.setattr(debate_engine, "_recent_market_data", {})
+    monkeypatch.setattr(debate_engine, "RECENT_MARKET_DATA_MAX_SYMBOLS", 2)
+
+    for symbol, price in [("AAPL", 1.0), ("MSFT", 2.0), ("AAPL", 3.0), ("TSLA", 4.0)]:
+        debate_engine.remember_market_data(symbol, {"price": price})
+
+    assert debate_engine._recent_market_data == {"AAPL": {"price": 3.0}, "TSLA": {"price": 4.0}}
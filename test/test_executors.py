@@ -0,0 +1,64 @@
+import asyncio
+import math
+import threading
+import time
+
+from llm_council.services.llm_client import PRIORITY_BACKGROUND, current_llm_priority, llm_priority
+from services.executors import POOL_CPU, ExecutorPool, get_executor, get_executor_stats
+
+
+def test_pool_is_bounded_and_reports_saturation():
+    pool = ExecutorPool("test_io", max_workers=2)
+    release = threading.Event()
+
+    futures = [pool.submit(release.wait, 5) for _ in range(5)]
+    time.sleep(0.05)
+    busy = pool.get_stats()
+    release.set()
+    for future in futures:
+        future.result()
+    pool.shutdown()
+    done = pool.get_stats()
+
+    assert busy["running"] == 2 and busy["queued"] == 3
+    assert busy["saturation"] == 1.0
+    assert done["peak_in_flight"] == 5
+    assert done["completed"] == 5 and done["failed"] == 0
+    assert done["running"] == 0 and done["queued"] == 0
+    assert done["p95_queue_wait_ms"] >= 40
+
+
+def test_calls_keep_the_callers_context_and_kwargs():
+    pool = ExecutorPool("test_ctx", max_workers=1)
+
+    def describe(prefix, suffix=""):
+        return f"{prefix}{current_llm_priority()}{suffix}"
+
+    async def scenario():
+        with llm_priority(PRIORITY_BACKGROUND):
+            return await pool.run(describe, "<", suffix=">")
+
+    assert asyncio.run(scenario()) == f"<{PRIORITY_BACKGROUND}>"
+    assert pool.call(int, "7") == 7
+    pool.shutdown()
+
+
+def test_failures_are_counted():
+    pool = ExecutorPool("test_fail", max_workers=1)
+
+    try:
+        pool.call(int, "not a number")
+    except ValueError:
+        pass
+    pool.shutdown()
+
+    assert pool.get_stats()["failed"] == 1
+
+
+def test_cpu_pool_runs_in_worker_processes():
+    pool = get_executor(POOL_CPU)
+
+    assert pool.call(math.factorial, 20) == 2432902008176640000
+    stats = get_executor_stats()[POOL_CPU]
+    assert stats["kind"] == "process"
+    assert stats["completed"] >= 1
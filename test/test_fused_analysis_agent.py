@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+from agents.fused_analysis_agent import FusedAnalysisAgent
+from llm_council.services.llm_metrics import add_usage
+
+SECTIONS = {
+    "sentiment": {"score": 0.4, "label": "bullish", "summary": "Upbeat"},
+    "risk": {"risk_score": 55, "verdict": "MODERATE", "reasoning": "Average volatility."},
+    "shariah": {"compliant": True, "score": 85, "reason": "Tech hardware", "issues": []},
+    "persona_post": {"x": "AAPL up 2% 🚀", "linkedin": "Apple rose 2% today."},
+    "moderation": {"x": {"verdict": "WARN", "reason": "Hype"}, "linkedin": {"verdict": "POST", "reason": "Calm"}},
+    "compliance": {"status": "PASS", "issues": [], "notes": "No promises made."},
+}
+
+
+class _FakeLLM:
+    def __init__(self, reply):
+        self.reply = reply
+        self.prompts = []
+
+    async def complete_async(self, prompt, system="", temperature=0.7):
+        self.prompts.append(prompt)
+        add_usage(900, 300)
+        return self.reply
+
+
+def _agent(monkeypatch, reply):
+    monkeypatch.delenv("OPENROUTER_API_KEY", raising=False)
+    agent = FusedAnalysisAgent()
+    agent.llm_client = _FakeLLM(reply)
+    fallbacks = []
+    monkeypatch.setattr(agent.risk_manager, "calculate_risk_metrics",
+                        lambda symbol: {"var_95": -2.1, "max_drawdown": -20.0, "volatility": 25.0})
+    for name in ("sentiment", "risk", "shariah", "persona", "moderation", "compliance"):
+        def fallback(context, *args, name=name):
+            fallbacks.append(name)
+            if name == "persona":
+                context["persona_post"] = {"x": "fallback tweet", "linkedin": "fallback post"}
+        monkeypatch.setattr(agent, f"_fallback_{name}", fallback)
+    return agent, fallbacks
+
+
+def _context():
+    return {
+        "asset": "AAPL",
+        "price_change_pct": "2.00",
+        "move_direction": "UP",
+        "market_opinions": ["Bull (high): demand is strong"],
+        "council_debate": {"consensus_points": [{"statement": "Demand"}], "disagreement_points": []},
+    }
+
+
+def test_one_call_fills_every_post_debate_section(monkeypatch):
+    agent, fallbacks = _agent(monkeypatch, "```json\n" + json.dumps(SECTIONS) + "\n```")
+
+    context = asyncio.run(agent.run_async(_context()))
+
+    assert fallbacks == [] and len(agent.llm_client.prompts) == 1
+    assert context["sentiment_analysis"]["label"] == "BULLISH"
+    assert context["risk_analysis"]["qualitative"]["risk_score"] == 55
+    assert context["risk_analysis"]["metrics"]["volatility"] == 25.0
+    assert context["persona_post"]["x"] == "AAPL up 2% 🚀"
+    assert context["moderated_output"] == "Content Status: WARNING. X: WARN | LINKEDIN: POST"
+    assert context["fused_analysis"]["llm_calls"] == 1
+    assert context["fused_analysis"]["prompt_tokens"] == 900
+
+
+def test_invalid_sections_fall_back_to_their_own_agents(monkeypatch):
+    reply = dict(SECTIONS, risk={"risk_score": 400, "verdict": "HIGH", "reasoning": "x"}, persona_post={"x": ""})
+    agent, fallbacks = _agent(monkeypatch, json.dumps(reply))
+
+    context = asyncio.run(agent.run_async(_context()))
+
+    assert sorted(fallbacks) == ["compliance", "moderation", "persona", "risk"]
+    assert context["persona_post"]["x"] == "fallback tweet"
+    assert context["sentiment_analysis"]["score"] == 0.4
+    assert sorted(context["fused_analysis"]["fallback_sections"]) == [
+        "compliance", "moderation", "persona_post", "risk"
+    ]
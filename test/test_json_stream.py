@@ -0,0 +1,28 @@
+from llm_council.services.json_stream import StreamingJSONFieldParser
+
+
+def test_thesis_is_reported_as_soon_as_it_closes():
+    reply = (
+        '```json\n{"thesis": "AAPL rose 2.1% on \\"strong\\" iPhone data", '
+        '"supporting_points": ["a", {"reason": "b"}], "confidence": "high"}\n```'
+    )
+    parser = StreamingJSONFieldParser()
+    seen = []
+    for i in range(0, len(reply), 7):
+        completed = parser.feed(reply[i:i + 7])
+        if completed:
+            seen.append((i, completed))
+
+    first_offset, first_fields = seen[0]
+    assert first_fields == {"thesis": 'AAPL rose 2.1% on "strong" iPhone data'}
+    assert first_offset < reply.index("supporting_points")
+    assert parser.fields == {
+        "thesis": 'AAPL rose 2.1% on "strong" iPhone data',
+        "confidence": "high",
+    }
+
+
+def test_nested_strings_are_not_reported():
+    parser = StreamingJSONFieldParser()
+    parser.feed('{"points": {"thesis": "nested"}, "label": "BULLISH"}')
+    assert parser.fields == {"label": "BULLISH"}
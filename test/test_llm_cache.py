@@ -0,0 +1,86 @@
+import os
+import time
+
+import pytest
+
+from llm_council.services.llm_cache import LLMResponseCache
+from llm_council.services.llm_client import LLMClient, LLMProviderError
+
+
+def test_cache_expires_and_evicts_least_recently_used():
+    cache = LLMResponseCache(path=None, ttl_seconds=60, max_bytes=200)
+    key_a = LLMResponseCache.make_key("openrouter", "m", "sys", "a", 0.7)
+    key_b = LLMResponseCache.make_key("openrouter", "m", "sys", "b", 0.7)
+    key_c = LLMResponseCache.make_key("openrouter", "m", "sys", "c", 0.7)
+
+    cache.set(key_a, "x" * 30)
+    cache.set(key_b, "y" * 30)
+    assert cache.get(key_a) == "x" * 30  # a is now most recently used
+    cache.set(key_c, "z" * 30)  # over budget -> b is evicted
+
+    assert cache.get(key_b) is None
+    assert cache.get(key_a) == "x" * 30
+    assert cache.evictions == 1
+
+    cache.ttl_seconds = -1
+    cache.set(key_a, "fresh")
+    assert cache.get(key_a) is None
+    assert cache.expirations == 1
+
+
+def test_cache_persists_across_instances(tmp_path):
+    path = str(tmp_path / "llm_cache.json")
+    key = LLMResponseCache.make_key("mistral", "m", "", "prompt", 0.2)
+
+    first = LLMResponseCache(path=path, ttl_seconds=60)
+    first.set(key, "cached answer")
+    first.flush()
+
+    second = LLMResponseCache(path=path, ttl_seconds=60)
+    assert second.get(key) == "cached answer"
+
+
+def test_set_never_writes_on_the_callers_thread(tmp_path):
+    path = str(tmp_path / "llm_cache.json")
+    key = LLMResponseCache.make_key("mistral", "m", "", "prompt", 0.2)
+    cache = LLMResponseCache(path=path, ttl_seconds=60, persist_interval=0.05)
+
+    cache.set(key, "cached answer")
+    assert not os.path.exists(path)
+
+    time.sleep(0.3)
+    assert os.path.exists(path)
+    cache.close()
+    assert LLMResponseCache(path=path, ttl_seconds=60).get(key) == "cached answer"
+
+
+def test_client_serves_repeat_prompts_from_cache():
+    client = LLMClient(
+        provider_type="openrouter",
+        api_key="test-key",
+        model="test/model",
+        cache=LLMResponseCache(path=None),
+        use_cache=True,
+    )
+    calls = []
+
+    def fake_complete(prompt, system="", temperature=0.7):
+        calls.append(prompt)
+        if prompt == "flaky":
+            raise LLMProviderError("openrouter", "HTTP 401", status=401)
+        return f"answer to {prompt}"
+
+    client.provider.complete = fake_complete
+
+    assert client.complete("same") == "answer to same"
+    assert client.complete("same") == "answer to same"
+    # Failures raise, so there is nothing to cache and the next call is sent again
+    for _ in range(2):
+        with pytest.raises(LLMProviderError):
+            client.complete("flaky")
+
+    stats = client.get_stats()
+    assert calls == ["same", "flaky", "flaky"]
+    assert stats["call_count"] == 1
+    assert stats["cache_hits"] == 1
+    assert stats["cache_misses"] == 3
@@ -0,0 +1,407 @@
+import asyncio
+import json
+import threading
+import time
+
+from aiohttp import web
+
+from llm_council.core.config import settings
+from llm_council.services import llm_client
+from llm_council.services.llm_client import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    LLMClient,
+    LLMProviderError,
+    ProviderScheduler,
+    llm_priority,
+    session_manager,
+)
+from llm_council.services.llm_metrics import get_llm_metrics
+
+
+async def _start_fake_provider():
+    async def chat_completions(request):
+        body = await request.json()
+        prompt = body["messages"][-1]["content"]
+        return web.json_response({
+            "choices": [{"message": {"content": f"echo: {prompt}"}}],
+            "usage": {"prompt_tokens": 7, "completion_tokens": 4},
+        })
+
+    async def streamed_chat_completions(request):
+        body = await request.json()
+        if not body.get("stream"):
+            return await chat_completions(request)
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        await response.write(b": keep-alive\n\n")
+        for token in ["Hel", "lo ", "world"]:
+            event = {"choices": [{"delta": {"content": token}}]}
+            await response.write(f"data: {json.dumps(event)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+    async def gemini_generate(request):
+        body = await request.json()
+        assert request.headers["x-goog-api-key"] == "test-key"
+        prompt = body["contents"][-1]["parts"][0]["text"]
+        system = body["systemInstruction"]["parts"][0]["text"]
+        return web.json_response({
+            "candidates": [{"content": {"parts": [{"text": f"{system}: "}, {"text": prompt}]}}]
+        })
+
+    app = web.Application()
+    app.router.add_post("/chat/completions", streamed_chat_completions)
+    app.router.add_post("/models/gemini-test:generateContent", gemini_generate)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def test_async_completions_reuse_pooled_connection():
+    async def scenario():
+        runner, base_url = await _start_fake_provider()
+        try:
+            client = LLMClient(provider_type="mistral", api_key="test-key")
+            client.provider.base_url = base_url
+            before = session_manager.get_stats("mistral")
+
+            responses = [await client.complete_async(f"prompt {i}") for i in range(3)]
+            stats = client.get_stats()["connection_pool"]
+        finally:
+            await session_manager.close()
+            await runner.cleanup()
+        return responses, before, stats
+
+    responses, before, stats = asyncio.run(scenario())
+
+    assert responses == ["echo: prompt 0", "echo: prompt 1", "echo: prompt 2"]
+    assert stats["requests"] - before["requests"] == 3
+    assert stats["connections_created"] - before["connections_created"] == 1
+    assert stats["connections_reused"] - before["connections_reused"] == 2
+
+
+def test_identical_concurrent_requests_share_one_provider_call():
+    client = LLMClient(provider_type="openrouter", api_key="test-key", model="test/model", use_cache=False)
+    calls = []
+
+    async def fake_complete_async(prompt, system="", temperature=0.7):
+        calls.append(prompt)
+        await asyncio.sleep(0.05)
+        return f"answer to {prompt}"
+
+    client.provider.complete_async = fake_complete_async
+
+    async def scenario():
+        return await asyncio.gather(
+            *[client.complete_async("AAPL debate") for _ in range(5)],
+            client.complete_async("MSFT debate"),
+        )
+
+    responses = asyncio.run(scenario())
+
+    assert responses[:5] == ["answer to AAPL debate"] * 5
+    assert responses[5] == "answer to MSFT debate"
+    assert sorted(calls) == ["AAPL debate", "MSFT debate"]
+    stats = client.get_stats()
+    assert stats["call_count"] == 2
+    assert stats["coalesced_calls"] == 4
+    assert stats["single_flight"]["in_flight"] == 0
+
+
+def test_identical_concurrent_streams_share_one_upstream_stream():
+    client = LLMClient(provider_type="openrouter", api_key="test-key", model="test/stream", use_cache=False)
+    calls = []
+
+    async def fake_stream(prompt, system="", temperature=0.7):
+        calls.append(prompt)
+        for chunk in ("Bull", "ish ", "case"):
+            await asyncio.sleep(0.02)
+            yield chunk
+
+    client.provider.complete_stream = fake_stream
+
+    async def collect(delay=0.0):
+        await asyncio.sleep(delay)
+        return [chunk async for chunk in client.complete_stream("AAPL debate")]
+
+    async def scenario():
+        # The late caller joins mid-stream and first gets the buffered chunks
+        return await asyncio.gather(collect(), collect(), collect(delay=0.03))
+
+    results = asyncio.run(scenario())
+
+    assert results == [["Bull", "ish ", "case"]] * 3
+    assert calls == ["AAPL debate"]
+    stats = client.get_stats()
+    assert stats["call_count"] == 1
+    assert stats["coalesced_calls"] == 2
+    assert stats["stream_single_flight"]["in_flight"] == 0
+
+
+def test_scheduler_caps_concurrency_and_queues_excess_work():
+    scheduler = ProviderScheduler("test", max_concurrent=2)
+    active = []
+    peak = []
+
+    async def call(timeout):
+        active.append(1)
+        peak.append(len(active))
+        await asyncio.sleep(0.02)
+        active.pop()
+        return "ok"
+
+    async def scenario():
+        return await asyncio.gather(*[scheduler.run_async(call) for _ in range(6)])
+
+    assert asyncio.run(scenario()) == ["ok"] * 6
+    stats = scheduler.get_stats()
+    assert max(peak) == 2
+    assert stats["granted"] == 6
+    assert stats["max_queue_depth"] >= 4
+    assert stats["queue_depth"] == 0 and stats["in_flight"] == 0
+
+
+def test_interactive_requests_jump_queued_background_work():
+    scheduler = ProviderScheduler("test", max_concurrent=1)
+    order = []
+
+    async def call(name):
+        async def fn(timeout):
+            order.append(name)
+            await asyncio.sleep(0.01)
+            return name
+        return await scheduler.run_async(fn)
+
+    async def background(name):
+        with llm_priority(PRIORITY_BACKGROUND):
+            return await call(name)
+
+    async def scenario():
+        jobs = [asyncio.create_task(background(f"batch-{i}")) for i in range(3)]
+        await asyncio.sleep(0.005)
+        user = asyncio.create_task(call("user"))
+        await asyncio.gather(user, *jobs)
+
+    asyncio.run(scenario())
+
+    assert order == ["batch-0", "user", "batch-1", "batch-2"]
+    classes = scheduler.get_stats()["classes"]
+    assert classes[PRIORITY_BACKGROUND]["granted"] == 3 and classes[PRIORITY_BACKGROUND]["max_queue_depth"] == 2
+    assert classes[PRIORITY_INTERACTIVE]["granted"] == 1
+    assert classes[PRIORITY_BACKGROUND]["avg_wait_ms"] > classes[PRIORITY_INTERACTIVE]["avg_wait_ms"]
+
+
+def test_reserved_slots_are_held_back_from_the_other_class():
+    scheduler = ProviderScheduler(
+        "test", max_concurrent=4, reserved_shares={PRIORITY_INTERACTIVE: 0.25, PRIORITY_BACKGROUND: 0.25}
+    )
+    assert scheduler.reserved == {PRIORITY_INTERACTIVE: 1, PRIORITY_BACKGROUND: 1}
+
+    # Background work never takes the last interactive slot
+    with llm_priority(PRIORITY_BACKGROUND):
+        assert all(scheduler.acquire(timeout=0.01) for _ in range(3))
+        assert not scheduler.acquire(timeout=0.01)
+    assert scheduler.acquire(timeout=0.01)
+    for _ in range(3):
+        scheduler.release(priority=PRIORITY_BACKGROUND)
+    scheduler.release(priority=PRIORITY_INTERACTIVE)
+
+    # Interactive work leaves one slot to queued background work
+    assert all(scheduler.acquire(timeout=0.01) for _ in range(3))
+    granted = []
+    waiter = threading.Thread(target=lambda: granted.append(scheduler.acquire(timeout=1, priority=PRIORITY_BACKGROUND)))
+    waiter.start()
+    time.sleep(0.05)
+    assert not scheduler.acquire(timeout=0.01)
+    waiter.join()
+    assert granted == [True]
+    assert scheduler.get_stats()["classes"][PRIORITY_BACKGROUND]["in_flight"] == 1
+
+
+def test_scheduler_honors_retry_after_then_succeeds():
+    scheduler = ProviderScheduler("test", max_concurrent=1, backoff_base=0.001)
+    attempts = []
+
+    def call(timeout):
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise LLMProviderError("test", "HTTP 429", status=429, retry_after=0.1)
+        return "recovered"
+
+    assert scheduler.run(call) == "recovered"
+    assert attempts[1] - attempts[0] >= 0.1
+    assert scheduler.get_stats()["rate_limited"] == 1
+    assert scheduler.get_stats()["retries"] == 1
+
+
+def test_scheduler_does_not_retry_client_errors():
+    scheduler = ProviderScheduler("test", max_concurrent=1)
+    attempts = []
+
+    def call(timeout):
+        attempts.append(1)
+        raise LLMProviderError("test", "HTTP 401", status=401)
+
+    try:
+        scheduler.run(call)
+    except LLMProviderError as e:
+        assert e.status == 401
+    else:
+        raise AssertionError("expected LLMProviderError")
+    assert len(attempts) == 1
+
+
+def test_complete_stream_yields_sse_deltas():
+    async def scenario():
+        runner, base_url = await _start_fake_provider()
+        try:
+            client = LLMClient(provider_type="openrouter", api_key="test-key", model="test/model", use_cache=False)
+            client.provider.base_url = base_url
+            chunks = [chunk async for chunk in client.complete_stream("hi")]
+        finally:
+            await session_manager.close()
+            await runner.cleanup()
+        return chunks, client.get_stats()
+
+    chunks, stats = asyncio.run(scenario())
+
+    assert chunks == ["Hel", "lo ", "world"]
+    assert stats["call_count"] == 1
+
+
+def test_gemini_completes_natively_on_the_event_loop():
+    async def scenario():
+        runner, base_url = await _start_fake_provider()
+        loop = asyncio.get_running_loop()
+        try:
+            client = LLMClient(provider_type="gemini", api_key="test-key", model="gemini-test", use_cache=False)
+            client.provider.base_url = base_url
+            response = await client.complete_async("what moved?", system="skeptic")
+            stats = client.get_stats()
+        finally:
+            await session_manager.close()
+            await runner.cleanup()
+        return response, stats, loop._default_executor
+
+    response, stats, default_executor = asyncio.run(scenario())
+
+    assert response == "skeptic: what moved?"
+    assert default_executor is None
+    assert stats["connection_pool"]["requests"] >= 1
+    assert stats["scheduler"]["granted"] >= 1
+
+
+class _FakeProvider:
+    def __init__(self, name, model, delay, calls):
+        self.name = name
+        self.model = model
+        self.delay = delay
+        self.calls = calls
+
+    async def complete_async(self, prompt, system="", temperature=0.7):
+        self.calls.append(self.model)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.calls.append(f"{self.model} cancelled")
+            raise
+        return f"{self.model}: {prompt}"
+
+
+def test_slow_request_is_hedged_onto_alternate(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGE_DEFAULT_DELAY_SECONDS", 0.05)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_SAMPLES", 1000)
+    calls = []
+    client = LLMClient(provider_type="openrouter", api_key="k", model="slow/model", use_cache=False, hedging=True)
+    client.provider = _FakeProvider("fake", "slow/model", 1.0, calls)
+    client.alternates = [_FakeProvider("fake", "fast/model", 0.01, calls)]
+
+    response = asyncio.run(client.complete_async("AAPL hedge"))
+
+    assert response == "fast/model: AAPL hedge"
+    assert calls == ["slow/model", "fast/model", "slow/model cancelled"]
+    stats = client.get_stats()["hedging"]
+    assert stats["fired"] == 1 and stats["won"] == 1
+
+
+def test_hedge_budget_caps_backup_requests(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGE_DEFAULT_DELAY_SECONDS", 0.01)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_SAMPLES", 1000)
+    monkeypatch.setattr(llm_client, "hedge_budget", llm_client.HedgeBudget(max_per_minute=1))
+    calls = []
+    client = LLMClient(provider_type="openrouter", api_key="k", model="slow/model", use_cache=False, hedging=True)
+    client.provider = _FakeProvider("fake", "slow/model", 0.05, calls)
+    client.alternates = [_FakeProvider("fake", "other/model", 1.0, calls)]
+
+    async def scenario():
+        return [await client.complete_async(f"prompt {i}") for i in range(2)]
+
+    assert asyncio.run(scenario()) == ["slow/model: prompt 0", "slow/model: prompt 1"]
+    assert calls.count("other/model") == 1
+    stats = client.get_stats()["hedging"]
+    assert stats["fired"] == 1 and stats["won"] == 0 and stats["denied"] == 1
+
+
+class _FailingProvider(_FakeProvider):
+    def __init__(self, name, model, calls):
+        super().__init__(name, model, 0, calls)
+        self.healthy = False
+
+    async def complete_async(self, prompt, system="", temperature=0.7):
+        self.calls.append(self.model)
+        if not self.healthy:
+            raise LLMProviderError(self.name, "HTTP 503", status=503)
+        return f"{self.model}: {prompt}"
+
+
+def test_open_circuit_routes_to_next_healthy_model_and_recovers(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_BREAKER_FAILURE_THRESHOLD", 2)
+    monkeypatch.setattr(settings, "LLM_BREAKER_RESET_SECONDS", 0.05)
+    calls = []
+    client = LLMClient(provider_type="openrouter", api_key="k", model="down/model", use_cache=False, hedging=False)
+    client.provider = _FailingProvider("breaker-test", "down/model", calls)
+    client.alternates = [_FakeProvider("breaker-test", "backup/model", 0, calls)]
+
+    async def ask(prompt):
+        try:
+            return await client.complete_async(prompt)
+        except LLMProviderError:
+            return None
+
+    async def scenario():
+        results = [await ask(f"p{i}") for i in range(3)]
+        await asyncio.sleep(0.06)
+        client.provider.healthy = True
+        results.append(await ask("p3"))
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert results == [None, None, "backup/model: p2", "down/model: p3"]
+    assert calls == ["down/model", "down/model", "backup/model", "down/model"]
+    stats = llm_client.get_breaker_stats()["breaker-test/down/model"]
+    assert stats["state"] == "closed" and stats["times_opened"] == 1
+    assert client.get_stats()["rerouted_calls"] == 1
+
+
+def test_provider_reported_usage_is_recorded():
+    async def scenario():
+        runner, base_url = await _start_fake_provider()
+        try:
+            client = LLMClient(provider_type="openrouter", api_key="test-key", model="usage/model", use_cache=False)
+            client.provider.base_url = base_url
+            await client.complete_async("count me")
+        finally:
+            await session_manager.close()
+            await runner.cleanup()
+        return client.get_stats()
+
+    stats = asyncio.run(scenario())
+
+    assert stats["prompt_tokens"] == 7 and stats["completion_tokens"] == 4
+    model = get_llm_metrics().snapshot()["models"]["openrouter/usage/model"]
+    assert model["calls"] >= 1 and model["usage_reported_ratio"] == 1.0
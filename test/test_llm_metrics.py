@@ -0,0 +1,33 @@
+from llm_council.services.llm_metrics import LLMMetrics, LLMResponse, count_tokens
+
+
+def test_llm_response_is_a_string_carrying_usage():
+    response = LLMResponse("hello", prompt_tokens=12, completion_tokens=3)
+
+    assert response == "hello" and response.upper() == "HELLO"
+    assert response.usage_reported
+    assert not LLMResponse("hello").usage_reported
+    assert count_tokens("") == 0 and count_tokens("some text to count") > 0
+
+
+def test_metrics_aggregate_latency_tokens_and_errors():
+    metrics = LLMMetrics()
+    for latency in [0.1, 0.2, 0.3, 0.4, 3.0]:
+        metrics.record_success("mistral", "small", latency, prompt_tokens=100, completion_tokens=50, usage_reported=True)
+
+    class Boom(Exception):
+        status = 503
+
+    metrics.record_error("mistral", "small", Boom())
+
+    snapshot = metrics.snapshot()
+    model = snapshot["models"]["mistral/small"]
+    assert snapshot["totals"] == {"calls": 5, "errors": 1, "prompt_tokens": 500, "completion_tokens": 250}
+    assert model["error_rate"] == round(1 / 6, 4)
+    assert model["error_types"] == {"http_503": 1}
+    assert model["usage_reported_ratio"] == 1.0
+    assert model["latency_ms"]["p50"] == 300.0
+    assert model["latency_ms"]["p99"] == 3000.0
+    assert model["latency_ms"]["histogram"]["le_250"] == 2
+    assert model["latency_ms"]["histogram"]["le_5000"] == 1
+    assert model["tokens_per_second"] == round(250 / 4.0, 1)
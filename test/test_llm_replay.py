@@ -0,0 +1,63 @@
+import asyncio
+
+from llm_council.core.config import settings
+from llm_council.services.llm_client import LLMClient, LLMProviderError
+from llm_council.services.llm_metrics import LLMResponse
+from llm_council.services.llm_replay import CassetteStore, RecordingProvider, ReplayProvider
+
+
+class _LiveProvider:
+    name = "openrouter"
+    model = "live/model"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def complete_async(self, prompt, system="", temperature=0.7):
+        self.calls += 1
+        await asyncio.sleep(0.02)
+        return LLMResponse(f"live answer to {prompt}", prompt_tokens=9, completion_tokens=5)
+
+
+def test_recorded_completion_replays_without_network(tmp_path):
+    store = CassetteStore(str(tmp_path))
+    live = _LiveProvider()
+    recorder = LLMClient(provider_type="openrouter", api_key="k", model="live/model", use_cache=False)
+    recorder.provider = RecordingProvider(live, store)
+
+    recorded = asyncio.run(recorder.complete_async("AAPL?", system="hawk", temperature=0.6))
+
+    replayer = LLMClient(provider_type="replay", model="openrouter:live/model", use_cache=False)
+    replayer.provider.store = store
+    replayed = asyncio.run(replayer.complete_async("AAPL?", system="hawk", temperature=0.6))
+    streamed = asyncio.run(_collect(replayer.complete_stream("AAPL?", system="hawk", temperature=0.6)))
+
+    assert replayed == recorded == "live answer to AAPL?"
+    assert "".join(streamed) == replayed
+    assert replayed.prompt_tokens == 9
+    assert live.calls == 1
+    assert store.get_stats()["recorded"] == 1
+
+
+def test_replay_miss_is_a_non_retryable_error(tmp_path):
+    provider = ReplayProvider("mistral", "m", CassetteStore(str(tmp_path)))
+
+    try:
+        asyncio.run(provider.complete_async("never recorded"))
+    except LLMProviderError as e:
+        assert e.status == 404 and not e.retryable
+    else:
+        raise AssertionError("expected LLMProviderError")
+
+
+def test_replay_mode_wraps_every_provider(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "LLM_REPLAY_MODE", "replay")
+
+    client = LLMClient(provider_type="mistral", use_cache=False)
+
+    assert isinstance(client.provider, ReplayProvider)
+    assert (client.provider.recorded_provider, client.provider.model) == ("mistral", "mistral-large-latest")
+
+
+async def _collect(stream):
+    return [chunk async for chunk in stream]
@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+from llm_council.services.llm_client import PRIORITY_BACKGROUND, current_llm_priority, llm_priority
+from services.agent_pipeline import AgentPipeline
+from services.executors import POOL_AGENT, run_in_pool
+from services.loop_monitor import LoopLagMonitor
+
+
+class BlockingAgent:
+    reads = ()
+    writes = ("blocked",)
+
+    async def run_async(self, context):
+        # Sync HTTP-style wait inside an async agent: freezes the loop
+        time.sleep(0.3)
+        context["blocked"] = True
+        return context
+
+
+class SleepyAgent:
+    reads = ()
+    writes = ("slept_on",)
+
+    def run(self, context):
+        time.sleep(0.3)
+        context["slept_on"] = current_llm_priority()
+        return context
+
+
+def _run_with_monitor(agents, context):
+    monitor = LoopLagMonitor(interval_seconds=0.01, threshold_seconds=0.1)
+
+    async def scenario():
+        monitor.start()
+        await asyncio.sleep(0.05)
+        with llm_priority(PRIORITY_BACKGROUND):
+            await AgentPipeline(agents).run(context)
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    asyncio.run(scenario())
+    return monitor.get_stats()
+
+
+def test_stall_is_attributed_to_the_blocking_agent():
+    stats = _run_with_monitor([("BlockingAgent", BlockingAgent, True)], {})
+
+    assert stats["stalls"] == 1
+    assert stats["max_lag_ms"] >= 250
+    assert list(stats["culprits"]) == ["BlockingAgent.run_async"]
+    assert stats["recent_stalls"][0]["location"].startswith("test/test_loop_monitor.py")
+
+
+def test_sync_agents_are_offloaded_and_keep_context():
+    context = {}
+    stats = _run_with_monitor([("SleepyAgent", SleepyAgent, False)], context)
+
+    assert stats["stalls"] == 0 and stats["beats"] > 10
+    assert context["slept_on"] == PRIORITY_BACKGROUND
+
+
+def test_run_in_pool_returns_the_call_result():
+    assert asyncio.run(run_in_pool(POOL_AGENT, sorted, [3, 1, 2])) == [1, 2, 3]
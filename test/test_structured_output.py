@@ -0,0 +1,95 @@
+import pytest
+
+from llm_council.models.schemas import AgentReply, ModerationVerdict, RiskAssessment
+from llm_council.services import structured_output
+from llm_council.services.llm_client import GeminiProvider, MistralProvider, OpenRouterProvider
+from llm_council.services.structured_output import (
+    StructuredOutputError,
+    complete_structured,
+    get_structured_output_stats,
+    parse_json,
+    parse_structured,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats(monkeypatch):
+    monkeypatch.setattr(structured_output, "_structured_output_stats", None)
+
+
+def test_near_miss_json_is_repaired_locally():
+    cases = {
+        '```json\n{"risk_score": 70, "verdict": "HIGH", "reasoning": "vol",}\n```': {
+            "risk_score": 70, "verdict": "HIGH", "reasoning": "vol"
+        },
+        "Here you go: { 'verdict': 'WARN', 'reason': 'hype, don\\'t chase' } Thanks!": {
+            "verdict": "WARN", "reason": "hype, don't chase"
+        },
+        '{verdict: "POST", reason: "see https://sec.gov" // fine\n, ok: True}': {
+            "verdict": "POST", "reason": "see https://sec.gov", "ok": True
+        },
+        '{"thesis": "AAPL +2%", "supporting_points": ["iPhone", "services': {
+            "thesis": "AAPL +2%", "supporting_points": ["iPhone", "services"]
+        },
+    }
+    for reply, expected in cases.items():
+        data, repaired = parse_json(reply)
+        assert data == expected
+        assert repaired
+
+
+def test_parse_structured_validates_and_counts_outcomes():
+    reply = parse_structured(
+        '{"thesis": "t", "supporting_points": [{"reason": "a", "details": "b"}], "confidence": "HIGH"}',
+        AgentReply,
+        agent="Bull",
+    )
+    assert reply.supporting_points == ["a - b"] and reply.confidence == "high"
+
+    assert parse_structured("{'risk_score': 40, 'verdict': 'moderate', 'reasoning': 'ok'}", RiskAssessment,
+                            agent="Risk").verdict == "MODERATE"
+    assert parse_structured('{"risk_score": 62.5, "verdict": "HIGH", "reasoning": "x"}', RiskAssessment).risk_score == 62
+    assert parse_structured('{"risk_score": "70.4", "verdict": "HIGH", "reasoning": "x"}', RiskAssessment).risk_score == 70
+    with pytest.raises(StructuredOutputError):
+        parse_structured('{"risk_score": 400, "verdict": "HIGH", "reasoning": "x"}', RiskAssessment, agent="Risk")
+
+    stats = get_structured_output_stats().snapshot()
+    assert stats["Bull"]["clean"] == 1
+    assert stats["Risk"]["repaired"] == 1 and stats["Risk"]["failed"] == 1
+    assert stats["Risk"]["parse_failure_rate"] == 0.5
+
+
+def test_unusable_reply_is_asked_again_with_a_different_prompt():
+    class ScriptedLLM:
+        def __init__(self):
+            self.prompts = []
+            self.replies = ["I think it is fine.", '{"verdict": "post", "reason": "calm"}']
+
+        def complete(self, prompt, system="", temperature=0.7):
+            self.prompts.append(prompt)
+            return self.replies.pop(0)
+
+    llm = ScriptedLLM()
+    verdict = complete_structured(llm, "Review this post", ModerationVerdict, agent="Moderator")
+
+    assert verdict.verdict == "POST"
+    assert len(llm.prompts) == 2 and llm.prompts[1] != llm.prompts[0]
+    stats = get_structured_output_stats().snapshot()["Moderator"]
+    assert stats["retries"] == 1 and stats["failed"] == 1 and stats["clean"] == 1
+
+
+def test_json_mode_is_requested_from_each_provider():
+    providers = [OpenRouterProvider("k", "m"), MistralProvider("k"), GeminiProvider("k")]
+    for provider in providers:
+        assert "response_format" not in provider._payload("p", "s", 0.1)
+        provider.json_mode = True
+
+    assert providers[0]._payload("p", "s", 0.1)["response_format"] == {"type": "json_object"}
+    assert providers[1]._payload("p", "s", 0.1)["response_format"] == {"type": "json_object"}
+    assert providers[2]._payload("p", "s", 0.1)["generationConfig"]["responseMimeType"] == "application/json"
+
+    # Older Gemini models reject the JSON MIME type outright
+    legacy = GeminiProvider("k", "gemini-pro")
+    legacy.json_mode = True
+    assert "responseMimeType" not in legacy._payload("p", "s", 0.1)["generationConfig"]
+    assert GeminiProvider("k", "gemini-2.0-flash").supports_json_mode